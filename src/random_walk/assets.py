@@ -0,0 +1,75 @@
+﻿"""Caches of fonts and rendered text shared by the UI."""
+
+from collections import OrderedDict
+
+import pygame
+
+# Nombre de textes rendus gardes par cache avant d'oublier les plus anciens.
+TEXT_CACHE_SIZE = 64
+
+# Polices deja chargees: SysFont parcourt les polices du systeme a chaque appel.
+_fonts: dict[tuple[str, int], object] = {}
+
+
+def get_font(name: str, size: int):
+    """
+    Return a system font, loading it only on first use.
+
+    Args:
+        name (str): Font name, as for ``pygame.font.SysFont``.
+        size (int): Font size in points.
+
+    Returns:
+        pygame.font.Font: Shared font object.
+    """
+    key = (name, size)
+    font = _fonts.get(key)
+    if font is None:
+        font = _fonts[key] = pygame.font.SysFont(name, size)
+    return font
+
+
+class TextCache:
+    """
+    Rendered text surfaces, reused while the same text and color come back.
+
+    Args:
+        font (pygame.font.Font): Font used to render.
+        max_entries (int): Number of surfaces kept (least recently used dropped first).
+    """
+
+    def __init__(self, font, max_entries: int = TEXT_CACHE_SIZE) -> None:
+        """
+        Create an empty cache for a font.
+
+        Args:
+            font (pygame.font.Font): Font used to render.
+            max_entries (int): Number of surfaces kept (least recently used dropped first).
+
+        Returns:
+            None.
+        """
+        self._font = font
+        self._max_entries = max_entries
+        self._surfaces: OrderedDict = OrderedDict()
+
+    def render(self, text: str, color):
+        """
+        Return the antialiased rendering of a text, from the cache if possible.
+
+        Args:
+            text (str): Text to render.
+            color (str | tuple): Text color.
+
+        Returns:
+            pygame.Surface: Rendered text (shared, must not be modified).
+        """
+        key = (text, color)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            return surface
+        surface = self._surfaces[key] = self._font.render(text, True, color)
+        if len(self._surfaces) > self._max_entries:
+            self._surfaces.popitem(last=False)
+        return surface
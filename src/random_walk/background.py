@@ -0,0 +1,510 @@
+﻿"""Simulation in a background process, sharing positions through shared memory."""
+
+import logging
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .history import PathBuffer, PathView
+from .trajectories import TrajectoryWriter, coordinate_typecode
+
+logger = logging.getLogger(__name__)
+
+# Nombre de points (lignes x marcheurs) que peut contenir l'anneau.
+RING_POINTS = 1 << 20
+
+# Duree visee d'un lot de pas dans le processus de simulation (latence des commandes).
+CHUNK_SECONDS = 0.01
+
+# Attente entre deux essais quand l'anneau est plein (ou vide).
+POLL_INTERVAL = 0.0005
+
+# Cases de l'en-tete: lignes publiees, lignes consommees, simulation terminee.
+_PUBLISHED, _CONSUMED, _FINISHED = range(3)
+_HEADER_SLOTS = 4
+
+
+class PositionRing:
+    """
+    Ring of position rows in a ``multiprocessing.shared_memory`` block.
+
+    One row holds the (x, y) position of every walker after one step. The
+    producer publishes rows and the consumer releases them once read; the
+    producer waits instead of overwriting rows not yet released, so no
+    segment is ever lost.
+
+    Args:
+        nmb_walkers (int): Number of walkers per row.
+        capacity (int): Number of rows in the ring.
+        typecode (str): "i" for int64 coordinates, "d" for doubles.
+        name (str | None): Name of an existing block to attach to (a new one is created if None).
+    """
+
+    def __init__(self, nmb_walkers: int, capacity: int, typecode: str = "d", name: str | None = None) -> None:
+        """
+        Create or attach the shared block and map it as arrays.
+
+        Args:
+            nmb_walkers (int): Number of walkers per row.
+            capacity (int): Number of rows in the ring.
+            typecode (str): "i" for int64 coordinates, "d" for doubles.
+            name (str | None): Name of an existing block to attach to (a new one is created if None).
+
+        Returns:
+            None.
+        """
+        dtype = np.dtype(np.int64 if typecode == "i" else np.float64)
+        header_size = _HEADER_SLOTS * 8
+        size = header_size + capacity * nmb_walkers * 2 * dtype.itemsize
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            # Le createur reste seul responsable de la liberation du bloc.
+            self._shm = shared_memory.SharedMemory(name=name, track=False)
+        self._owner = name is None
+        self.nmb_walkers = nmb_walkers
+        self.capacity = capacity
+        self.typecode = typecode
+        self._header = np.ndarray((_HEADER_SLOTS,), dtype=np.int64, buffer=self._shm.buf)
+        self._rows = np.ndarray((capacity, nmb_walkers, 2), dtype=dtype, buffer=self._shm.buf, offset=header_size)
+
+    def spec(self) -> tuple[int, int, str, str]:
+        """
+        Arguments needed to attach to this ring from another process.
+
+        Args:
+            None.
+
+        Returns:
+            tuple[int, int, str, str]: Walkers, capacity, typecode and block name.
+        """
+        return (self.nmb_walkers, self.capacity, self.typecode, self._shm.name)
+
+    @property
+    def published(self) -> int:
+        """
+        Total number of rows published so far.
+
+        Args:
+            None.
+
+        Returns:
+            int: Row count.
+        """
+        return int(self._header[_PUBLISHED])
+
+    @property
+    def finished(self) -> bool:
+        """
+        Whether the producer has published its last row.
+
+        Args:
+            None.
+
+        Returns:
+            bool: True once the run is over.
+        """
+        return bool(self._header[_FINISHED])
+
+    def finish(self) -> None:
+        """
+        Mark the run as over.
+
+        Args:
+            None.
+
+        Returns:
+            None.
+        """
+        self._header[_FINISHED] = 1
+
+    def write(self, rows: np.ndarray) -> None:
+        """
+        Publish rows, waiting while the consumer has not released enough room.
+
+        Args:
+            rows (numpy.ndarray): Positions, shape (rows, walkers, 2).
+
+        Returns:
+            None.
+        """
+        header = self._header
+        capacity = self.capacity
+        done = 0
+        while done < len(rows):
+            published = int(header[_PUBLISHED])
+            free = capacity - (published - int(header[_CONSUMED]))
+            if free == 0:
+                time.sleep(POLL_INTERVAL)
+                continue
+            # Copie jusqu'a la fin de l'anneau au plus, puis publication du compteur.
+            start = published % capacity
+            count = min(free, len(rows) - done, capacity - start)
+            self._rows[start : start + count] = rows[done : done + count]
+            header[_PUBLISHED] = published + count
+            done += count
+
+    def available(self) -> list[np.ndarray]:
+        """
+        Return the published rows not yet released, without copying them.
+
+        Args:
+            None.
+
+        Returns:
+            list[numpy.ndarray]: Up to two views (the ring may wrap around), in order.
+        """
+        consumed = int(self._header[_CONSUMED])
+        published = int(self._header[_PUBLISHED])
+        start = consumed % self.capacity
+        count = published - consumed
+        first = min(count, self.capacity - start)
+        views = [self._rows[start : start + first]] if first else []
+        if count > first:
+            views.append(self._rows[: count - first])
+        return views
+
+    def release(self, count: int) -> None:
+        """
+        Give back rows to the producer once they have been read.
+
+        Args:
+            count (int): Number of rows read.
+
+        Returns:
+            None.
+        """
+        self._header[_CONSUMED] += count
+
+    def close(self) -> None:
+        """
+        Unmap the block, and free it if this ring created it.
+
+        Args:
+            None.
+
+        Returns:
+            None.
+        """
+        del self._header, self._rows
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+class RingWriter(TrajectoryWriter):
+    """
+    Streaming writer publishing the rows of ``World.simulate`` into a ring.
+
+    ``World.simulate`` starts every run with the current positions, which
+    the consumer already has: that first row is dropped.
+
+    Args:
+        ring (PositionRing): Ring to publish to.
+    """
+
+    def __init__(self, ring: PositionRing) -> None:
+        """
+        Bind the writer to a ring.
+
+        Args:
+            ring (PositionRing): Ring to publish to.
+
+        Returns:
+            None.
+        """
+        self._ring = ring
+        self._skip = True
+
+    def write_block(self, points: np.ndarray) -> None:
+        """
+        Publish the next rows of positions.
+
+        Args:
+            points (numpy.ndarray): Positions, shape (rows, walkers, 2).
+
+        Returns:
+            None.
+        """
+        if self._skip:
+            points = points[1:]
+            self._skip = False
+        self._ring.write(points)
+
+    def close(self, complete: bool = True) -> None:
+        """
+        Nothing to flush: rows are published as they come.
+
+        Args:
+            complete (bool): Unused.
+
+        Returns:
+            None.
+        """
+        return None
+
+
+def _run_background(world, spec: tuple[int, int, str, str], conn, max_steps: int | None) -> None:
+    """
+    Body of the simulation process: advance the world and publish positions.
+
+    Commands received on ``conn``: "pause", "resume" and "stop". On "stop",
+    the world is sent back on ``conn`` before exiting.
+
+    Args:
+        world (World): World to advance (a copy owned by this process).
+        spec (tuple[int, int, str, str]): ``PositionRing.spec`` of the shared ring.
+        conn (multiprocessing.connection.Connection): Control channel.
+        max_steps (int | None): Number of steps to run (None for unlimited).
+
+    Returns:
+        None.
+    """
+    nmb_walkers, capacity, typecode, name = spec
+    ring = PositionRing(nmb_walkers, capacity, typecode, name=name)
+    state = {"paused": False, "stop": False}
+
+    def poll() -> bool:
+        # Traite les commandes en attente; True si l'arret est demande.
+        while conn.poll():
+            command = conn.recv()
+            if command == "stop":
+                state["stop"] = True
+            else:
+                state["paused"] = command == "pause"
+        return state["stop"]
+
+    done = 0
+    chunk = 1
+    while not poll():
+        if state["paused"] or (max_steps is not None and done >= max_steps):
+            if max_steps is not None and done >= max_steps:
+                ring.finish()
+            # En pause (ou fini): on attend la prochaine commande.
+            conn.poll(None)
+            continue
+        size = chunk if max_steps is None else min(chunk, max_steps - done)
+        start = time.perf_counter()
+        world.simulate(size, writer=RingWriter(ring))
+        done += size
+        # Lots d'environ CHUNK_SECONDS pour rester reactif aux commandes.
+        elapsed = time.perf_counter() - start
+        if elapsed < CHUNK_SECONDS / 2:
+            chunk *= 2
+        elif elapsed > CHUNK_SECONDS * 2 and chunk > 1:
+            chunk //= 2
+    conn.send(world)
+    ring.close()
+
+
+class RemoteWalker:
+    """
+    Local copy of a walker simulated in the background process.
+
+    Exposes the same ``position``, ``chemin`` and ``typecode`` as ``Walker``
+    so it can be drawn like one; its history is filled from the ring.
+
+    Args:
+        typecode (str): "i" for lattice coordinates, "d" otherwise.
+        position (tuple[float, float]): Starting position.
+    """
+
+    def __init__(self, typecode: str, position: tuple[float, float]) -> None:
+        """
+        Create a walker copy at its starting position.
+
+        Args:
+            typecode (str): "i" for lattice coordinates, "d" otherwise.
+            position (tuple[float, float]): Starting position.
+
+        Returns:
+            None.
+        """
+        self.typecode = typecode
+        self._chemin = PathBuffer(typecode)
+        self._chemin.append(*position)
+
+    @property
+    def position(self) -> tuple[float, float]:
+        """
+        Last received position.
+
+        Args:
+            None.
+
+        Returns:
+            tuple[float, float]: Current position.
+        """
+        return self._chemin.view()[-1]
+
+    @property
+    def chemin(self) -> PathView:
+        """
+        Sequence view of the positions received so far.
+
+        Args:
+            None.
+
+        Returns:
+            PathView: Path history.
+        """
+        return self._chemin.view()
+
+    def extend(self, xs: list, ys: list) -> None:
+        """
+        Append received positions.
+
+        Args:
+            xs (list): X coordinates.
+            ys (list): Y coordinates.
+
+        Returns:
+            None.
+        """
+        self._chemin.extend(xs, ys)
+
+
+class BackgroundSimulation:
+    """
+    Run a world in a separate process and follow it from the current one.
+
+    The process publishes the position of every walker after each step in
+    a ``PositionRing``; ``poll`` reads the new rows in place and appends
+    them to ``RemoteWalker`` copies used for drawing. Without ``paths``,
+    only the last row is kept (see ``positions``).
+
+    Args:
+        world (World): World to run; it is updated with the final state on ``stop``.
+        max_steps (int | None): Number of steps to run (None for unlimited).
+        paths (bool): Keep the received paths in the walker copies.
+    """
+
+    def __init__(self, world, max_steps: int | None = None, paths: bool = True) -> None:
+        """
+        Create the ring and start the simulation process.
+
+        Args:
+            world (World): World to run; it is updated with the final state on ``stop``.
+            max_steps (int | None): Number of steps to run (None for unlimited).
+            paths (bool): Keep the received paths in the walker copies.
+
+        Returns:
+            None.
+        """
+        self._world = world
+        walkers = world._walkers
+        typecode = coordinate_typecode(walkers)
+        capacity = max(2, RING_POINTS // max(len(walkers), 1))
+        self._ring = PositionRing(len(walkers), capacity, typecode)
+        self._positions = world.positions()
+        self.walkers = [RemoteWalker(typecode, walker.position) for walker in walkers] if paths else []
+        # Processus "spawn": pas de fork d'un processus qui a deja initialise pygame.
+        context = multiprocessing.get_context("spawn")
+        self._conn, child_conn = context.Pipe()
+        self._process = context.Process(
+            target=_run_background, args=(world, self._ring.spec(), child_conn, max_steps), daemon=True
+        )
+        self._process.start()
+        child_conn.close()
+        self.steps_done = 0
+        logger.info("Simulation lancee en arriere-plan (pid %s)", self._process.pid)
+
+    def poll(self) -> int:
+        """
+        Read the rows published since the last call.
+
+        Args:
+            None.
+
+        Returns:
+            int: Number of new steps received.
+        """
+        rows = 0
+        for view in self._ring.available():
+            for i, walker in enumerate(self.walkers):
+                walker.extend(view[:, i, 0].tolist(), view[:, i, 1].tolist())
+            self._positions[:] = view[-1]
+            rows += len(view)
+        self._ring.release(rows)
+        self.steps_done += rows
+        return rows
+
+    def positions(self) -> np.ndarray:
+        """
+        Last received position of every walker.
+
+        Args:
+            None.
+
+        Returns:
+            numpy.ndarray: Positions, shape (walkers, 2), updated in place by ``poll``.
+        """
+        return self._positions
+
+    @property
+    def finished(self) -> bool:
+        """
+        Whether every step has been run and received.
+
+        Args:
+            None.
+
+        Returns:
+            bool: True once the run is over and the ring is empty.
+        """
+        return self._ring.finished and not self._ring.available()
+
+    def pause(self) -> None:
+        """
+        Ask the process to stop stepping until ``resume``.
+
+        Args:
+            None.
+
+        Returns:
+            None.
+        """
+        self._conn.send("pause")
+
+    def resume(self) -> None:
+        """
+        Ask the process to step again.
+
+        Args:
+            None.
+
+        Returns:
+            None.
+        """
+        self._conn.send("resume")
+
+    def stop(self) -> None:
+        """
+        Stop the process and copy the final world state back.
+
+        Rows still in the ring are read first, so the walker copies match
+        the returned world.
+
+        Args:
+            None.
+
+        Returns:
+            None.
+        """
+        self._conn.send("stop")
+        # Continue a vider l'anneau tant que le processus termine son lot.
+        while not self._conn.poll(POLL_INTERVAL):
+            self.poll()
+        remote = self._conn.recv()
+        self.poll()
+        self._process.join()
+        self._ring.close()
+        # Les observateurs ont avance dans l'autre processus: on garde les objets locaux, a jour.
+        observers = self._world._observers
+        for local, copy in zip(observers, remote._observers):
+            local.__dict__.update(copy.__dict__)
+        self._world.__dict__.update(remote.__dict__)
+        self._world._observers = observers
+        logger.info("Simulation d'arriere-plan arretee apres %s pas", self.steps_done)
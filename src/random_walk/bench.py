@@ -0,0 +1,312 @@
+﻿"""Throughput and memory benchmarks of the simulation, with baseline comparison."""
+
+import json
+import logging
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from importlib import metadata
+
+import numpy as np
+
+from .walk_paterns import Continuous, Grid4, Grid8
+from .world import World
+
+logger = logging.getLogger(__name__)
+
+# Version du format des fichiers de resultats.
+BENCH_VERSION = 1
+
+# Modeles de pas mesures, par nom de motif de la CLI.
+PATTERNS = {"grid4": Grid4, "grid8": Grid8, "continuous": Continuous}
+
+# Mesures comparees a la reference: True si une valeur plus grande est meilleure.
+METRICS = {"steps_per_sec": True, "points_per_sec": True, "bytes_per_step": False}
+
+# Ecart relatif tolere avant de signaler une regression.
+DEFAULT_TOLERANCE = 0.15
+
+# Graine fixe: les mesures d'une version a l'autre portent sur les memes marches.
+BENCH_SEED = 0
+
+
+def _best_time(run, repeat: int) -> float:
+    """
+    Best wall time of several runs, the least disturbed by the rest of the machine.
+
+    Args:
+        run (Callable[[], None]): Code to time.
+        repeat (int): Number of runs.
+
+    Returns:
+        float: Shortest duration, in seconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_steps(pattern: str, engine: str, walkers: int, steps: int, repeat: int = 3) -> dict:
+    """
+    Time ``World.simulate`` and measure the memory kept per recorded step.
+
+    Worlds are built outside the timed part. Memory is the growth of the
+    traced allocations over one extra run, divided by the walker steps.
+
+    Args:
+        pattern (str): Step model name (see ``PATTERNS``).
+        engine (str): "python" or "numpy".
+        walkers (int): Number of walkers.
+        steps (int): Steps per walker.
+        repeat (int): Timed runs (the best is kept).
+
+    Returns:
+        dict: Result row with ``seconds``, ``steps_per_sec`` and ``bytes_per_step``.
+    """
+    model = PATTERNS[pattern]
+    worlds = [World(model, walkers, engine=engine, seed=BENCH_SEED) for _ in range(repeat)]
+    seconds = _best_time(lambda: worlds.pop().simulate(steps), repeat)
+    tracemalloc.start()
+    try:
+        world = World(model, walkers, engine=engine, seed=BENCH_SEED)
+        before = tracemalloc.get_traced_memory()[0]
+        world.simulate(steps)
+        kept = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    walker_steps = walkers * steps
+    return {
+        "kind": "steps",
+        "pattern": pattern,
+        "engine": engine,
+        "walkers": walkers,
+        "steps": steps,
+        "seconds": seconds,
+        "steps_per_sec": walker_steps / seconds if seconds > 0 else float("inf"),
+        "bytes_per_step": kept / walker_steps if walker_steps else 0.0,
+    }
+
+
+def bench_export(pattern: str, fmt: str, walkers: int, steps: int, repeat: int = 3) -> dict:
+    """
+    Time ``World.to_file`` on a simulated world.
+
+    Args:
+        pattern (str): Step model name (see ``PATTERNS``).
+        fmt (str): "text" or "binary".
+        walkers (int): Number of walkers.
+        steps (int): Steps per walker.
+        repeat (int): Timed runs (the best is kept).
+
+    Returns:
+        dict: Result row with ``seconds``, ``points_per_sec``, ``bytes`` and ``megabytes_per_sec``.
+    """
+    world = World(PATTERNS[pattern], walkers, engine="numpy", seed=BENCH_SEED)
+    world.simulate(steps)
+    with tempfile.TemporaryDirectory() as folder:
+        filename = os.path.join(folder, "bench.out")
+        seconds = _best_time(lambda: world.to_file(filename, fmt=fmt), repeat)
+        size = os.path.getsize(filename)
+    points = walkers * (steps + 1)
+    return {
+        "kind": "export",
+        "pattern": pattern,
+        "format": fmt,
+        "walkers": walkers,
+        "steps": steps,
+        "seconds": seconds,
+        "points_per_sec": points / seconds if seconds > 0 else float("inf"),
+        "bytes": size,
+        "megabytes_per_sec": size / 1e6 / seconds if seconds > 0 else float("inf"),
+    }
+
+
+def _environment() -> dict:
+    """
+    Describe the machine and versions the results were measured with.
+
+    Args:
+        None.
+
+    Returns:
+        dict: Package, Python and numpy versions, platform and date.
+    """
+    try:
+        version = metadata.version("random-walk")
+    except metadata.PackageNotFoundError:
+        version = None
+    return {
+        "package": version,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.machine(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def run_suite(
+    patterns: list[str],
+    engines: list[str],
+    walkers: list[int],
+    steps: list[int],
+    formats: list[str],
+    repeat: int = 3,
+) -> dict:
+    """
+    Run every step and export benchmark of a grid of settings.
+
+    Exports run once per pattern, format and size (numpy engine for the
+    simulation, which is not timed).
+
+    Args:
+        patterns (list[str]): Step model names.
+        engines (list[str]): Engines to time.
+        walkers (list[int]): Walker counts.
+        steps (list[int]): Step counts.
+        formats (list[str]): Export formats ("text", "binary"), empty to skip exports.
+        repeat (int): Timed runs per measure.
+
+    Returns:
+        dict: JSON-ready document with ``version``, ``environment`` and ``results``.
+    """
+    results = []
+    for pattern in patterns:
+        for engine in engines:
+            for nmb_walkers in walkers:
+                for nmb_steps in steps:
+                    row = bench_steps(pattern, engine, nmb_walkers, nmb_steps, repeat)
+                    logger.info(
+                        "%s/%s %s marcheurs x %s pas: %.3g pas/s",
+                        pattern,
+                        engine,
+                        nmb_walkers,
+                        nmb_steps,
+                        row["steps_per_sec"],
+                    )
+                    results.append(row)
+        for fmt in formats:
+            for nmb_walkers in walkers:
+                for nmb_steps in steps:
+                    row = bench_export(pattern, fmt, nmb_walkers, nmb_steps, repeat)
+                    logger.info("%s export %s: %.3g points/s", pattern, fmt, row["points_per_sec"])
+                    results.append(row)
+    return {"version": BENCH_VERSION, "environment": _environment(), "results": results}
+
+
+def result_key(row: dict) -> tuple:
+    """
+    Identify a measure across runs.
+
+    Args:
+        row (dict): Result row.
+
+    Returns:
+        tuple: Kind, pattern, engine or format, walkers and steps.
+    """
+    return (row["kind"], row["pattern"], row.get("engine", row.get("format")), row["walkers"], row["steps"])
+
+
+def compare(current: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list[dict]:
+    """
+    List the measures that got worse than the baseline by more than ``tolerance``.
+
+    Measures missing from either document are ignored.
+
+    Args:
+        current (dict): Document from ``run_suite``.
+        baseline (dict): Saved document to compare with.
+        tolerance (float): Allowed relative change (0.15 for 15%).
+
+    Returns:
+        list[dict]: One entry per regression: ``key``, ``metric``, ``baseline``, ``current`` and ``change``.
+
+    Raises:
+        ValueError: If the tolerance is negative or the documents have different versions.
+    """
+    if tolerance < 0:
+        raise ValueError("tolerance must be >= 0")
+    if current.get("version") != baseline.get("version"):
+        raise ValueError(f"Benchmark versions differ: {current.get('version')} != {baseline.get('version')}")
+    reference = {result_key(row): row for row in baseline["results"]}
+    regressions = []
+    for row in current["results"]:
+        old = reference.get(result_key(row))
+        if old is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if metric not in row or metric not in old or not old[metric]:
+                continue
+            change = row[metric] / old[metric] - 1
+            if (change < -tolerance) if higher_is_better else (change > tolerance):
+                regressions.append(
+                    {"key": list(result_key(row)), "metric": metric, "baseline": old[metric], "current": row[metric], "change": change}
+                )
+    return regressions
+
+
+def save_results(document: dict, filename: str) -> None:
+    """
+    Write a results document as JSON.
+
+    Args:
+        document (dict): Document from ``run_suite``.
+        filename (str): Output path.
+
+    Returns:
+        None.
+    """
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+        f.write("\n")
+    logger.info("Resultats du banc d'essai ecrits dans %s", filename)
+
+
+def load_results(filename: str) -> dict:
+    """
+    Read a results document written by ``save_results``.
+
+    Args:
+        filename (str): Input path.
+
+    Returns:
+        dict: Results document.
+
+    Raises:
+        ValueError: If the file is not a benchmark document.
+    """
+    with open(filename, encoding="utf-8") as f:
+        document = json.load(f)
+    if not isinstance(document, dict) or "results" not in document:
+        raise ValueError(f"Not a benchmark results file: {filename}")
+    return document
+
+
+def format_table(document: dict) -> str:
+    """
+    Render the results as an aligned text table.
+
+    Args:
+        document (dict): Document from ``run_suite``.
+
+    Returns:
+        str: One line per measure, with a header.
+    """
+    lines = [f"{'measure':<32} {'walkers':>8} {'steps':>8} {'seconds':>9} {'throughput':>14} {'memory':>12}"]
+    for row in document["results"]:
+        if row["kind"] == "steps":
+            name = f"steps {row['pattern']}/{row['engine']}"
+            rate = f"{row['steps_per_sec']:,.0f} st/s"
+            memory = f"{row['bytes_per_step']:.1f} B/st"
+        else:
+            name = f"export {row['pattern']}/{row['format']}"
+            rate = f"{row['megabytes_per_sec']:,.1f} MB/s"
+            memory = f"{row['bytes'] / 1e6:,.1f} MB"
+        lines.append(f"{name:<32} {row['walkers']:>8} {row['steps']:>8} {row['seconds']:>9.4f} {rate:>14} {memory:>12}")
+    return "\n".join(lines)
@@ -5,6 +5,9 @@ class Button:
     """
     Clickable button with optional image and text.
 
+    Both label states (normal and hovered) are rendered once at creation;
+    ``change_color`` only swaps them when the hover state changes.
+
     Args:
         text (str | Any): Label string or pre-rendered surface.
         pos (tuple[int, int]): Center position in pixels.
@@ -35,8 +38,12 @@ class Button:
         self._label = text if isinstance(text, str) else None
         if self._label is None:
             self._text = text
+            self._states = None
         else:
-            self._text = font.render(self._label, True, base_color)
+            # Les deux etats du libelle sont rendus une seule fois.
+            self._states = (font.render(self._label, True, base_color), font.render(self._label, True, hovering_color))
+            self._text = self._states[0]
+        self._hovered = False
         self._text_rect = self._text.get_rect(center=pos)
         self._image = image
         if self._image is None:
@@ -50,6 +57,19 @@ class Button:
         self._hovering_color = hovering_color
         self._screen = screen
 
+    @property
+    def rect(self):
+        """
+        Area covered by the button.
+
+        Args:
+            None.
+
+        Returns:
+            Any: Rectangle of the image, or of the label without image.
+        """
+        return self._rect
+
     def update(self):
         """
         Draw the button onto the screen.
@@ -87,13 +107,14 @@ class Button:
             position (tuple[int, int]): Mouse position in pixels.
 
         Returns:
-            None.
+            bool: True if the label changed and the button must be redrawn.
         """
-        if self._label is None:
-            return
-        # Change la couleur du texte selon le survol.
-        if position[0] in range(self._rect.left, self._rect.right) and position[1] in range(self._rect.top, self._rect.bottom):
-            color = self._hovering_color
-        else:
-            color = self._base_color
-        self._text = self._font.render(self._label, True, color)
+        if self._states is None:
+            return False
+        # Change la couleur du texte selon le survol, sans nouveau rendu.
+        hovered = self.check_for_input(position)
+        if hovered == self._hovered:
+            return False
+        self._hovered = hovered
+        self._text = self._states[hovered]
+        return True
@@ -0,0 +1,446 @@
+﻿"""Diffusion-limited aggregation on the square lattice, with accelerated walkers."""
+
+import logging
+import math
+
+import numpy as np
+
+from . import profiling
+from .walk_paterns import Grid4
+
+logger = logging.getLogger(__name__)
+
+# Rayon du cercle de lancement au-dela du rayon de l'agregat.
+LAUNCH_GAP = 5
+
+# Rayon du cercle d'abandon, en multiple du rayon de lancement.
+KILL_FACTOR = 4.0
+
+# Demi-cote initial de la grille d'occupation (doublee quand l'agregat s'en approche).
+MIN_HALF = 64
+
+# Portee de la carte de distance a l'agregat (au-dela, la distance est seulement "au moins").
+DISTANCE_CAP = 32
+
+# Nombres uniformes tires a la fois pour la boucle a un seul marcheur.
+UNIFORM_BLOCK = 4096
+
+_DX = np.array([dx for dx, _ in Grid4.DIRECTIONS], dtype=np.int64)
+_DY = np.array([dy for _, dy in Grid4.DIRECTIONS], dtype=np.int64)
+
+# Distance de Chebyshev au centre d'un carre de cote 2 * DISTANCE_CAP + 1.
+_OFFSETS = np.abs(np.arange(-DISTANCE_CAP, DISTANCE_CAP + 1))
+_KERNEL = np.maximum(_OFFSETS[:, np.newaxis], _OFFSETS[np.newaxis, :]).astype(np.uint8)
+
+
+class Aggregation:
+    """
+    Grow a DLA cluster from a seed particle at the origin.
+
+    Walkers start on a launch circle just outside the cluster and are
+    relaunched when they leave the kill circle. A walker sticks when it
+    reaches a site next to the cluster: the occupancy grid keeps a
+    "sticky" flag per site, so the test is a single lookup. Walkers move
+    in large jumps while they are far from the cluster: outside the launch
+    circle they jump on a circle that cannot reach it, and inside it the
+    distance map (Chebyshev distance to the nearest particle, up to
+    ``DISTANCE_CAP``) gives a jump radius; only next to the cluster do
+    they take single lattice steps. With several walkers, they all move at once (concurrent growth)
+    and stick in index order.
+
+    The grids cover the cluster plus a margin and
+    are rebuilt at twice the size when it grows out of them. Unlike
+    ``World``, no walker path is kept.
+
+    Args:
+        nmb_particles (int): Size of the cluster to grow, seed included.
+        walkers (int): Number of walkers moving at the same time.
+        seed (int | None): Seed of the random generator.
+        kill_factor (float): Radius of the kill circle, in launch radii.
+    """
+
+    def __init__(self, nmb_particles: int, walkers: int = 1, seed: int | None = None, kill_factor: float = KILL_FACTOR) -> None:
+        """
+        Place the seed particle and launch the walkers.
+
+        Args:
+            nmb_particles (int): Size of the cluster to grow, seed included.
+            walkers (int): Number of walkers moving at the same time.
+            seed (int | None): Seed of the random generator.
+            kill_factor (float): Radius of the kill circle, in launch radii.
+
+        Returns:
+            None.
+
+        Raises:
+            ValueError: If a count is not positive or the kill circle is inside the launch circle.
+        """
+        if nmb_particles < 1 or walkers < 1:
+            raise ValueError("nmb_particles and walkers must be >= 1")
+        if not kill_factor > 1:
+            raise ValueError("kill_factor must be > 1")
+        self._rng = np.random.default_rng(seed)
+        self._seed = seed
+        self._kill_factor = kill_factor
+        self.nmb_particles = nmb_particles
+        self._cluster = np.zeros((nmb_particles, 2), dtype=np.int64)
+        self._size = 0
+        self._radius = 0.0
+        self._allocate(MIN_HALF)
+        self._attach(0, 0)
+        # Compteurs: deplacements de tous les marcheurs, lancements, abandons.
+        self.moves = 0
+        self.launched = 0
+        self.killed = 0
+        self._uniforms: list[float] = []
+        self._cursor = 0
+        self._xs = np.zeros(walkers, dtype=np.int64)
+        self._ys = np.zeros(walkers, dtype=np.int64)
+        self._launch(np.ones(walkers, dtype=bool))
+
+    def __len__(self) -> int:
+        """
+        Number of particles in the cluster.
+
+        Args:
+            None.
+
+        Returns:
+            int: Cluster size.
+        """
+        return self._size
+
+    @property
+    def cluster(self) -> np.ndarray:
+        """
+        Sites of the cluster, in attachment order.
+
+        Args:
+            None.
+
+        Returns:
+            numpy.ndarray: int64 sites, shape (particles, 2).
+        """
+        return self._cluster[: self._size]
+
+    @property
+    def radius(self) -> float:
+        """
+        Largest distance from the origin to a cluster particle.
+
+        Args:
+            None.
+
+        Returns:
+            float: Cluster radius.
+        """
+        return self._radius
+
+    @property
+    def finished(self) -> bool:
+        """
+        Tell whether the cluster reached its target size.
+
+        Args:
+            None.
+
+        Returns:
+            bool: True once complete.
+        """
+        return self._size == self.nmb_particles
+
+    def positions(self) -> np.ndarray:
+        """
+        Current positions of the walkers (none once the cluster is complete).
+
+        Args:
+            None.
+
+        Returns:
+            numpy.ndarray: int64 positions, shape (walkers, 2).
+        """
+        return np.stack([self._xs, self._ys], axis=1)
+
+    def _allocate(self, half: int) -> None:
+        """
+        Build the occupancy, sticky and distance grids for sites within ``half`` of the origin.
+
+        Args:
+            half (int): Half side of the grids, in sites.
+
+        Returns:
+            None.
+        """
+        side = 2 * half + 1
+        self._half = half
+        self._grid = np.zeros((side, side), dtype=bool)
+        self._sticky = np.zeros((side, side), dtype=bool)
+        self._distance = np.full((side + 2 * DISTANCE_CAP,) * 2, DISTANCE_CAP, dtype=np.uint8)
+        for x, y in self.cluster.tolist():
+            self._mark(x + half, y + half)
+
+    def _mark(self, gx: int, gy: int) -> None:
+        """
+        Record a particle in the occupancy, sticky and distance grids.
+
+        Args:
+            gx (int): Grid column of the particle.
+            gy (int): Grid row of the particle.
+
+        Returns:
+            None.
+        """
+        self._grid[gx, gy] = True
+        for dx, dy in Grid4.DIRECTIONS:
+            self._sticky[gx + dx, gy + dy] = True
+        # Carte de distance decalee de DISTANCE_CAP: le carre autour de la particule y est toujours entier.
+        square = self._distance[gx : gx + 2 * DISTANCE_CAP + 1, gy : gy + 2 * DISTANCE_CAP + 1]
+        np.minimum(square, _KERNEL, out=square)
+
+    def _attach(self, x: int, y: int) -> bool:
+        """
+        Add a particle to the cluster, unless its site is already taken.
+
+        Args:
+            x (int): Site X.
+            y (int): Site Y.
+
+        Returns:
+            bool: True if the particle was added.
+        """
+        half = self._half
+        gx = x + half
+        gy = y + half
+        if self._grid[gx, gy]:
+            return False
+        self._cluster[self._size] = (x, y)
+        self._size += 1
+        self._mark(gx, gy)
+        distance = math.hypot(x, y)
+        if distance > self._radius:
+            self._radius = distance
+            # Les marcheurs proches (jusqu'au cercle de lancement + un pas) doivent rester dans la grille.
+            if self._radius + LAUNCH_GAP + 2 > half:
+                self._allocate(2 * half)
+                logger.debug("Grille d'occupation agrandie a %s sites de cote", 2 * self._half + 1)
+        return True
+
+    def _launch(self, mask: np.ndarray) -> None:
+        """
+        Put the selected walkers at random points of the launch circle.
+
+        Args:
+            mask (numpy.ndarray): Boolean mask of the walkers to launch.
+
+        Returns:
+            None.
+        """
+        count = int(mask.sum())
+        if not count:
+            return
+        angles = self._rng.uniform(0.0, 2 * math.pi, count)
+        radius = self._radius + LAUNCH_GAP
+        self._xs[mask] = np.rint(radius * np.cos(angles)).astype(np.int64)
+        self._ys[mask] = np.rint(radius * np.sin(angles)).astype(np.int64)
+        self.launched += count
+
+    def _uniform(self) -> float:
+        """
+        Next uniform number in [0, 1), drawn by blocks for the single-walker loop.
+
+        Args:
+            None.
+
+        Returns:
+            float: Uniform number.
+        """
+        if self._cursor == len(self._uniforms):
+            self._uniforms = self._rng.random(UNIFORM_BLOCK).tolist()
+            self._cursor = 0
+        self._cursor += 1
+        return self._uniforms[self._cursor - 1]
+
+    def _complete(self) -> None:
+        """
+        Drop the walkers once the cluster reached its size.
+
+        Args:
+            None.
+
+        Returns:
+            None.
+        """
+        logger.info("Agregat complet: %s particules, rayon %.1f", self._size, self._radius)
+        self._xs = self._xs[:0]
+        self._ys = self._ys[:0]
+
+    def _step_alone(self) -> None:
+        """
+        Move a single walker, with scalar lookups instead of array passes.
+
+        Args:
+            None.
+
+        Returns:
+            None.
+        """
+        x = int(self._xs[0])
+        y = int(self._ys[0])
+        distance = math.hypot(x, y)
+        launch = self._radius + LAUNCH_GAP
+        if distance > self._kill_factor * launch:
+            self.killed += 1
+            jump = 0.0
+        elif distance > launch:
+            jump = distance - self._radius - 3
+        else:
+            gx = x + self._half
+            gy = y + self._half
+            if self._sticky[gx, gy]:
+                self._attach(x, y)
+                if self.finished:
+                    self._complete()
+                    return
+                jump = 0.0
+            else:
+                jump = float(self._distance[gx + DISTANCE_CAP, gy + DISTANCE_CAP]) - 3
+                if jump < 2:
+                    dx, dy = Grid4.DIRECTIONS[int(self._uniform() * len(Grid4.DIRECTIONS))]
+                    self._xs[0] = x + dx
+                    self._ys[0] = y + dy
+                    return
+        if jump == 0.0:
+            # Abandon ou collage: retour sur le cercle de lancement.
+            x = y = 0
+            jump = self._radius + LAUNCH_GAP
+            self.launched += 1
+        angle = 2 * math.pi * self._uniform()
+        self._xs[0] = x + round(jump * math.cos(angle))
+        self._ys[0] = y + round(jump * math.sin(angle))
+
+    def _step_all(self) -> None:
+        """
+        Move every walker in array passes (concurrent growth).
+
+        Args:
+            None.
+
+        Returns:
+            None.
+        """
+        xs = self._xs
+        ys = self._ys
+        distances = np.hypot(xs, ys)
+        killed = distances > self._kill_factor * (self._radius + LAUNCH_GAP)
+        near = np.flatnonzero(~killed & (distances <= self._radius + LAUNCH_GAP))
+        stuck = near[self._sticky[xs[near] + self._half, ys[near] + self._half]]
+        # Collage dans l'ordre des marcheurs (un site deja pris renvoie simplement le marcheur au lancement).
+        for x, y in zip(xs[stuck].tolist(), ys[stuck].tolist()):
+            self._attach(x, y)
+            if self.finished:
+                self._complete()
+                return
+        self.killed += int(killed.sum())
+        reset = killed.copy()
+        reset[stuck] = True
+        # Rayon de saut sur: loin de l'agregat, la distance a son cercle englobant.
+        jumps = np.where(reset, 0.0, distances - self._radius - 3)
+        near = np.flatnonzero(~reset & (distances <= self._radius + LAUNCH_GAP))
+        gx = xs[near] + self._half
+        gy = ys[near] + self._half
+        # Pres de l'agregat: saut dans le disque libre donne par la carte de distance.
+        free = self._distance[gx + DISTANCE_CAP, gy + DISTANCE_CAP].astype(np.float64) - 3
+        free[free < 2] = 0
+        jumps[near] = free
+        # Les marcheurs devenus collants par un collage de ce tour attendent le tour suivant.
+        walking = near[(free == 0) & ~self._sticky[gx, gy]]
+        jumping = np.flatnonzero(jumps >= 2)
+        angles = self._rng.uniform(0.0, 2 * math.pi, len(jumping))
+        xs[jumping] += np.rint(jumps[jumping] * np.cos(angles)).astype(np.int64)
+        ys[jumping] += np.rint(jumps[jumping] * np.sin(angles)).astype(np.int64)
+        directions = self._rng.integers(0, len(_DX), len(walking))
+        xs[walking] += _DX[directions]
+        ys[walking] += _DY[directions]
+        self._launch(reset)
+
+    def step(self) -> None:
+        """
+        Move every walker once: stick, relaunch, jump or take a lattice step.
+
+        Args:
+            None.
+
+        Returns:
+            None.
+        """
+        if self.finished:
+            return
+        if len(self._xs) == 1:
+            self._step_alone()
+        else:
+            self._step_all()
+        self.moves += 1
+
+    def simulate(self, nmb_moves: int) -> None:
+        """
+        Run ``nmb_moves`` moves of the walkers (fewer if the cluster completes).
+
+        Args:
+            nmb_moves (int): Number of moves.
+
+        Returns:
+            None.
+        """
+        profiler = profiling.active
+        start = profiler.start() if profiler is not None else 0.0
+        moves = self.moves
+        for _ in range(nmb_moves):
+            if self.finished:
+                break
+            self.step()
+        if profiler is not None:
+            profiler.stop("dla.moves", start, self.moves - moves)
+
+    def grow(self, max_moves: int | None = None) -> int:
+        """
+        Move the walkers until the cluster is complete.
+
+        Args:
+            max_moves (int | None): Maximum number of moves (None for no limit).
+
+        Returns:
+            int: Number of particles in the cluster.
+        """
+        logger.info("Croissance d'un agregat de %s particules (%s marcheurs)", self.nmb_particles, len(self._xs))
+        profiler = profiling.active
+        start = profiler.start() if profiler is not None else 0.0
+        moves = 0
+        while not self.finished and (max_moves is None or moves < max_moves):
+            self.step()
+            moves += 1
+        if profiler is not None:
+            profiler.stop("dla.moves", start, moves)
+        logger.info(
+            "%s particules apres %s deplacements, %s lancements, %s abandons",
+            self._size,
+            self.moves,
+            self.launched,
+            self.killed,
+        )
+        return self._size
+
+    def save(self, filename: str) -> None:
+        """
+        Write the cluster as text, one particle per line in attachment order.
+
+        Args:
+            filename (str): Output path.
+
+        Returns:
+            None.
+        """
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write("# x y\n")
+            for x, y in self.cluster.tolist():
+                f.write(f"{x} {y}\n")
+        logger.info("Agregat de %s particules ecrit dans %s", self._size, filename)
@@ -0,0 +1,469 @@
+﻿"""Vectorized NumPy engine holding all walkers as arrays."""
+
+import logging
+import random
+
+import numpy as np
+
+from . import profiling
+from .history import PathView
+from .passage import block_steps, first_hits
+from .walk_paterns import LatticeModel, WalkerStreams, implements, walker_seeds
+
+logger = logging.getLogger(__name__)
+
+# Nombre d'elements (pas x marcheurs) generes par bloc.
+BLOCK_ELEMENTS = 1 << 20
+
+
+def _walk_from(start: np.ndarray, delta: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+    """
+    Positions after each step of a block, summed one step after the other from the start.
+
+    Summing the steps first and adding the start afterwards would round
+    float walks differently depending on where blocks begin; the sequential
+    sum gives the same positions whatever the block size, number of walkers
+    or jobs, like ``itertools.accumulate`` in ``Walker.advance``.
+
+    Args:
+        start (numpy.ndarray): Positions before the block, shape (walkers,).
+        delta (numpy.ndarray): Steps, shape (steps, walkers).
+        out (numpy.ndarray | None): Array receiving the result, if any.
+
+    Returns:
+        numpy.ndarray: Positions, shape (steps, walkers), in the dtype of ``start``.
+    """
+    sums = np.empty((len(delta) + 1, *delta.shape[1:]), dtype=start.dtype)
+    sums[0] = start
+    sums[1:] = delta
+    np.cumsum(sums, axis=0, out=sums)
+    if out is None:
+        return sums[1:]
+    out[:] = sums[1:]
+    return out
+
+
+class ArrayPath(PathView):
+    """
+    Read-only view of one walker path stored in a NumpyEngine.
+
+    Args:
+        engine (NumpyEngine): Engine owning the history arrays.
+        index (int): Walker index in the engine.
+    """
+
+    def __init__(self, engine: "NumpyEngine", index: int) -> None:
+        """
+        Bind the view to a walker column of the engine.
+
+        Args:
+            engine (NumpyEngine): Engine owning the history arrays.
+            index (int): Walker index in the engine.
+
+        Returns:
+            None.
+        """
+        self._engine = engine
+        self._index = index
+        self._scalar = int if engine.typecode == "i" else float
+
+    def columns(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return the X and Y history columns of the walker.
+
+        Args:
+            None.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: X and Y columns (no copy).
+        """
+        # Relu a chaque acces: l'historique peut etre realloue en grandissant.
+        length = self._engine._length
+        return self._engine._hist_x[:length, self._index], self._engine._hist_y[:length, self._index]
+
+
+class ArrayWalker:
+    """
+    Walker facade over one column of a NumpyEngine.
+
+    Args:
+        engine (NumpyEngine): Engine owning the walker state.
+        index (int): Walker index in the engine.
+
+    Attributes:
+        typecode (str): Storage typecode of the coordinates, "i" on lattices, "d" otherwise.
+    """
+
+    def __init__(self, engine: "NumpyEngine", index: int) -> None:
+        """
+        Bind the facade to a walker of the engine.
+
+        Args:
+            engine (NumpyEngine): Engine owning the walker state.
+            index (int): Walker index in the engine.
+
+        Returns:
+            None.
+        """
+        self._engine = engine
+        self._index = index
+        self.typecode = engine.typecode
+
+    @property
+    def position(self) -> tuple[float, float]:
+        """
+        Current (x, y) position, as integers on lattices.
+
+        Args:
+            None.
+
+        Returns:
+            tuple[float, float]: Current position.
+        """
+        return (self._engine._x[self._index].item(), self._engine._y[self._index].item())
+
+    @property
+    def chemin(self) -> ArrayPath | list[tuple[float, float]]:
+        """
+        Sequence view of the positions visited so far.
+
+        Without history recording, only the current position is returned.
+
+        Args:
+            None.
+
+        Returns:
+            ArrayPath | list[tuple[float, float]]: Path history.
+        """
+        if not self._engine._record:
+            return [self.position]
+        return ArrayPath(self._engine, self._index)
+
+
+class NumpyEngine:
+    """
+    Struct-of-arrays engine advancing every walker with block sampling.
+
+    Args:
+        step_model (type): Callable returning a step model with ``sample_block``.
+        nmb_walkers (int): Number of walkers to create.
+        rng (numpy.random.Generator | None): Shared generator (per-walker streams if None).
+        record (bool): Keep the full path history (only the positions otherwise).
+        seed (int | None): Master seed of the per-walker streams (drawn from the global RNG if None).
+        first_index (int): World index of the first walker, used to derive its stream.
+    """
+
+    def __init__(
+        self,
+        step_model,
+        nmb_walkers: int,
+        rng: np.random.Generator | None = None,
+        record: bool = True,
+        seed: int | None = None,
+        first_index: int = 0,
+    ) -> None:
+        """
+        Create the position and history arrays for all walkers.
+
+        Args:
+            step_model (type): Callable returning a step model with ``sample_block``.
+            nmb_walkers (int): Number of walkers to create.
+            rng (numpy.random.Generator | None): Shared generator (per-walker streams if None).
+            record (bool): Keep the full path history (only the positions otherwise).
+            seed (int | None): Master seed of the per-walker streams (drawn from the global RNG if None).
+            first_index (int): World index of the first walker, used to derive its stream.
+
+        Returns:
+            None.
+
+        Raises:
+            ValueError: If the step model cannot sample blocks.
+        """
+        self._model = step_model()
+        if not implements(self._model, "sample_block"):
+            raise ValueError(f"Step model {type(self._model).__name__} does not support the numpy engine")
+        if rng is None:
+            # Un flux par marcheur, derive de la graine maitre et de son indice.
+            master_seed = seed if seed is not None else random.getrandbits(64)
+            rng = WalkerStreams(walker_seeds(master_seed, first_index, nmb_walkers))
+        self._rng = rng
+        self._nmb_walkers = nmb_walkers
+        self._block_steps = max(1, BLOCK_ELEMENTS // max(nmb_walkers, 1))
+        # Grilles: positions int64 et historique int32 (comme le format binaire), sinon float64.
+        self.typecode = "i" if isinstance(self._model, LatticeModel) else "d"
+        position_dtype, self._hist_dtype = (np.int64, np.int32) if self.typecode == "i" else (np.float64, np.float64)
+        # Positions courantes (une colonne par coordonnee) et historique (pas x marcheurs).
+        self._x = np.zeros(nmb_walkers, dtype=position_dtype)
+        self._y = np.zeros(nmb_walkers, dtype=position_dtype)
+        self._record = record
+        self._hist_x = np.zeros((1 if record else 0, nmb_walkers), dtype=self._hist_dtype)
+        self._hist_y = np.zeros((1 if record else 0, nmb_walkers), dtype=self._hist_dtype)
+        self._length = 1
+        self._step = 0
+        logger.debug("NumpyEngine cree: %s marcheurs, blocs de %s pas", nmb_walkers, self._block_steps)
+
+    def positions(self) -> np.ndarray:
+        """
+        Return a copy of the current positions.
+
+        Args:
+            None.
+
+        Returns:
+            numpy.ndarray: Positions, shape (walkers, 2).
+        """
+        return np.stack((self._x, self._y), axis=-1)
+
+    def restore(self, positions: np.ndarray, steps_done: int) -> None:
+        """
+        Restart from given positions after ``steps_done`` steps.
+
+        The history, if recorded, restarts from these positions.
+
+        Args:
+            positions (numpy.ndarray): Positions, shape (walkers, 2).
+            steps_done (int): Number of steps already done by the walkers.
+
+        Returns:
+            None.
+        """
+        self._x[:] = positions[:, 0]
+        self._y[:] = positions[:, 1]
+        self._step = steps_done
+        self._length = 1
+        if self._record:
+            self._hist_x = positions[np.newaxis, :, 0].astype(self._hist_dtype)
+            self._hist_y = positions[np.newaxis, :, 1].astype(self._hist_dtype)
+
+    def remove(self, indices: np.ndarray) -> None:
+        """
+        Drop walkers; the remaining ones keep their streams and are renumbered in order.
+
+        Args:
+            indices (numpy.ndarray): Indices of the walkers to drop.
+
+        Returns:
+            None.
+        """
+        keep = np.ones(self._nmb_walkers, dtype=bool)
+        keep[indices] = False
+        self._x = self._x[keep]
+        self._y = self._y[keep]
+        if self._record:
+            self._hist_x = self._hist_x[: self._length, keep]
+            self._hist_y = self._hist_y[: self._length, keep]
+        if isinstance(self._rng, WalkerStreams):
+            self._rng = self._rng.subset(np.flatnonzero(keep))
+        self._nmb_walkers = len(self._x)
+        self._block_steps = max(1, BLOCK_ELEMENTS // max(self._nmb_walkers, 1))
+
+    def walkers(self) -> list[ArrayWalker]:
+        """
+        Return one walker facade per engine column.
+
+        Args:
+            None.
+
+        Returns:
+            list[ArrayWalker]: Walker views in index order.
+        """
+        return [ArrayWalker(self, i) for i in range(self._nmb_walkers)]
+
+    def _reserve(self, length: int) -> None:
+        """
+        Make sure the history arrays can hold ``length`` points.
+
+        Args:
+            length (int): Required number of rows.
+
+        Returns:
+            None.
+        """
+        capacity = self._hist_x.shape[0]
+        if length <= capacity:
+            return
+        # Croissance geometrique pour amortir les appels pas a pas.
+        new_capacity = max(length, 2 * capacity)
+        for name in ("_hist_x", "_hist_y"):
+            old = getattr(self, name)
+            new = np.empty((new_capacity, self._nmb_walkers), dtype=self._hist_dtype)
+            new[: self._length] = old[: self._length]
+            setattr(self, name, new)
+
+    def advance(self, nmb_steps: int, on_block=None) -> None:
+        """
+        Advance every walker by ``nmb_steps`` steps.
+
+        Args:
+            nmb_steps (int): Number of steps to run.
+            on_block (Callable[[numpy.ndarray], None] | None): Called with the
+                positions of each generated block, shape (steps, walkers, 2).
+
+        Returns:
+            None.
+        """
+        if self._record:
+            self._reserve(self._length + nmb_steps)
+        profiler = profiling.active
+        done = 0
+        while done < nmb_steps:
+            size = min(self._block_steps, nmb_steps - done)
+            clock = profiler.start() if profiler is not None else 0.0
+            if isinstance(self._rng, WalkerStreams):
+                self._rng.begin(self._step)
+            dx, dy = self._model.sample_block(self._rng, (size, self._nmb_walkers))
+            if profiler is not None:
+                clock = profiler.stop("model.sample", clock, size * self._nmb_walkers)
+            start = self._length
+            # Somme cumulee le long de l'axe des pas, depuis la position courante.
+            blocks = []
+            for hist, pos, delta in ((self._hist_x, self._x, dx), (self._hist_y, self._y, dy)):
+                block = _walk_from(pos, delta, hist[start : start + size] if self._record else None)
+                pos[:] = block[-1]
+                blocks.append(block)
+            if profiler is not None:
+                profiler.stop("engine.cumsum", clock, size * self._nmb_walkers)
+            self._length += size
+            self._step += size
+            done += size
+            if on_block is not None:
+                on_block(np.stack(blocks, axis=-1))
+
+    def first_passage(self, target, max_steps: int) -> tuple[np.ndarray, int]:
+        """
+        Run every walker until it reaches the target, for at most ``max_steps`` steps.
+
+        Only the surviving walkers are stepped: the active set is compacted
+        after each block, so the streams, positions and cumulative sums of
+        late blocks cover the survivors alone. Blocks double in length as
+        the run goes on. Absorbed walkers stay on their absorbing position.
+
+        With history recording, one row per step is still written for every
+        walker (absorbed ones repeating their position) so the paths keep a
+        common length.
+
+        Args:
+            target (Callable[[numpy.ndarray, numpy.ndarray], numpy.ndarray]): Absorbing region,
+                see ``passage.Circle``.
+            max_steps (int): Horizon of the run.
+
+        Returns:
+            tuple[numpy.ndarray, int]: Hitting time of every walker (-1 if not
+                absorbed), and the number of steps run (the horizon, or the
+                last hitting time if every walker was absorbed before).
+        """
+        times = np.full(self._nmb_walkers, -1, dtype=np.int64)
+        hit = np.flatnonzero(target(self._x, self._y))
+        times[hit] = 0
+        active = np.flatnonzero(times < 0)
+        xs = self._x[active]
+        ys = self._y[active]
+        rng = self._rng.subset(active) if isinstance(self._rng, WalkerStreams) else self._rng
+        base = self._length
+        done = 0
+        while done < max_steps and len(active):
+            size = block_steps(done, max_steps - done, max(1, BLOCK_ELEMENTS // len(active)))
+            if self._record:
+                # Historique agrandi bloc par bloc: l'horizon peut depasser de loin le dernier passage.
+                self._reserve(base + done + size)
+            if isinstance(rng, WalkerStreams):
+                rng.begin(self._step + done)
+            dx, dy = self._model.sample_block(rng, (size, len(active)))
+            block_x = _walk_from(xs, dx)
+            block_y = _walk_from(ys, dy)
+            columns, rows = first_hits(target(block_x, block_y))
+            if self._record:
+                self._record_passage(base + done, block_x, block_y, active, columns, rows)
+                self._length = base + done + size
+            xs = block_x[-1]
+            ys = block_y[-1]
+            xs[columns] = block_x[rows, columns]
+            ys[columns] = block_y[rows, columns]
+            # Fin du bloc: les absorbes sont figes puis retires de l'ensemble actif.
+            absorbed = active[columns]
+            times[absorbed] = done + rows + 1
+            self._x[absorbed] = xs[columns]
+            self._y[absorbed] = ys[columns]
+            done += size
+            if len(columns):
+                keep = np.ones(len(active), dtype=bool)
+                keep[columns] = False
+                active = active[keep]
+                xs = xs[keep]
+                ys = ys[keep]
+                if isinstance(rng, WalkerStreams):
+                    rng = rng.subset(np.flatnonzero(keep))
+        self._x[active] = xs
+        self._y[active] = ys
+        run = max_steps if len(active) else int(times.max(initial=0))
+        if self._record:
+            # Historique coupe au dernier passage (le dernier bloc a pu aller plus loin).
+            self._length = base + run
+        self._step += run
+        return times, run
+
+    def _record_passage(
+        self,
+        start: int,
+        block_x: np.ndarray,
+        block_y: np.ndarray,
+        active: np.ndarray,
+        columns: np.ndarray,
+        rows: np.ndarray,
+    ) -> None:
+        """
+        Write the history rows of one first-passage block.
+
+        Walkers outside the active set repeat their position; walkers
+        absorbed in the block hold their absorbing position after it.
+
+        Args:
+            start (int): History row of the first step of the block.
+            block_x (numpy.ndarray): X of the active walkers, shape (steps, active).
+            block_y (numpy.ndarray): Y of the active walkers, shape (steps, active).
+            active (numpy.ndarray): Engine indices of the active walkers.
+            columns (numpy.ndarray): Active columns absorbed in the block.
+            rows (numpy.ndarray): Row of their absorption.
+
+        Returns:
+            None.
+        """
+        size = len(block_x)
+        held = np.arange(size)[:, np.newaxis] > rows
+        for hist, pos, block in ((self._hist_x, self._x, block_x), (self._hist_y, self._y, block_y)):
+            absorbed = block[:, columns]
+            absorbed[held] = np.broadcast_to(absorbed[rows, np.arange(len(columns))], absorbed.shape)[held]
+            out = hist[start : start + size]
+            out[:] = pos
+            out[:, active] = block
+            out[:, active[columns]] = absorbed
+
+    def merge_shards(self, shards, nmb_steps: int) -> None:
+        """
+        Store the results of shards advanced by ``nmb_steps`` steps in another process.
+
+        Each shard is written into its columns as it comes, so no full-size
+        block is ever built.
+
+        Args:
+            shards (Iterable[tuple[int, numpy.ndarray, tuple[numpy.ndarray, numpy.ndarray] | None]]):
+                Index of the first walker of each shard, its final positions,
+                shape (walkers, 2), and its x and y history rows, shape
+                (steps, walkers), when recording.
+            nmb_steps (int): Number of steps run by every shard.
+
+        Returns:
+            None.
+        """
+        if self._record:
+            self._reserve(self._length + nmb_steps)
+        rows = slice(self._length, self._length + nmb_steps)
+        for first, positions, history in shards:
+            columns = slice(first, first + len(positions))
+            self._x[columns] = positions[:, 0]
+            self._y[columns] = positions[:, 1]
+            if self._record:
+                self._hist_x[rows, columns] = history[0]
+                self._hist_y[rows, columns] = history[1]
+        self._length += nmb_steps
+        self._step += nmb_steps
@@ -0,0 +1,339 @@
+﻿"""Export of rendered frames as PNG files or a raw RGB stream."""
+
+import logging
+import os
+import queue
+import struct
+import sys
+import threading
+import zlib
+
+import numpy as np
+import pygame
+
+logger = logging.getLogger(__name__)
+
+# Extensions ecrites en flux brut plutot qu'en PNG numerotes.
+RAW_EXTENSIONS = (".rgb", ".raw")
+
+# Niveau zlib des PNG: rapide, les images sont surtout du fond uni.
+PNG_LEVEL = 3
+
+# Images en attente d'encodage avant que le rendu ne soit mis en attente.
+QUEUE_FRAMES = 8
+
+
+def _png_chunk(kind: bytes, payload: bytes) -> bytes:
+    """
+    Build one PNG chunk (length, type, data, CRC).
+
+    Args:
+        kind (bytes): Four-letter chunk type.
+        payload (bytes): Chunk data.
+
+    Returns:
+        bytes: Encoded chunk.
+    """
+    return struct.pack(">I", len(payload)) + kind + payload + struct.pack(">I", zlib.crc32(kind + payload))
+
+
+def encode_png(data: bytes, size: tuple[int, int], level: int = PNG_LEVEL) -> bytes:
+    """
+    Encode RGB pixels as an 8-bit truecolor PNG.
+
+    The compression goes through ``zlib``, which releases the GIL, so the
+    encoder thread runs alongside the simulation.
+
+    Args:
+        data (bytes): RGB pixels, rows top to bottom.
+        size (tuple[int, int]): Image size in pixels.
+        level (int): zlib compression level.
+
+    Returns:
+        bytes: PNG file content.
+    """
+    width, height = size
+    # Chaque ligne commence par son type de filtre (0: aucun).
+    rows = np.zeros((height, 1 + 3 * width), dtype=np.uint8)
+    rows[:, 1:] = np.frombuffer(data, dtype=np.uint8).reshape(height, 3 * width)
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _png_chunk(b"IHDR", header)
+        + _png_chunk(b"IDAT", zlib.compress(rows.tobytes(), level))
+        + _png_chunk(b"IEND", b"")
+    )
+
+
+class FrameSink:
+    """
+    Interface of the frame outputs fed by ``FrameExporter``.
+
+    Sinks receive RGB pixel data (rows top to bottom, 3 bytes per pixel)
+    from the encoder thread, in frame order.
+    """
+
+    def write(self, index: int, data: bytes, size: tuple[int, int]) -> None:
+        """
+        Write one frame.
+
+        Args:
+            index (int): Frame number, from 0.
+            data (bytes): RGB pixels.
+            size (tuple[int, int]): Frame size in pixels.
+
+        Returns:
+            None.
+
+        Raises:
+            NotImplementedError: Always, must be implemented by subclasses.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """
+        Flush and release the output.
+
+        Args:
+            None.
+
+        Returns:
+            None.
+        """
+        return None
+
+
+class PngFrameSink(FrameSink):
+    """
+    Numbered PNG files in a directory (``frame_000000.png``, ...).
+
+    Args:
+        directory (str): Output directory, created if missing.
+    """
+
+    def __init__(self, directory: str) -> None:
+        """
+        Create the output directory.
+
+        Args:
+            directory (str): Output directory, created if missing.
+
+        Returns:
+            None.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+
+    def write(self, index: int, data: bytes, size: tuple[int, int]) -> None:
+        """
+        Encode one frame to its PNG file.
+
+        Args:
+            index (int): Frame number, from 0.
+            data (bytes): RGB pixels.
+            size (tuple[int, int]): Frame size in pixels.
+
+        Returns:
+            None.
+        """
+        with open(os.path.join(self._directory, f"frame_{index:06d}.png"), "wb") as f:
+            f.write(encode_png(data, size))
+
+
+class RawFrameSink(FrameSink):
+    """
+    Concatenated raw RGB frames, e.g. for ``ffmpeg -f rawvideo -pix_fmt rgb24``.
+
+    Args:
+        stream (BinaryIO): Binary output (file, named pipe or stdout).
+        owned (bool): Close the stream with the sink.
+    """
+
+    def __init__(self, stream, owned: bool = True) -> None:
+        """
+        Bind the sink to a binary stream.
+
+        Args:
+            stream (BinaryIO): Binary output (file, named pipe or stdout).
+            owned (bool): Close the stream with the sink.
+
+        Returns:
+            None.
+        """
+        self._stream = stream
+        self._owned = owned
+
+    def write(self, index: int, data: bytes, size: tuple[int, int]) -> None:
+        """
+        Append one frame to the stream.
+
+        Args:
+            index (int): Frame number, from 0.
+            data (bytes): RGB pixels.
+            size (tuple[int, int]): Frame size in pixels.
+
+        Returns:
+            None.
+        """
+        self._stream.write(data)
+
+    def close(self) -> None:
+        """
+        Flush the stream, and close it if owned.
+
+        Args:
+            None.
+
+        Returns:
+            None.
+        """
+        self._stream.flush()
+        if self._owned:
+            self._stream.close()
+
+
+def open_frame_sink(target: str) -> FrameSink:
+    """
+    Choose the frame output from a path.
+
+    "-" streams raw frames to stdout, a path ending in .rgb or .raw (a file
+    or a named pipe) receives raw frames, anything else is a directory of
+    PNG files.
+
+    Args:
+        target (str): "-", a raw file path or a directory.
+
+    Returns:
+        FrameSink: Output to feed a ``FrameExporter``.
+    """
+    if target == "-":
+        return RawFrameSink(sys.stdout.buffer, owned=False)
+    if os.path.splitext(target)[1].lower() in RAW_EXTENSIONS:
+        return RawFrameSink(open(target, "wb"))
+    return PngFrameSink(target)
+
+
+class FrameExporter:
+    """
+    Encode frames on a worker thread while the caller keeps simulating.
+
+    ``submit`` copies the pixels of a surface and queues them; the thread
+    hands them to the sink in order. The queue is bounded, so a slow sink
+    throttles the caller instead of filling the memory. An error raised by
+    the sink is raised again by the next ``submit`` or by ``close``.
+
+    Args:
+        sink (FrameSink): Frame output.
+        queue_frames (int): Maximum number of frames waiting for the sink.
+    """
+
+    def __init__(self, sink: FrameSink, queue_frames: int = QUEUE_FRAMES) -> None:
+        """
+        Start the encoder thread.
+
+        Args:
+            sink (FrameSink): Frame output.
+            queue_frames (int): Maximum number of frames waiting for the sink.
+
+        Returns:
+            None.
+        """
+        self._sink = sink
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_frames)
+        self._error: BaseException | None = None
+        self.frames = 0
+        self._thread = threading.Thread(target=self._run, name="frame-encoder", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        """
+        Body of the encoder thread: write queued frames until the end marker.
+
+        Args:
+            None.
+
+        Returns:
+            None.
+        """
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is None:
+                try:
+                    self._sink.write(*item)
+                except BaseException as exc:
+                    # Erreur conservee pour l'appelant; les images suivantes sont ignorees.
+                    self._error = exc
+
+    def _check(self) -> None:
+        """
+        Raise the error of the encoder thread, if any.
+
+        Args:
+            None.
+
+        Returns:
+            None.
+
+        Raises:
+            BaseException: The error raised by the sink.
+        """
+        if self._error is not None:
+            raise self._error
+
+    def submit(self, surface) -> None:
+        """
+        Queue a copy of a surface as the next frame.
+
+        Args:
+            surface (pygame.Surface): Rendered frame.
+
+        Returns:
+            None.
+        """
+        self._check()
+        self._queue.put((self.frames, pygame.image.tobytes(surface, "RGB"), surface.get_size()))
+        self.frames += 1
+
+    def close(self) -> None:
+        """
+        Wait for the queued frames to be written and close the sink.
+
+        Args:
+            None.
+
+        Returns:
+            None.
+        """
+        self._queue.put(None)
+        self._thread.join()
+        self._sink.close()
+        logger.info("%s images exportees", self.frames)
+        self._check()
+
+    def __enter__(self) -> "FrameExporter":
+        """
+        Enter the context manager.
+
+        Args:
+            None.
+
+        Returns:
+            FrameExporter: The exporter itself.
+        """
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        """
+        Close the exporter.
+
+        Args:
+            exc_type (type | None): Exception type, if any.
+            exc (BaseException | None): Exception instance, if any.
+            tb (TracebackType | None): Traceback, if any.
+
+        Returns:
+            None.
+        """
+        self.close()
@@ -0,0 +1,297 @@
+﻿"""Compact storage and sequence views for walker path histories."""
+
+from array import array
+from collections.abc import Sequence
+
+# Capacite initiale (en points) d'un historique.
+INITIAL_CAPACITY = 16
+
+
+class PathView(Sequence):
+    """
+    Read-only sequence of (x, y) points over two coordinate columns.
+
+    Subclasses provide the columns through ``columns``; the view itself
+    stores nothing and never builds the list of tuples up front.
+    """
+
+    # Type Python des coordonnees lues une a une (int sur les grilles).
+    _scalar = float
+
+    def columns(self):
+        """
+        Return the X and Y columns backing the view.
+
+        Args:
+            None.
+
+        Returns:
+            tuple[Sequence, Sequence]: Indexable columns exposing ``tolist``.
+
+        Raises:
+            NotImplementedError: Always, must be implemented by subclasses.
+        """
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        """
+        Number of points in the path.
+
+        Args:
+            None.
+
+        Returns:
+            int: Path length.
+        """
+        return len(self.columns()[0])
+
+    def __getitem__(self, index):
+        """
+        Return one point, or a list of points for a slice.
+
+        Args:
+            index (int | slice): Point index or slice.
+
+        Returns:
+            tuple[float, float] | list[tuple[float, float]]: Selected point(s).
+        """
+        xs, ys = self.columns()
+        if isinstance(index, slice):
+            return list(zip(xs[index].tolist(), ys[index].tolist()))
+        return (self._scalar(xs[index]), self._scalar(ys[index]))
+
+    def __iter__(self):
+        """
+        Iterate over the (x, y) points.
+
+        Args:
+            None.
+
+        Returns:
+            Iterator[tuple[float, float]]: Points in visiting order.
+        """
+        xs, ys = self.columns()
+        return zip(xs.tolist(), ys.tolist())
+
+    def __eq__(self, other) -> bool:
+        """
+        Compare the path with another sequence of points.
+
+        Args:
+            other (Sequence): Sequence of (x, y) points.
+
+        Returns:
+            bool: True if both sequences hold the same points.
+        """
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self) == len(other) and all(a == tuple(b) for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        """
+        Return a short description of the view.
+
+        Args:
+            None.
+
+        Returns:
+            str: Representation with the path length.
+        """
+        return f"<{type(self).__name__} of {len(self)} points>"
+
+
+class PathBuffer:
+    """
+    Growable contiguous buffer of interleaved (x, y) coordinates.
+
+    Args:
+        typecode (str): ``array`` typecode, "d" for doubles or "i" for int32 lattices.
+    """
+
+    def __init__(self, typecode: str = "d") -> None:
+        """
+        Allocate an empty buffer with a small initial capacity.
+
+        Args:
+            typecode (str): ``array`` typecode, "d" for doubles or "i" for int32 lattices.
+
+        Returns:
+            None.
+        """
+        self._data = array(typecode, bytes(2 * INITIAL_CAPACITY * array(typecode).itemsize))
+        self._length = 0
+        self._cast = float if typecode in "fd" else int
+
+    @property
+    def typecode(self) -> str:
+        """
+        Typecode of the underlying array.
+
+        Args:
+            None.
+
+        Returns:
+            str: ``array`` typecode.
+        """
+        return self._data.typecode
+
+    def __len__(self) -> int:
+        """
+        Number of points stored.
+
+        Args:
+            None.
+
+        Returns:
+            int: Path length.
+        """
+        return self._length
+
+    def append(self, x: float, y: float) -> None:
+        """
+        Append one point, doubling the capacity when full.
+
+        Args:
+            x (float): X coordinate.
+            y (float): Y coordinate.
+
+        Returns:
+            None.
+        """
+        data = self._data
+        i = 2 * self._length
+        if i == len(data):
+            # Croissance geometrique: une reallocation pour chaque doublement.
+            data.frombytes(bytes(len(data) * data.itemsize))
+        data[i] = self._cast(x)
+        data[i + 1] = self._cast(y)
+        self._length += 1
+
+    def extend(self, xs: list, ys: list) -> None:
+        """
+        Append many points at once.
+
+        Args:
+            xs (list): X coordinates.
+            ys (list): Y coordinates, same length as ``xs``.
+
+        Returns:
+            None.
+        """
+        data = self._data
+        start = 2 * self._length
+        stop = start + 2 * len(xs)
+        if stop > len(data):
+            # Meme croissance geometrique que append, en une seule reallocation.
+            capacity = len(data)
+            while capacity < stop:
+                capacity *= 2
+            data.frombytes(bytes((capacity - len(data)) * data.itemsize))
+        if self._cast is int and xs and not isinstance(xs[0], int):
+            xs = map(int, xs)
+            ys = map(int, ys)
+        data[start:stop:2] = array(data.typecode, xs)
+        data[start + 1 : stop : 2] = array(data.typecode, ys)
+        self._length += (stop - start) // 2
+
+    def coordinates(self) -> array:
+        """
+        Return a copy of the interleaved coordinates actually in use.
+
+        A copy rather than a view: an exported buffer would stop the array
+        from growing on the next ``append``.
+
+        Args:
+            None.
+
+        Returns:
+            array.array: Flat coordinates ``x0, y0, x1, y1, ...``.
+        """
+        return self._data[: 2 * self._length]
+
+    def view(self) -> "BufferPath":
+        """
+        Return a sequence view of the stored points.
+
+        Args:
+            None.
+
+        Returns:
+            BufferPath: Read-only view.
+        """
+        return BufferPath(self)
+
+
+class BufferPath(PathView):
+    """
+    Sequence view over a PathBuffer.
+
+    Args:
+        buffer (PathBuffer): Buffer holding the points.
+    """
+
+    def __init__(self, buffer: PathBuffer) -> None:
+        """
+        Bind the view to a buffer.
+
+        Args:
+            buffer (PathBuffer): Buffer holding the points.
+
+        Returns:
+            None.
+        """
+        self._buffer = buffer
+        self._scalar = buffer._cast
+
+    def __len__(self) -> int:
+        """
+        Number of points in the path.
+
+        Args:
+            None.
+
+        Returns:
+            int: Path length.
+        """
+        return len(self._buffer)
+
+    def __getitem__(self, index):
+        """
+        Return one point, or a list of points for a slice, reading only those points.
+
+        Args:
+            index (int | slice): Point index or slice.
+
+        Returns:
+            tuple[float, float] | list[tuple[float, float]]: Selected point(s).
+
+        Raises:
+            IndexError: If the index is out of range.
+        """
+        data = self._buffer._data
+        length = len(self._buffer)
+        if isinstance(index, slice):
+            start, stop, step = index.indices(length)
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            # Copie des seuls points de la tranche, entrelaces.
+            coords = data[2 * start : 2 * max(start, stop)]
+            return list(zip(coords[0::2].tolist(), coords[1::2].tolist()))
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("path index out of range")
+        return (self._scalar(data[2 * index]), self._scalar(data[2 * index + 1]))
+
+    def columns(self) -> tuple[array, array]:
+        """
+        Return copies of the X and Y columns of the buffer.
+
+        Args:
+            None.
+
+        Returns:
+            tuple[array.array, array.array]: X and Y columns, detached from the buffer.
+        """
+        coords = self._buffer.coordinates()
+        return coords[0::2], coords[1::2]
@@ -0,0 +1,129 @@
+﻿"""Multi-resolution simplification of walker paths for drawing."""
+
+import math
+
+from .history import PathBuffer
+
+# Nombre de niveaux: le plus grossier espace ses sommets de 2**MAX_LEVELS unites.
+MAX_LEVELS = 24
+
+
+def level_for(scale: float, depth: int = MAX_LEVELS) -> int:
+    """
+    Choose the coarsest level whose vertex spacing is not larger than a pixel.
+
+    Args:
+        scale (float): Zoom in pixels per world unit.
+        depth (int): Number of simplified levels available.
+
+    Returns:
+        int: Level index, 0 meaning the full path.
+    """
+    if scale >= 0.5:
+        return 0
+    return min(math.floor(math.log2(1.0 / scale)), depth)
+
+
+class PathPyramid:
+    """
+    Pyramid of simplified copies of a path, fed incrementally.
+
+    Level ``k`` (k >= 1) keeps a vertex of level ``k - 1`` only when it
+    lies at least ``2**k`` away (per coordinate) from the previous kept
+    vertex, so a diffusive path keeps about one vertex per ``4**k`` steps.
+    Level 0 is the full path, which the pyramid does not store. Since each
+    level simplifies the one below, a new point only goes up the levels
+    while it is kept, and the errors add up: a dropped point lies within
+    ``2 + 4 + ... + 2**k < 2**(k + 1)`` (per coordinate) of the last kept
+    vertex of level ``k``, that is within two pixels at the level chosen
+    by ``level_for``.
+
+    Args:
+        max_levels (int): Number of simplified levels.
+    """
+
+    def __init__(self, max_levels: int = MAX_LEVELS) -> None:
+        """
+        Create empty levels.
+
+        Args:
+            max_levels (int): Number of simplified levels.
+
+        Returns:
+            None.
+        """
+        self._sizes = [float(2**k) for k in range(1, max_levels + 1)]
+        self._levels = [PathBuffer("d") for _ in self._sizes]
+        self._last: list[tuple[float, float] | None] = [None] * max_levels
+
+    @property
+    def depth(self) -> int:
+        """
+        Number of simplified levels.
+
+        Args:
+            None.
+
+        Returns:
+            int: Highest level index.
+        """
+        return len(self._levels)
+
+    def extend(self, points) -> None:
+        """
+        Feed new points of the path, in visiting order.
+
+        Args:
+            points (Iterable[tuple[float, float]]): New points.
+
+        Returns:
+            None.
+        """
+        levels = self._levels
+        last = self._last
+        sizes = self._sizes
+        for x, y in points:
+            for k, size in enumerate(sizes):
+                vertex = last[k]
+                # Trop proche du dernier sommet: ignore ici et aux niveaux plus grossiers.
+                if vertex is not None and abs(x - vertex[0]) < size and abs(y - vertex[1]) < size:
+                    break
+                last[k] = (x, y)
+                levels[k].append(x, y)
+
+    def __len__(self) -> int:
+        """
+        Number of vertices of the finest simplified level.
+
+        Args:
+            None.
+
+        Returns:
+            int: Vertex count of level 1.
+        """
+        return len(self._levels[0])
+
+    def vertices(self, level: int, start: int = 0) -> list[tuple[float, float]]:
+        """
+        Return the vertices of a simplified level.
+
+        Args:
+            level (int): Level index, from 1 to ``depth``.
+            start (int): Index of the first vertex wanted.
+
+        Returns:
+            list[tuple[float, float]]: Vertices from ``start`` on.
+        """
+        return self._levels[level - 1].view()[start:]
+
+    def count(self, level: int) -> int:
+        """
+        Number of vertices of a simplified level.
+
+        Args:
+            level (int): Level index, from 1 to ``depth``.
+
+        Returns:
+            int: Vertex count.
+        """
+        return len(self._levels[level - 1])
@@ -1,12 +1,218 @@
 ﻿"""Program entry point for the random walk simulation."""
 
 import logging
+import os
+import sys
 
+from . import profiling
 from .walk_paterns import seed, Grid4, Grid8, Continuous, StepModel
 from .world import World
 from .parser import build_parser
 
 
+def _run_bench(args) -> None:
+    """
+    Run the benchmark suite, print it, then save and/or compare the results.
+
+    Args:
+        args (argparse.Namespace): Parsed CLI options.
+
+    Returns:
+        None.
+
+    Raises:
+        SystemExit: With status 1 if a measure regressed against the baseline.
+    """
+    from .bench import compare, format_table, load_results, run_suite, save_results
+
+    logger = logging.getLogger(__name__)
+    document = run_suite(
+        args.bench_patterns,
+        args.bench_engines,
+        args.bench_walkers,
+        args.bench_steps,
+        args.bench_formats,
+        repeat=args.repeat,
+    )
+    sys.stdout.write(format_table(document) + "\n")
+    if args.json is not None:
+        save_results(document, args.json)
+    if args.baseline is None:
+        return
+    regressions = compare(document, load_results(args.baseline), args.tolerance)
+    for regression in regressions:
+        logger.warning(
+            "Regression %s %s: %.4g -> %.4g (%+.1f%%)",
+            " ".join(map(str, regression["key"])),
+            regression["metric"],
+            regression["baseline"],
+            regression["current"],
+            100 * regression["change"],
+        )
+    sys.stdout.write(f"{len(regressions)} regression(s) against {args.baseline}\n")
+    if regressions:
+        raise SystemExit(1)
+
+
+def _run_aggregation(args) -> None:
+    """
+    Grow a DLA cluster, then display and/or write it.
+
+    Args:
+        args (argparse.Namespace): Parsed CLI options.
+
+    Returns:
+        None.
+
+    Raises:
+        ValueError: If the pattern is not grid4.
+    """
+    from .dla import Aggregation
+
+    if args.pattern != "grid4":
+        raise ValueError("--dla grows on the grid4 lattice only")
+    logger = logging.getLogger(__name__)
+    aggregation = Aggregation(args.dla, walkers=args.walkers, seed=args.seed)
+    if args.display in ("screen", "both"):
+        from .screen import Screen
+
+        screen = Screen(aggregation, simulation_fps=args.fps, steps_per_frame=args.steps_per_frame, render="cluster")
+        logger.info("Interface lancee")
+        screen.main_menue()
+
+    if args.display == "frames":
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+        from .frames import FrameExporter, open_frame_sink
+        from .screen import Screen
+
+        screen = Screen(aggregation, max_steps=args.steps, render="cluster", headless=True)
+        with FrameExporter(open_frame_sink(args.frames)) as exporter:
+            screen.export_frames(exporter, every=args.frame_every)
+        logger.info("Images ecrites dans %s", args.frames)
+
+    if args.display in ("text", "both"):
+        if args.display == "text":
+            aggregation.grow()
+        aggregation.save(args.output)
+
+
+def _run_walks(args) -> None:
+    """
+    Simulate free walks, then display and/or write them.
+
+    Args:
+        args (argparse.Namespace): Parsed CLI options.
+
+    Returns:
+        None.
+
+    Raises:
+        ValueError: If an unknown pattern is provided, saw is combined with the numpy
+            engine or --jobs with --stream, --stats or a per-walker summary.
+    """
+    logger = logging.getLogger(__name__)
+    # Choix du modele de pas selon l'option CLI.
+    step_model: type[StepModel]
+    if args.pattern == "grid4":
+        step_model = Grid4
+    elif args.pattern == "grid8":
+        step_model = Grid8
+    elif args.pattern == "continuous":
+        step_model = Continuous
+    elif args.pattern == "saw":
+        from .saw import SelfAvoiding
+
+        if args.engine != "python":
+            # Chaque marche depend de son passe: pas de tirage par blocs vectorises.
+            raise ValueError("--pattern saw requires the python engine")
+        step_model = SelfAvoiding.configured(args.saw_mode, args.steps, args.saw_pivots)
+    else:
+        raise ValueError(f"Unknown pattern: {args.pattern}")
+
+    # Creation du monde de marcheurs (sans historique en mode streaming).
+    stream = args.stream and args.display == "text" and args.record == "full"
+    if stream and args.jobs is not None:
+        raise ValueError("--jobs cannot be combined with --stream")
+    if args.stats is not None and args.jobs is not None:
+        # Les statistiques observent chaque ligne de positions, que les processus ne renvoient pas.
+        raise ValueError("--jobs cannot be combined with --stats")
+    if args.record in ("endpoints", "summary") and args.jobs is not None:
+        # Meme raison pour les agregats par marcheur.
+        raise ValueError(f"--jobs cannot be combined with --record {args.record}")
+    # Export d'images des positions seules, ou sans trajectoires: l'historique ne servirait a rien.
+    positions_only = args.display == "frames" and args.render != "trails"
+    no_trajectories = args.no_trajectories and args.display == "text"
+    world = World(
+        step_model,
+        args.walkers,
+        engine=args.engine,
+        seed=args.seed,
+        record=args.record == "full" and not (stream or positions_only or no_trajectories),
+    )
+    summary = None
+    if args.record in ("endpoints", "summary"):
+        # Agregats par marcheur a la place de l'historique.
+        from .summary import EndpointSummary, PathSummary
+
+        summary = PathSummary() if args.record == "summary" else EndpointSummary()
+        world.observe(summary)
+    stats = None
+    if args.stats is not None:
+        # Statistiques de diffusion calculees au fil des pas, sans historique.
+        from .stats import DiffusionStats
+
+        stats = DiffusionStats()
+        world.observe(stats)
+    if args.display in ("screen", "both"):
+        # Lancement de l'interface graphique si demande.
+        from .screen import Screen
+
+        screen = Screen(
+            world,
+            simulation_fps=args.fps,
+            max_steps=args.steps,
+            steps_per_frame=args.steps_per_frame,
+            background=args.background,
+            render=args.render,
+        )
+        logger.info("Interface lancee")
+        screen.main_menue()
+
+    if args.display == "frames":
+        # Rendu sans fenetre: pilote video factice et pas de banniere pygame sur stdout.
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+        from .frames import FrameExporter, open_frame_sink
+        from .screen import Screen
+
+        screen = Screen(world, max_steps=args.steps, render=args.render, headless=True)
+        with FrameExporter(open_frame_sink(args.frames)) as exporter:
+            screen.export_frames(exporter, every=args.frame_every)
+        logger.info("Images ecrites dans %s", args.frames)
+
+    if args.display in ("text", "both"):
+        # Simulation batch et export des trajectoires si demande.
+        if summary is not None:
+            # Le tableau par marcheur n'est pas un fichier de trajectoires: ecrit meme avec --no-trajectories.
+            if args.display == "text":
+                world.simulate(args.steps, jobs=args.jobs)
+            summary.save(args.output)
+        elif no_trajectories:
+            world.simulate(args.steps, jobs=args.jobs)
+        elif stream:
+            world.stream_to_file(args.output, args.steps, fmt=args.format)
+            logger.info("Trajectoires ecrites dans %s", args.output)
+        else:
+            if args.display == "text":
+                world.simulate(args.steps, jobs=args.jobs)
+            world.to_file(args.output, fmt=args.format)
+            logger.info("Trajectoires ecrites dans %s", args.output)
+
+    if stats is not None:
+        stats.save(args.stats)
+
+
 def main() -> None:
     """
     Run the CLI entry point and start the simulation.
@@ -31,43 +237,38 @@ def main() -> None:
     logging.basicConfig(level=log_level, format="%(levelname)s:%(name)s:%(message)s")
     logger = logging.getLogger(__name__)
 
+    if args.command == "bench":
+        # Banc d'essai a la place d'une simulation.
+        _run_bench(args)
+        return
+
     # Initialisation du generateur aleatoire et recapitulatif de config.
     logger.info("Demarrage de la simulation")
     seed(args.seed)
     logger.info(
-        "Seed=%s, pattern=%s, walkers=%s, fps=%s, steps=%s, display=%s",
+        "Seed=%s, pattern=%s, engine=%s, walkers=%s, fps=%s, steps=%s, display=%s, record=%s",
         args.seed,
         args.pattern,
+        args.engine,
         args.walkers,
         args.fps,
         args.steps,
         args.display,
+        args.record,
     )
 
-    # Choix du modele de pas selon l'option CLI.
-    step_model: type[StepModel]
-    if args.pattern == "grid4":
-        step_model = Grid4
-    elif args.pattern == "grid8":
-        step_model = Grid8
-    elif args.pattern == "continuous":
-        step_model = Continuous
-    else:
-        raise ValueError(f"Unknown pattern: {args.pattern}")
-
-    # Creation du monde de marcheurs.
-    world = World(step_model, args.walkers)
-    if args.display in ("screen", "both"):
-        # Lancement de l'interface graphique si demande.
-        from .screen import Screen
-
-        screen = Screen(world, simulation_fps=args.fps, max_steps=args.steps)
-        logger.info("Interface lancee")
-        screen.main_menue()
-
-    if args.display in ("text", "both"):
-        # Simulation batch et export des trajectoires si demande.
-        if args.display == "text":
-            world.simulate(args.steps)
-        world.to_file(args.output)
-        logger.info("Trajectoires ecrites dans %s", args.output)
+    profiler = None
+    if args.profile is not None:
+        # Mesures par phase: resumes periodiques et bilan final en INFO, meme sans -v.
+        profiler = profiling.enable(args.profile)
+        logging.getLogger(profiling.__name__).setLevel(logging.INFO)
+    try:
+        if args.dla is not None:
+            # Agregation limitee par diffusion a la place des marches libres.
+            _run_aggregation(args)
+        else:
+            _run_walks(args)
+    finally:
+        if profiler is not None:
+            profiling.disable()
+            profiler.report(final=True)
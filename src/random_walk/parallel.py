@@ -0,0 +1,124 @@
+﻿"""Multi-process sharded simulation of independent walkers."""
+
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .engine import NumpyEngine
+from .walk_paterns import WalkerStreams
+
+logger = logging.getLogger(__name__)
+
+
+def shard_bounds(nmb_walkers: int, jobs: int) -> list[tuple[int, int]]:
+    """
+    Split walker indices into contiguous, balanced shards.
+
+    Args:
+        nmb_walkers (int): Number of walkers.
+        jobs (int): Number of shards wanted.
+
+    Returns:
+        list[tuple[int, int]]: (start, stop) index ranges, in walker order.
+    """
+    jobs = max(1, min(jobs, nmb_walkers))
+    size, extra = divmod(nmb_walkers, jobs)
+    bounds = []
+    start = 0
+    for k in range(jobs):
+        stop = start + size + (1 if k < extra else 0)
+        bounds.append((start, stop))
+        start = stop
+    return bounds
+
+
+def _run_walker_shard(walkers: list, nmb_steps: int) -> list:
+    """
+    Advance a shard of Walker objects.
+
+    Args:
+        walkers (list[Walker]): Walkers of the shard, each with its own generator.
+        nmb_steps (int): Number of steps to run.
+
+    Returns:
+        list[Walker]: The advanced walkers.
+    """
+    for walker in walkers:
+        walker.advance(nmb_steps)
+    return walkers
+
+
+def _run_array_shard(
+    step_model,
+    starts: np.ndarray,
+    streams: WalkerStreams,
+    steps_done: int,
+    nmb_steps: int,
+    record: bool,
+) -> tuple[np.ndarray, tuple[np.ndarray, np.ndarray] | None]:
+    """
+    Advance a shard of numpy-engine walkers.
+
+    Args:
+        step_model (type): Callable returning a step model with ``sample_block``.
+        starts (numpy.ndarray): Current positions of the shard, shape (walkers, 2).
+        streams (WalkerStreams): Streams of the walkers of the shard.
+        steps_done (int): Steps already done by the walkers.
+        nmb_steps (int): Number of steps to run.
+        record (bool): Return the new history rows as well.
+
+    Returns:
+        tuple[numpy.ndarray, tuple[numpy.ndarray, numpy.ndarray] | None]: Final
+            positions, shape (walkers, 2), and the x and y history rows of the
+            steps run, shape (steps, walkers), or None without recording.
+    """
+    # Memes flux par marcheur que le moteur complet, y compris apres des retraits.
+    engine = NumpyEngine(step_model, len(starts), rng=streams, record=record)
+    engine.restore(starts, steps_done)
+    engine.advance(nmb_steps)
+    if not record:
+        return engine.positions(), None
+    # Sans la ligne de depart, deja presente dans l'historique du monde.
+    return engine.positions(), (engine._hist_x[1 : engine._length], engine._hist_y[1 : engine._length])
+
+
+def simulate_sharded(world, nmb_steps: int, jobs: int) -> None:
+    """
+    Advance every walker of a world in a pool of worker processes.
+
+    Walkers own their random streams, so results do not depend on ``jobs``.
+
+    Args:
+        world (World): World to advance in place.
+        nmb_steps (int): Number of steps to run.
+        jobs (int): Number of worker processes.
+
+    Returns:
+        None.
+    """
+    bounds = shard_bounds(len(world._walkers), jobs)
+    logger.info("Simulation repartie sur %s processus (%s shards)", jobs, len(bounds))
+    with ProcessPoolExecutor(max_workers=len(bounds)) as pool:
+        if world._engine is None:
+            futures = [pool.submit(_run_walker_shard, world._walkers[a:b], nmb_steps) for a, b in bounds]
+            # Fusion dans l'ordre des marcheurs.
+            for (a, b), future in zip(bounds, futures):
+                world._walkers[a:b] = future.result()
+        else:
+            engine = world._engine
+            starts = engine.positions()
+            futures = [
+                pool.submit(
+                    _run_array_shard,
+                    world._step_model,
+                    starts[a:b],
+                    engine._rng.subset(np.arange(a, b)),
+                    engine._step,
+                    nmb_steps,
+                    engine._record,
+                )
+                for a, b in bounds
+            ]
+            # Chaque shard est recopie a sa place, sans tableau complet intermediaire.
+            engine.merge_shards(((a, *future.result()) for (a, _), future in zip(bounds, futures)), nmb_steps)
@@ -47,6 +47,68 @@ def _positive_int(value: str) -> int:
     return ivalue
 
 
+def _steps_per_frame(value: str) -> int | None:
+    """
+    Parse a number of steps per frame, or "auto" for the adaptive mode.
+
+    Args:
+        value (str): Input string to parse.
+
+    Returns:
+        int | None: Parsed integer (>= 1), or None for "auto".
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is neither "auto" nor a positive integer.
+    """
+    if value == "auto":
+        return None
+    return _positive_int(value)
+
+
+def _positive_float(value: str) -> float:
+    """
+    Parse a strictly positive number.
+
+    Args:
+        value (str): Input string to parse.
+
+    Returns:
+        float: Parsed number (> 0).
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not a positive number.
+    """
+    try:
+        fvalue = float(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError("doit être un nombre") from exc
+    if not fvalue > 0:
+        raise argparse.ArgumentTypeError("doit être > 0")
+    return fvalue
+
+
+def _non_negative_float(value: str) -> float:
+    """
+    Parse a non-negative number.
+
+    Args:
+        value (str): Input string to parse.
+
+    Returns:
+        float: Parsed number (>= 0).
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not a non-negative number.
+    """
+    try:
+        fvalue = float(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError("doit être un nombre") from exc
+    if not fvalue >= 0:
+        raise argparse.ArgumentTypeError("doit être >= 0")
+    return fvalue
+
+
 def build_parser() -> argparse.ArgumentParser:
     """
     Create and return the CLI argument parser.
@@ -81,17 +143,57 @@ def build_parser() -> argparse.ArgumentParser:
         default=24,
         help="Nombre d'images par seconde (FPS) pour la simulation.",
     )
+    p.add_argument(
+        "--steps-per-frame",
+        type=_steps_per_frame,
+        default=1,
+        help=(
+            "Nombre de pas simules entre deux images de l'interface, ou auto pour simuler autant de pas "
+            "que le permet le budget de chaque image (modifiable avec +/- et A pendant la simulation)."
+        ),
+    )
+    p.add_argument(
+        "--background",
+        action="store_true",
+        help="Dans l'interface, simule dans un processus separe qui partage les positions en memoire partagee.",
+    )
+    p.add_argument(
+        "--render",
+        type=str,
+        choices=["trails", "particles", "density"],
+        default="trails",
+        help=(
+            "Rendu de l'interface: trainees de chaque marcheur, un pixel par marcheur (particles) "
+            "ou carte de densite des positions (density), adaptes a un grand nombre de marcheurs."
+        ),
+    )
     # Modes d'affichage et de sortie.
     p.add_argument(
         "--display",
         type=str,
-        choices=["screen", "text", "both"],
+        choices=["screen", "text", "both", "frames"],
         default="text",
         help=(
             "Mode d'affichage: screen pour l'interface, text pour ecrire les trajectoires dans un fichier .txt, "
-            "both pour lancer l'interface puis ecrire le fichier a la fermeture."
+            "both pour lancer l'interface puis ecrire le fichier a la fermeture, frames pour exporter "
+            "les images de la vue sans fenetre (voir --frames)."
         ),
     )
+    p.add_argument(
+        "--frames",
+        type=str,
+        default="frames",
+        help=(
+            "Sortie du mode frames: dossier d'images PNG numerotees, fichier ou tube nomme .rgb/.raw, "
+            "ou - pour ecrire les images RGB brutes sur la sortie standard (ex: vers ffmpeg -f rawvideo)."
+        ),
+    )
+    p.add_argument(
+        "--frame-every",
+        type=_positive_int,
+        default=1,
+        help="En mode frames, nombre de pas simules entre deux images exportees.",
+    )
     p.add_argument(
         "-o",
         "--output",
@@ -99,6 +201,46 @@ def build_parser() -> argparse.ArgumentParser:
         default="random_walk.txt",
         help="Fichier de sortie en mode text/both (par defaut: random_walk.txt).",
     )
+    p.add_argument(
+        "--format",
+        type=str,
+        choices=["auto", "text", "binary"],
+        default="auto",
+        help="Format du fichier de sortie: auto (binaire si l'extension est .rwb ou .bin), text ou binary.",
+    )
+    p.add_argument(
+        "--stream",
+        action="store_true",
+        help="En mode text, ecrit les trajectoires au fil de la simulation sans garder l'historique en memoire.",
+    )
+    p.add_argument(
+        "--record",
+        type=str,
+        choices=["full", "none", "endpoints", "summary"],
+        default="full",
+        help=(
+            "Ce qui est garde pour chaque marcheur: full pour tout le trajet, none pour la seule position, "
+            "endpoints pour les positions de depart et d'arrivee, summary pour y ajouter les bornes et "
+            "l'excursion maximale. Avec endpoints et summary, le fichier de sortie est un tableau par marcheur."
+        ),
+    )
+    p.add_argument(
+        "--stats",
+        type=str,
+        default=None,
+        help=(
+            "Fichier ou ecrire le deplacement quadratique moyen, les moments de position et le coefficient "
+            "de diffusion, mesures a des pas espaces logarithmiquement pendant la simulation."
+        ),
+    )
+    p.add_argument(
+        "--no-trajectories",
+        action="store_true",
+        help=(
+            "En mode text, n'ecrit pas le fichier de trajectoires (utile avec --stats) et ne garde pas "
+            "d'historique; le tableau de --record endpoints/summary est toujours ecrit."
+        ),
+    )
     # Logs, population et modele de marche.
     p.add_argument(
         "-v",
@@ -107,6 +249,20 @@ def build_parser() -> argparse.ArgumentParser:
         default=0,
         help="Augmente la verbosité des logs (ex: -v, -vv).",
     )
+    p.add_argument(
+        "--profile",
+        type=_positive_float,
+        nargs="?",
+        const=5.0,
+        default=None,
+        metavar="SECONDES",
+        help=(
+            "Mesure le temps passe dans chaque phase (tirage des pas, ajout a l'historique, bornes de la vue, "
+            "conversion en coordonnees ecran, trace, affichage), en resume dans les logs toutes les SECONDES "
+            "(5 par defaut) puis en bilan final; dans l'interface, la touche O affiche ou masque la surcouche. "
+            "Le processus de --background n'est pas mesure."
+        ),
+    )
     p.add_argument(
         "--walkers",
         type=_positive_int,
@@ -116,8 +272,134 @@ def build_parser() -> argparse.ArgumentParser:
     p.add_argument(
         "--pattern",
         type=str,
-        choices=["grid4", "grid8", "continuous"],
+        choices=["grid4", "grid8", "continuous", "saw"],
         default="grid4",
-        help="Modèle de marche aléatoire à utiliser parmi grid4, grid8 ou continuous.",
+        help=(
+            "Modèle de marche aléatoire à utiliser parmi grid4, grid8, continuous ou saw "
+            "(marche auto-évitante sur la grille 4 voisins, moteur python uniquement)."
+        ),
+    )
+    p.add_argument(
+        "--saw-mode",
+        type=str,
+        choices=["pivot", "growth"],
+        default="pivot",
+        help=(
+            "Échantillonnage de la marche auto-évitante: pivot (marche de --steps pas tirée par "
+            "l'algorithme du pivot, adaptée aux marches longues) ou growth (chaque pas parmi les "
+            "voisins libres, la marche peut se bloquer)."
+        ),
+    )
+    p.add_argument(
+        "--saw-pivots",
+        type=_positive_int,
+        default=None,
+        help=(
+            "Nombre de pivots acceptés après l'assemblage de chaque marche en mode pivot, suivis d'autant "
+            "de tentatives (par défaut, quatre par pas et au plus 1000)."
+        ),
+    )
+    p.add_argument(
+        "--dla",
+        type=_positive_int,
+        default=None,
+        metavar="PARTICULES",
+        help=(
+            "Fait croitre un agregat DLA de PARTICULES particules sur la grille 4 voisins au lieu de "
+            "simuler des marches libres; --walkers marcheurs se deplacent en meme temps. En mode text, "
+            "les coordonnees de l'agregat sont ecrites dans --output; l'interface et le mode frames "
+            "affichent l'agregat (--steps borne alors le nombre de deplacements exportes)."
+        ),
+    )
+    p.add_argument(
+        "--engine",
+        type=str,
+        choices=["python", "numpy"],
+        default="python",
+        help="Moteur de simulation: python (marcheur par marcheur) ou numpy (vectorisé par blocs).",
+    )
+    p.add_argument(
+        "--jobs",
+        type=_positive_int,
+        default=None,
+        help=(
+            "Nombre de processus pour simuler les marcheurs en parallèle en mode text. "
+            "Les trajectoires sont identiques quel que soit ce nombre pour une même graine."
+        ),
+    )
+    # Sous-commande de mesure des performances.
+    commands = p.add_subparsers(dest="command", metavar="{bench}")
+    bench = commands.add_parser(
+        "bench",
+        help="Mesure les pas/s par motif et moteur, l'export des trajectoires et la memoire par pas.",
+        description=(
+            "Banc d'essai: debit de World.simulate par motif, moteur, nombre de marcheurs et de pas, "
+            "debit de World.to_file et memoire gardee par pas. Les resultats peuvent etre ecrits en JSON "
+            "et compares a une reference enregistree."
+        ),
+    )
+    bench.add_argument(
+        "--patterns",
+        dest="bench_patterns",
+        nargs="+",
+        choices=["grid4", "grid8", "continuous"],
+        default=["grid4", "grid8", "continuous"],
+        help="Motifs mesures (par defaut: tous).",
+    )
+    bench.add_argument(
+        "--engines",
+        dest="bench_engines",
+        nargs="+",
+        choices=["python", "numpy"],
+        default=["python", "numpy"],
+        help="Moteurs mesures (par defaut: les deux).",
+    )
+    bench.add_argument(
+        "--walkers",
+        dest="bench_walkers",
+        nargs="+",
+        type=_positive_int,
+        default=[1, 100, 1000],
+        help="Nombres de marcheurs mesures.",
+    )
+    bench.add_argument(
+        "--steps",
+        dest="bench_steps",
+        nargs="+",
+        type=_positive_int,
+        default=[1000],
+        help="Nombres de pas mesures.",
+    )
+    bench.add_argument(
+        "--formats",
+        dest="bench_formats",
+        nargs="*",
+        choices=["text", "binary"],
+        default=["text", "binary"],
+        help="Formats d'export mesures (aucun pour ne pas mesurer l'export).",
+    )
+    bench.add_argument(
+        "--repeat",
+        type=_positive_int,
+        default=3,
+        help="Nombre d'executions par mesure (la plus rapide est gardee).",
+    )
+    bench.add_argument(
+        "--json",
+        type=str,
+        default=None,
+        help="Fichier JSON ou ecrire les resultats (a garder comme reference).",
+    )
+    bench.add_argument(
+        "--baseline",
+        type=str,
+        default=None,
+        help="Fichier JSON de reference: les mesures plus mauvaises que --tolerance sont signalees (code de sortie 1).",
+    )
+    bench.add_argument(
+        "--tolerance",
+        type=_non_negative_float,
+        default=0.15,
+        help="Ecart relatif tolere par rapport a la reference avant de signaler une regression (0.15 = 15%%).",
     )
     return p
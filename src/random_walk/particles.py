@@ -0,0 +1,282 @@
+﻿"""Bulk rendering of walker positions as pixels or as a density map, and of growing clusters."""
+
+import numpy as np
+import pygame
+
+from .viewport import Viewport
+
+# Modes de rendu proposes par ParticleLayer.
+RENDER_MODES = ("particles", "density")
+
+
+def hue_palette(nmb_colors: int, saturation: float = 0.8, value: float = 1.0) -> np.ndarray:
+    """
+    Build evenly spaced hues, like the per-walker colors of the trail view.
+
+    Args:
+        nmb_colors (int): Number of colors.
+        saturation (float): HSV saturation in [0, 1].
+        value (float): HSV value in [0, 1].
+
+    Returns:
+        numpy.ndarray: RGB colors, shape (nmb_colors, 3), uint8.
+    """
+    # Conversion HSV -> RGB vectorisee (secteurs de 60 degres).
+    hue = np.arange(nmb_colors) * 6.0 / max(nmb_colors, 1)
+    chroma = value * saturation
+    second = chroma * (1 - np.abs(hue % 2 - 1))
+    sector = hue.astype(np.int64) % 6
+    zero = np.zeros_like(hue)
+    table = [
+        (chroma + zero, second, zero),
+        (second, chroma + zero, zero),
+        (zero, chroma + zero, second),
+        (zero, second, chroma + zero),
+        (second, zero, chroma + zero),
+        (chroma + zero, zero, second),
+    ]
+    rgb = np.zeros((nmb_colors, 3))
+    for k, channels in enumerate(table):
+        mask = sector == k
+        rgb[mask] = np.stack(channels, axis=-1)[mask]
+    return ((rgb + value - chroma) * 255).round().astype(np.uint8)
+
+
+def heat_palette(levels: int = 256) -> np.ndarray:
+    """
+    Build a black-red-yellow-white color map.
+
+    Args:
+        levels (int): Number of entries.
+
+    Returns:
+        numpy.ndarray: RGB colors, shape (levels, 3), uint8.
+    """
+    t = np.linspace(0.0, 1.0, levels)[:, np.newaxis] * 3 - np.arange(3)
+    return (np.clip(t, 0.0, 1.0) * 255).astype(np.uint8)
+
+
+class ParticleLayer:
+    """
+    Surface showing current positions, rebuilt in one vectorized pass per frame.
+
+    In "particles" mode each walker is one pixel in its own color; in
+    "density" mode each pixel shows how many walkers stand on it, on a log
+    scale. The pixels are written through ``pygame.surfarray`` instead of
+    one draw call per walker.
+
+    Args:
+        size (tuple[int, int]): Layer size in pixels.
+        nmb_walkers (int): Number of walkers (for the particle colors).
+        mode (str): "particles" or "density".
+        max_scale (float): Maximum zoom, in pixels per world unit.
+    """
+
+    def __init__(self, size: tuple[int, int], nmb_walkers: int, mode: str = "particles", max_scale: float = 40.0) -> None:
+        """
+        Create the surface, its pixel buffer and the palettes.
+
+        Args:
+            size (tuple[int, int]): Layer size in pixels.
+            nmb_walkers (int): Number of walkers (for the particle colors).
+            mode (str): "particles" or "density".
+            max_scale (float): Maximum zoom, in pixels per world unit.
+
+        Returns:
+            None.
+
+        Raises:
+            ValueError: If an unknown mode is provided.
+        """
+        if mode not in RENDER_MODES:
+            raise ValueError(f"Unknown render mode: {mode}")
+        self._mode = mode
+        self._surface = pygame.Surface(size)
+        self._viewport = Viewport(size, max_scale=max_scale)
+        # Tampon de pixels au format surfarray: (largeur, hauteur, RGB).
+        self._pixels = np.zeros((size[0], size[1], 3), dtype=np.uint8)
+        self._colors = hue_palette(nmb_walkers)
+        self._heat = heat_palette()
+
+    @property
+    def scale(self) -> float:
+        """
+        Current zoom of the view.
+
+        Args:
+            None.
+
+        Returns:
+            float: Pixels per world unit.
+        """
+        return self._viewport.scale
+
+    def to_screen(self, x: float, y: float) -> tuple[int, int]:
+        """
+        Convert world coordinates to screen coordinates.
+
+        Args:
+            x (float): World X coordinate.
+            y (float): World Y coordinate.
+
+        Returns:
+            tuple[int, int]: Screen pixel coordinates.
+        """
+        return self._viewport.to_screen(x, y)
+
+    def update(self, positions: np.ndarray) -> None:
+        """
+        Rebuild the layer from the current positions.
+
+        Args:
+            positions (numpy.ndarray): Positions, shape (walkers, 2).
+
+        Returns:
+            None.
+        """
+        xs = positions[:, 0]
+        ys = positions[:, 1]
+        if len(xs):
+            self._viewport.include(xs.min(), xs.max(), ys.min(), ys.max())
+        width, height = self._viewport.size
+        px, py = self._viewport.to_pixels(xs, ys)
+        inside = (px >= 0) & (px < width) & (py >= 0) & (py < height)
+        pixels = self._pixels
+        if self._mode == "particles":
+            pixels.fill(0)
+            pixels[px[inside], py[inside]] = self._colors[inside]
+        else:
+            # Nombre de marcheurs par pixel occupe, puis echelle log vers la palette.
+            cells, counts = np.unique(px[inside] * height + py[inside], return_counts=True)
+            pixels.fill(0)
+            if len(cells):
+                # Une couleur par effectif possible plutot qu'un log par pixel.
+                peak = int(counts.max())
+                levels = np.log1p(np.arange(peak + 1)) * ((len(self._heat) - 1) / np.log1p(max(peak, 1)))
+                pixels.reshape(-1, 3)[cells] = self._heat[levels.astype(np.intp)][counts]
+        pygame.surfarray.blit_array(self._surface, pixels)
+
+    def draw(self, target) -> None:
+        """
+        Blit the layer onto a target surface.
+
+        Args:
+            target (pygame.Surface): Surface to draw on.
+
+        Returns:
+            None.
+        """
+        target.blit(self._surface, (0, 0))
+
+
+class ClusterLayer:
+    """
+    Surface showing a growing cluster, colored by attachment order, with the walkers on top.
+
+    Cluster particles never move, so only the ones added since the last
+    frame are painted into a persistent pixel buffer; the whole cluster is
+    painted again only when the view is refitted. A particle covers one
+    lattice cell, i.e. a square of ``scale`` pixels when zoomed in.
+
+    Args:
+        size (tuple[int, int]): Layer size in pixels.
+        nmb_particles (int): Final size of the cluster (for the colors).
+        max_scale (float): Maximum zoom, in pixels per world unit.
+    """
+
+    def __init__(self, size: tuple[int, int], nmb_particles: int, max_scale: float = 40.0) -> None:
+        """
+        Create the surface, its pixel buffers and the palette.
+
+        Args:
+            size (tuple[int, int]): Layer size in pixels.
+            nmb_particles (int): Final size of the cluster (for the colors).
+            max_scale (float): Maximum zoom, in pixels per world unit.
+
+        Returns:
+            None.
+        """
+        self._surface = pygame.Surface(size)
+        self._viewport = Viewport(size, max_scale=max_scale)
+        # Agregat deja peint, et image courante (agregat + marcheurs).
+        self._cluster = np.zeros((size[0], size[1], 3), dtype=np.uint8)
+        self._pixels = np.zeros_like(self._cluster)
+        self._colors = hue_palette(nmb_particles)
+        self._painted = 0
+        self.redraws = 0
+
+    def to_screen(self, x: float, y: float) -> tuple[int, int]:
+        """
+        Convert world coordinates to screen coordinates.
+
+        Args:
+            x (float): World X coordinate.
+            y (float): World Y coordinate.
+
+        Returns:
+            tuple[int, int]: Screen pixel coordinates.
+        """
+        return self._viewport.to_screen(x, y)
+
+    def _paint(self, target: np.ndarray, xs: np.ndarray, ys: np.ndarray, colors: np.ndarray) -> None:
+        """
+        Paint one lattice cell per point into a pixel buffer.
+
+        Args:
+            target (numpy.ndarray): Pixel buffer, shape (width, height, 3).
+            xs (numpy.ndarray): World X coordinates.
+            ys (numpy.ndarray): World Y coordinates.
+            colors (numpy.ndarray): RGB color of each point, or a single color.
+
+        Returns:
+            None.
+        """
+        width, height = self._viewport.size
+        px, py = self._viewport.to_pixels(xs - 0.5, ys + 0.5)
+        side = max(1, int(self._viewport.scale))
+        for ox in range(side):
+            for oy in range(side):
+                x = px + ox
+                y = py + oy
+                inside = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+                target[x[inside], y[inside]] = colors if colors.ndim == 1 else colors[inside]
+
+    def update(self, cluster: np.ndarray, positions: np.ndarray) -> None:
+        """
+        Paint the new cluster particles and the current walkers.
+
+        Args:
+            cluster (numpy.ndarray): Cluster sites in attachment order, shape (particles, 2).
+            positions (numpy.ndarray): Walker positions, shape (walkers, 2).
+
+        Returns:
+            None.
+        """
+        new = cluster[self._painted :]
+        if len(new) and self._viewport.include(
+            new[:, 0].min() - 1, new[:, 0].max() + 1, new[:, 1].min() - 1, new[:, 1].max() + 1
+        ):
+            # Cadrage change: tout l'agregat est repeint.
+            self._cluster.fill(0)
+            self._painted = 0
+            new = cluster
+            self.redraws += 1
+        if len(new):
+            self._paint(self._cluster, new[:, 0], new[:, 1], self._colors[self._painted : len(cluster)])
+            self._painted = len(cluster)
+        np.copyto(self._pixels, self._cluster)
+        if len(positions):
+            self._paint(self._pixels, positions[:, 0], positions[:, 1], np.array([255, 255, 255], dtype=np.uint8))
+        pygame.surfarray.blit_array(self._surface, self._pixels)
+
+    def draw(self, target) -> None:
+        """
+        Blit the layer onto a target surface.
+
+        Args:
+            target (pygame.Surface): Surface to draw on.
+
+        Returns:
+            None.
+        """
+        target.blit(self._surface, (0, 0))
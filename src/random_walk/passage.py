@@ -0,0 +1,137 @@
+﻿"""Target regions and block schedule of first-passage runs."""
+
+import numpy as np
+
+# Taille du premier bloc de pas; les blocs doublent ensuite.
+FIRST_BLOCK_STEPS = 64
+
+
+class Circle:
+    """
+    Outside of a circle: a walker is absorbed once at distance ``radius`` or more from the center.
+
+    Targets are callables taking X and Y arrays of any shape and returning
+    a boolean array of the same shape, True where the point is absorbed.
+
+    Args:
+        radius (float): Circle radius.
+        center (tuple[float, float]): Circle center.
+    """
+
+    def __init__(self, radius: float, center: tuple[float, float] = (0.0, 0.0)) -> None:
+        """
+        Store the circle.
+
+        Args:
+            radius (float): Circle radius.
+            center (tuple[float, float]): Circle center.
+
+        Returns:
+            None.
+
+        Raises:
+            ValueError: If the radius is negative.
+        """
+        if radius < 0:
+            raise ValueError("radius must be non-negative")
+        self.radius = radius
+        self.center = center
+        self._r2 = float(radius) * float(radius)
+
+    def __call__(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+        Test points against the circle.
+
+        Args:
+            xs (numpy.ndarray): X coordinates.
+            ys (numpy.ndarray): Y coordinates.
+
+        Returns:
+            numpy.ndarray: True where the point is on or outside the circle.
+        """
+        cx, cy = self.center
+        dx = xs - cx if cx else xs
+        dy = ys - cy if cy else ys
+        return dx * dx + dy * dy >= self._r2
+
+
+class HalfPlane:
+    """
+    Half-plane ``normal . p >= offset``: a walker is absorbed once it crosses the line.
+
+    Args:
+        normal (tuple[float, float]): Normal vector pointing into the target.
+        offset (float): Position of the line along the normal.
+    """
+
+    def __init__(self, normal: tuple[float, float], offset: float) -> None:
+        """
+        Store the half-plane.
+
+        Args:
+            normal (tuple[float, float]): Normal vector pointing into the target.
+            offset (float): Position of the line along the normal.
+
+        Returns:
+            None.
+
+        Raises:
+            ValueError: If the normal is the null vector.
+        """
+        if normal[0] == 0 and normal[1] == 0:
+            raise ValueError("normal must be a non-zero vector")
+        self.normal = normal
+        self.offset = offset
+
+    def __call__(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+        Test points against the half-plane.
+
+        Args:
+            xs (numpy.ndarray): X coordinates.
+            ys (numpy.ndarray): Y coordinates.
+
+        Returns:
+            numpy.ndarray: True where the point is in the half-plane.
+        """
+        nx, ny = self.normal
+        # Produit scalaire sans multiplication inutile pour les normales alignees sur les axes.
+        if ny == 0:
+            return xs * nx >= self.offset
+        if nx == 0:
+            return ys * ny >= self.offset
+        return xs * nx + ys * ny >= self.offset
+
+
+def block_steps(done: int, remaining: int, limit: int) -> int:
+    """
+    Size of the next block of a first-passage run.
+
+    Blocks double with the steps already run, so the steps drawn past the
+    last absorption stay at most about as many as the useful ones, and
+    are capped by ``limit`` to bound the memory of a block.
+
+    Args:
+        done (int): Steps already run.
+        remaining (int): Steps left before the horizon.
+        limit (int): Largest block allowed.
+
+    Returns:
+        int: Number of steps of the next block (at least 1).
+    """
+    return max(1, min(remaining, limit, max(FIRST_BLOCK_STEPS, done)))
+
+
+def first_hits(hit: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Find the first absorbed row of every column of a block.
+
+    Args:
+        hit (numpy.ndarray): Boolean block, shape (steps, walkers).
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: Columns absorbed in the block,
+            and the row of their first absorption.
+    """
+    columns = np.flatnonzero(hit.any(axis=0))
+    return columns, hit[:, columns].argmax(axis=0)
@@ -0,0 +1,195 @@
+﻿"""Per-phase timers and counters of a run, enabled with ``--profile``."""
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Intervalle par defaut entre deux resumes periodiques, en secondes.
+REPORT_INTERVAL = 5.0
+
+# Profileur en cours, None quand le profilage est desactive.
+active: "Profiler | None" = None
+
+
+class Profiler:
+    """
+    Accumulate wall time, calls and processed items per named phase.
+
+    Instrumented code reads ``profiling.active`` once per call and skips all
+    timing when it is None, so a disabled profiler costs one test per
+    instrumented batch (never per step). Phases may nest: an outer phase
+    such as "world.simulate" includes the inner ones.
+
+    Args:
+        interval (float): Seconds between two periodic summaries (0 to disable them).
+        clock (Callable[[], float]): Time source, in seconds.
+
+    Raises:
+        ValueError: If the interval is negative.
+    """
+
+    def __init__(self, interval: float = REPORT_INTERVAL, clock=time.perf_counter) -> None:
+        """
+        Create an empty profiler whose elapsed time starts now.
+
+        Args:
+            interval (float): Seconds between two periodic summaries (0 to disable them).
+            clock (Callable[[], float]): Time source, in seconds.
+
+        Returns:
+            None.
+
+        Raises:
+            ValueError: If the interval is negative.
+        """
+        if interval < 0:
+            raise ValueError("interval must be >= 0")
+        self.interval = interval
+        self._clock = clock
+        # Par phase: [secondes, appels, elements traites].
+        self._phases: dict[str, list] = {}
+        self._counters: dict[str, int] = {}
+        self._started = clock()
+        self._last_report = self._started
+
+    def start(self) -> float:
+        """
+        Read the clock at the start of a phase.
+
+        Args:
+            None.
+
+        Returns:
+            float: Start time, to pass to ``stop``.
+        """
+        return self._clock()
+
+    def stop(self, phase: str, start: float, items: int = 0) -> float:
+        """
+        Charge the time since ``start`` to a phase, logging a summary when one is due.
+
+        Args:
+            phase (str): Phase name, such as "walker.append".
+            start (float): Value returned by ``start`` (or a previous ``stop``).
+            items (int): Steps, points or rows processed by this call.
+
+        Returns:
+            float: Current time, usable as the start of the next phase.
+        """
+        now = self._clock()
+        totals = self._phases.get(phase)
+        if totals is None:
+            totals = self._phases[phase] = [0.0, 0, 0]
+        totals[0] += now - start
+        totals[1] += 1
+        totals[2] += items
+        if self.interval and now - self._last_report >= self.interval:
+            self._last_report = now
+            self.report()
+        return now
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """
+        Increase a plain event counter.
+
+        Args:
+            name (str): Counter name, such as "trail.redraws".
+            amount (int): Increment.
+
+        Returns:
+            None.
+        """
+        self._counters[name] = self._counters.get(name, 0) + amount
+
+    @property
+    def elapsed(self) -> float:
+        """
+        Wall time since the profiler was created.
+
+        Args:
+            None.
+
+        Returns:
+            float: Elapsed seconds.
+        """
+        return self._clock() - self._started
+
+    def snapshot(self) -> dict:
+        """
+        Return the accumulated measures.
+
+        Args:
+            None.
+
+        Returns:
+            dict: ``phases`` (name -> seconds, calls, items) and ``counters`` (name -> value).
+        """
+        phases = {
+            name: {"seconds": seconds, "calls": calls, "items": items}
+            for name, (seconds, calls, items) in self._phases.items()
+        }
+        return {"phases": phases, "counters": dict(self._counters)}
+
+    def summary(self, limit: int | None = None) -> list[str]:
+        """
+        Render the phases as aligned lines, the most expensive first.
+
+        Args:
+            limit (int | None): Maximum number of phases shown (all if None).
+
+        Returns:
+            list[str]: Header, one line per phase, then one line per counter.
+        """
+        elapsed = max(self.elapsed, 1e-12)
+        ranked = sorted(self._phases.items(), key=lambda item: item[1][0], reverse=True)
+        lines = [f"{'phase':<18} {'calls':>9} {'items':>12} {'seconds':>9} {'share':>6} {'ns/item':>9}"]
+        for name, (seconds, calls, items) in ranked[:limit]:
+            per_item = f"{seconds / items * 1e9:.0f}" if items else "-"
+            lines.append(f"{name:<18} {calls:>9} {items:>12} {seconds:>9.4f} {seconds / elapsed:>6.1%} {per_item:>9}")
+        for name, value in sorted(self._counters.items()):
+            lines.append(f"{name:<18} {value:>9}")
+        return lines
+
+    def report(self, final: bool = False) -> None:
+        """
+        Log the summary of the phases.
+
+        Args:
+            final (bool): Final breakdown at the end of the run rather than a periodic one.
+
+        Returns:
+            None.
+        """
+        label = "Profil final" if final else "Profil"
+        logger.info("%s apres %.1f s:\n%s", label, self.elapsed, "\n".join(self.summary()))
+
+
+def enable(interval: float = REPORT_INTERVAL) -> Profiler:
+    """
+    Start profiling with a fresh profiler.
+
+    Args:
+        interval (float): Seconds between two periodic summaries (0 to disable them).
+
+    Returns:
+        Profiler: The new active profiler.
+    """
+    global active
+    active = Profiler(interval)
+    return active
+
+
+def disable() -> Profiler | None:
+    """
+    Stop profiling.
+
+    Args:
+        None.
+
+    Returns:
+        Profiler | None: The profiler that was active, with its measures.
+    """
+    global active
+    profiler, active = active, None
+    return profiler
@@ -0,0 +1,722 @@
+﻿"""Self-avoiding walks on the square lattice: hashed occupancy and pivot algorithm on a SAW-tree."""
+
+import logging
+
+import numpy as np
+
+from .walk_paterns import Grid4, LatticeModel, StepModel
+
+logger = logging.getLogger(__name__)
+
+# Les 7 symetries non triviales du reseau carre (rotations et reflexions), en matrices 2x2.
+SYMMETRIES = (
+    ((0, -1), (1, 0)),
+    ((-1, 0), (0, -1)),
+    ((0, 1), (-1, 0)),
+    ((1, 0), (0, -1)),
+    ((-1, 0), (0, 1)),
+    ((0, 1), (1, 0)),
+    ((0, -1), (-1, 0)),
+)
+
+# Pivots acceptes apres l'assemblage quand rien n'est precise: par pas, et au plus MAX_PIVOTS.
+PIVOTS_PER_STEP = 4
+MAX_PIVOTS = 1000
+
+# Tentatives de pivot dans chaque moitie quand leur assemblage echoue.
+REFRESH_PIVOTS = 4
+
+
+def _product(m: tuple[int, int, int, int], n: tuple[int, int, int, int]) -> tuple[int, int, int, int]:
+    """
+    Product of two 2x2 matrices stored row by row.
+
+    Args:
+        m (tuple[int, int, int, int]): Left matrix (a, b, c, d).
+        n (tuple[int, int, int, int]): Right matrix (a, b, c, d).
+
+    Returns:
+        tuple[int, int, int, int]: The product m n.
+    """
+    a, b, c, d = m
+    e, f, g, h = n
+    return (a * e + b * g, a * f + b * h, c * e + d * g, c * f + d * h)
+
+
+def _box_axes(m: tuple[int, int, int, int]) -> tuple[int, int, int, int, int, int]:
+    """
+    Read a bounding box through a symmetry.
+
+    Args:
+        m (tuple[int, int, int, int]): Symmetry matrix (a, b, c, d).
+
+    Returns:
+        tuple[int, int, int, int, int, int]: For X then Y, the indices in
+            (xmin, xmax, ymin, ymax) of the bounds giving the new minimum and
+            maximum, and their sign.
+    """
+    axes = []
+    for first, second in (m[:2], m[2:]):
+        coefficient, offset = (first, 0) if first else (second, 2)
+        axes += [offset, offset + 1, 1] if coefficient > 0 else [offset + 1, offset, -1]
+    return tuple(axes)
+
+
+# Groupe complet (identite en 0, puis SYMMETRIES), table de composition, inverses et lecture des boites.
+_GROUP = [(1, 0, 0, 1)] + [(a, b, c, d) for (a, b), (c, d) in SYMMETRIES]
+_COMPOSE = [[_GROUP.index(_product(m, n)) for n in _GROUP] for m in _GROUP]
+_INVERSE = [row.index(0) for row in _COMPOSE]
+_BOX_AXES = [_box_axes(m) for m in _GROUP]
+
+
+def site_key(x: int, y: int) -> int:
+    """
+    Pack a lattice site into one integer, the key of occupancy lookups.
+
+    Args:
+        x (int): Site X (32-bit range).
+        y (int): Site Y (32-bit range).
+
+    Returns:
+        int: Key, distinct for distinct sites.
+    """
+    return (x << 32) + y
+
+
+def _site_keys(points: np.ndarray) -> list[int]:
+    """
+    Vectorized ``site_key`` for an array of sites.
+
+    Args:
+        points (numpy.ndarray): int64 sites, shape (points, 2).
+
+    Returns:
+        list[int]: Key of each site.
+    """
+    return ((points[:, 0] << 32) + points[:, 1]).tolist()
+
+
+class _SawTree:
+    """
+    Binary tree of a walk for the pivot algorithm, after Clisby's SAW-tree.
+
+    Leaf ``i`` holds site ``i`` as one step in its own frame (site 0 is
+    the origin). Each node stores, in its frame, the end point and the
+    bounding box of its sub-walk, plus the symmetry placing its right child
+    after the left one. The walk is built by ``dimerize``; a pivot only composes the symmetries of the nodes
+    on one root-to-leaf path and refreshes their end points and boxes, in
+    O(log n), without rewriting the walk. The intersection test compares
+    the fixed and moved parts node against node, starting next to the
+    pivot, and skips any pair whose boxes are disjoint.
+
+    Args:
+        nmb_steps (int): Number of steps of the walk, which starts as a straight rod.
+    """
+
+    def __init__(self, nmb_steps: int) -> None:
+        """
+        Build the tree of a straight rod along X.
+
+        Args:
+            nmb_steps (int): Number of steps of the walk.
+
+        Returns:
+            None.
+        """
+        self._leaves = nmb_steps + 1
+        size = 4 * self._leaves
+        # Par noeud (tas binaire, racine en 1): symetrie de l'enfant droit, point final,
+        # boite (xmin, xmax, ymin, ymax) et nombre de sites.
+        self._symmetry = [0] * size
+        self._end_x = [0] * size
+        self._end_y = [0] * size
+        self._box: list[tuple[int, int, int, int] | None] = [None] * size
+        self._count = [0] * size
+        self._build(1, 0, self._leaves)
+
+    def _build(self, node: int, lo: int, hi: int) -> None:
+        """
+        Fill the subtree of the sites ``lo`` to ``hi - 1``.
+
+        Args:
+            node (int): Node index.
+            lo (int): First site.
+            hi (int): Site after the last one.
+
+        Returns:
+            None.
+        """
+        self._count[node] = hi - lo
+        if hi - lo == 1:
+            step = 1 if lo else 0
+            self._end_x[node] = step
+            self._box[node] = (step, step, 0, 0)
+            return
+        mid = (lo + hi) // 2
+        self._build(2 * node, lo, mid)
+        self._build(2 * node + 1, mid, hi)
+        self._pull(node)
+
+    def _pull(self, node: int) -> None:
+        """
+        Recompute the end point and box of a node from its children.
+
+        Args:
+            node (int): Node index.
+
+        Returns:
+            None.
+        """
+        left = 2 * node
+        right = left + 1
+        symmetry = self._symmetry[node]
+        a, b, c, d = _GROUP[symmetry]
+        lx = self._end_x[left]
+        ly = self._end_y[left]
+        rx = self._end_x[right]
+        ry = self._end_y[right]
+        self._end_x[node] = lx + a * rx + b * ry
+        self._end_y[node] = ly + c * rx + d * ry
+        i0, i1, sx, j0, j1, sy = _BOX_AXES[symmetry]
+        box = self._box[right]
+        x0, x1, y0, y1 = self._box[left]
+        self._box[node] = (
+            min(x0, lx + sx * box[i0]),
+            max(x1, lx + sx * box[i1]),
+            min(y0, ly + sy * box[j0]),
+            max(y1, ly + sy * box[j1]),
+        )
+
+    def dimerize(self, rng, node: int = 1, lo: int = 0, hi: int | None = None) -> None:
+        """
+        Replace a subtree by a random self-avoiding walk, joining its halves bottom-up.
+
+        Both halves are sampled first, then joined with a random symmetry
+        until the join is self-avoiding. After each failure, both halves get
+        ``REFRESH_PIVOTS`` pivot attempts, at a log-uniform distance from the
+        joint (where the clashes are): the halves of a failed join would
+        otherwise fail again with most symmetries. Each half stays in
+        equilibrium since the pivots pick their site and symmetry
+        independently of the walk. This pseudo-dimerization starts the walk
+        near equilibrium in about O(n log n), where the rod needs O(n)
+        accepted pivots to be forgotten.
+
+        Args:
+            rng (random.Random): Random number generator.
+            node (int): Subtree node (the root by default).
+            lo (int): First site of the subtree.
+            hi (int | None): Site after the last one (the end of the walk if None).
+
+        Returns:
+            None.
+        """
+        hi = self._leaves if hi is None else hi
+        if hi - lo == 1:
+            return
+        mid = (lo + hi) // 2
+        halves = ((2 * node, lo, mid, True), (2 * node + 1, mid, hi, False))
+        for child, a, b, _ in halves:
+            self.dimerize(rng, child, a, b)
+        while True:
+            self._symmetry[node] = rng.randrange(len(_GROUP))
+            # Pivot identite au joint: la moitie droite, placee par la symetrie du noeud, contre la gauche.
+            if not self.collides(mid - 1, 0, (node, lo, hi)):
+                break
+            for child, a, b, first in halves:
+                if b - a < 2:
+                    continue
+                for _ in range(REFRESH_PIVOTS):
+                    # Distance au joint log-uniforme entre 1 et b - a - 1.
+                    distance = min(int((b - a) ** rng.random()), b - a - 1)
+                    k = b - 1 - distance if first else a + distance - 1
+                    symmetry = rng.randrange(len(SYMMETRIES)) + 1
+                    if not self.collides(k, symmetry, (child, a, b)):
+                        self.pivot(k, symmetry, (child, a, b))
+        self._pull(node)
+
+    def _split(self, cut: int, symmetry: int, root: tuple[int, int, int]) -> tuple[list[tuple], list[tuple]]:
+        """
+        Cover the sites of a subtree before and from ``cut`` with whole subtrees, placed in its frame.
+
+        Args:
+            cut (int): First moved site.
+            symmetry (int): Index in ``_GROUP`` of the pivot symmetry.
+            root (tuple[int, int, int]): Subtree node, first site and site after the last one.
+
+        Returns:
+            tuple[list[tuple], list[tuple]]: Fixed and moved subtrees, nearest
+                to the pivot first, as (node, symmetry, x, y, box): the moved
+                ones already pivoted around site ``cut - 1``.
+        """
+        end_x = self._end_x
+        end_y = self._end_y
+        node, lo, hi = root
+        frame = x = y = 0
+        fixed = []
+        moved = []
+        # Descente vers la coupure: chaque noeud quitte donne un sous-arbre entier d'un cote.
+        while True:
+            mid = (lo + hi) // 2
+            left = 2 * node
+            a, b, c, d = _GROUP[frame]
+            right_frame = _COMPOSE[frame][self._symmetry[node]]
+            rx = x + a * end_x[left] + b * end_y[left]
+            ry = y + c * end_x[left] + d * end_y[left]
+            if cut == mid:
+                fixed.append((left, frame, x, y))
+                moved.append((left + 1, right_frame, rx, ry))
+                break
+            if cut < mid:
+                moved.append((left + 1, right_frame, rx, ry))
+                node, hi = left, mid
+            else:
+                fixed.append((left, frame, x, y))
+                node, lo, frame, x, y = left + 1, mid, right_frame, rx, ry
+        # Le pivot (site cut - 1) est le point final de la partie fixe.
+        a, b, c, d = _GROUP[symmetry]
+        moved = [
+            (m, _COMPOSE[symmetry][f], rx + a * (mx - rx) + b * (my - ry), ry + c * (mx - rx) + d * (my - ry))
+            for m, f, mx, my in moved
+        ]
+        placed = []
+        for items in (fixed, moved):
+            boxes = []
+            for m, f, mx, my in reversed(items):
+                i0, i1, sx, j0, j1, sy = _BOX_AXES[f]
+                box = self._box[m]
+                boxes.append((m, f, mx, my, (mx + sx * box[i0], mx + sx * box[i1], my + sy * box[j0], my + sy * box[j1])))
+            placed.append(boxes)
+        return placed[0], placed[1]
+
+    def collides(self, k: int, symmetry: int, root: tuple[int, int, int] | None = None) -> bool:
+        """
+        Tell whether pivoting the sites after ``k`` around it would break self-avoidance.
+
+        Args:
+            k (int): Pivot site, from the first site of the subtree to the one before its last.
+            symmetry (int): Index in ``_GROUP`` of the pivot symmetry.
+            root (tuple[int, int, int] | None): Subtree holding the pivot, as (node,
+                first site, site after the last one); the whole walk if None.
+
+        Returns:
+            bool: True if a moved site would land on a fixed one of the subtree.
+        """
+        symmetries = self._symmetry
+        end_x = self._end_x
+        end_y = self._end_y
+        boxes = self._box
+        count = self._count
+        fixed, moved = self._split(k + 1, symmetry, root or (1, 0, self._leaves))
+        # Groupes: le reste d'une liste a partir d'un rang, avec sa boite et son nombre de sites.
+        groups = []
+        for items in (fixed, moved):
+            suffix = [None] * len(items)
+            x0, x1, y0, y1 = items[-1][4]
+            total = 0
+            for i in range(len(items) - 1, -1, -1):
+                b0, b1, b2, b3 = items[i][4]
+                x0 = min(x0, b0)
+                x1 = max(x1, b1)
+                y0 = min(y0, b2)
+                y1 = max(y1, b3)
+                total += count[items[i][0]]
+                suffix[i] = (x0, x1, y0, y1, total)
+            groups.append(suffix)
+        fixed_groups, moved_groups = groups
+        # Paire a examiner: (noeud, symetrie, x, y, boite) de chaque cote; un noeud < 0 designe
+        # le groupe de rang symetrie. Les boites de la paire se chevauchent toujours.
+        fx0, fx1, fy0, fy1, _ = fixed_groups[0]
+        mx0, mx1, my0, my1, _ = moved_groups[0]
+        if fx1 < mx0 or mx1 < fx0 or fy1 < my0 or my1 < fy0:
+            return False
+        stack = [(-1, 0, 0, 0, (fx0, fx1, fy0, fy1), -1, 0, 0, 0, (mx0, mx1, my0, my1))]
+        while stack:
+            a, fa, ax, ay, (ax0, ax1, ay0, ay1), b, fb, bx, by, (bx0, bx1, by0, by1) = stack.pop()
+            while True:
+                na = count[a] if a >= 0 else fixed_groups[fa][4]
+                nb = count[b] if b >= 0 else moved_groups[fb][4]
+                if na >= nb:
+                    if na == 1:
+                        # Deux sites dont les boites (reduites a un point) se touchent.
+                        return True
+                    if a < 0:
+                        # Groupe du cote fixe: son premier sous-arbre d'abord, le reste plus tard.
+                        if fa + 1 < len(fixed):
+                            far = fixed_groups[fa + 1]
+                            if not (far[1] < bx0 or bx1 < far[0] or far[3] < by0 or by1 < far[2]):
+                                stack.append((-1, fa + 1, 0, 0, far[:4], b, fb, bx, by, (bx0, bx1, by0, by1)))
+                        a, fa, ax, ay, (ax0, ax1, ay0, ay1) = fixed[fa]
+                    else:
+                        # Cote fixe: l'enfant droit est le plus proche du pivot.
+                        left = 2 * a
+                        m0, m1, m2, m3 = _GROUP[fa]
+                        right_frame = _COMPOSE[fa][symmetries[a]]
+                        rx = ax + m0 * end_x[left] + m1 * end_y[left]
+                        ry = ay + m2 * end_x[left] + m3 * end_y[left]
+                        i0, i1, sx, j0, j1, sy = _BOX_AXES[fa]
+                        box = boxes[left]
+                        fx0 = ax + sx * box[i0]
+                        fx1 = ax + sx * box[i1]
+                        fy0 = ay + sy * box[j0]
+                        fy1 = ay + sy * box[j1]
+                        if not (fx1 < bx0 or bx1 < fx0 or fy1 < by0 or by1 < fy0):
+                            stack.append((left, fa, ax, ay, (fx0, fx1, fy0, fy1), b, fb, bx, by, (bx0, bx1, by0, by1)))
+                        i0, i1, sx, j0, j1, sy = _BOX_AXES[right_frame]
+                        box = boxes[left + 1]
+                        a, fa, ax, ay = left + 1, right_frame, rx, ry
+                        ax0 = rx + sx * box[i0]
+                        ax1 = rx + sx * box[i1]
+                        ay0 = ry + sy * box[j0]
+                        ay1 = ry + sy * box[j1]
+                else:
+                    if b < 0:
+                        if fb + 1 < len(moved):
+                            far = moved_groups[fb + 1]
+                            if not (ax1 < far[0] or far[1] < ax0 or ay1 < far[2] or far[3] < ay0):
+                                stack.append((a, fa, ax, ay, (ax0, ax1, ay0, ay1), -1, fb + 1, 0, 0, far[:4]))
+                        b, fb, bx, by, (bx0, bx1, by0, by1) = moved[fb]
+                    else:
+                        # Cote deplace: l'enfant gauche est le plus proche du pivot.
+                        left = 2 * b
+                        m0, m1, m2, m3 = _GROUP[fb]
+                        right_frame = _COMPOSE[fb][symmetries[b]]
+                        rx = bx + m0 * end_x[left] + m1 * end_y[left]
+                        ry = by + m2 * end_x[left] + m3 * end_y[left]
+                        i0, i1, sx, j0, j1, sy = _BOX_AXES[right_frame]
+                        box = boxes[left + 1]
+                        fx0 = rx + sx * box[i0]
+                        fx1 = rx + sx * box[i1]
+                        fy0 = ry + sy * box[j0]
+                        fy1 = ry + sy * box[j1]
+                        if not (ax1 < fx0 or fx1 < ax0 or ay1 < fy0 or fy1 < ay0):
+                            stack.append((a, fa, ax, ay, (ax0, ax1, ay0, ay1), left + 1, right_frame, rx, ry, (fx0, fx1, fy0, fy1)))
+                        i0, i1, sx, j0, j1, sy = _BOX_AXES[fb]
+                        box = boxes[left]
+                        b = left
+                        bx0 = bx + sx * box[i0]
+                        bx1 = bx + sx * box[i1]
+                        by0 = by + sy * box[j0]
+                        by1 = by + sy * box[j1]
+                if ax1 < bx0 or bx1 < ax0 or ay1 < by0 or by1 < ay0:
+                    break
+        return False
+
+    def pivot(self, k: int, symmetry: int, root: tuple[int, int, int] | None = None) -> None:
+        """
+        Apply a symmetry to the sites after ``k`` in a subtree, around site ``k``.
+
+        Args:
+            k (int): Pivot site, from the first site of the subtree to the one before its last.
+            symmetry (int): Index in ``_GROUP`` of the pivot symmetry.
+            root (tuple[int, int, int] | None): Subtree holding the pivot, as (node,
+                first site, site after the last one); the whole walk if None.
+
+        Returns:
+            None.
+        """
+        symmetries = self._symmetry
+        cut = k + 1
+        node, lo, hi = root or (1, 0, self._leaves)
+        path = []
+        while True:
+            mid = (lo + hi) // 2
+            if cut <= mid:
+                # Tout l'enfant droit tourne avec la fin de l'enfant gauche.
+                symmetries[node] = _COMPOSE[symmetry][symmetries[node]]
+                if cut == mid:
+                    break
+                path.append(node)
+                node, hi = 2 * node, mid
+            else:
+                # Pivot dans l'enfant droit: symetrie exprimee dans son repere.
+                own = symmetries[node]
+                symmetry = _COMPOSE[_INVERSE[own]][_COMPOSE[symmetry][own]]
+                path.append(node)
+                node, lo = 2 * node + 1, mid
+        self._pull(node)
+        for node in reversed(path):
+            self._pull(node)
+
+    def sites(self) -> np.ndarray:
+        """
+        Return the sites of the walk.
+
+        Args:
+            None.
+
+        Returns:
+            numpy.ndarray: int64 sites, shape (nmb_steps + 1, 2), starting at the origin.
+        """
+        frames = np.empty(self._leaves, dtype=np.int64)
+        stack = [(1, 0, self._leaves, 0)]
+        while stack:
+            node, lo, hi, frame = stack.pop()
+            if hi - lo == 1:
+                frames[lo] = frame
+                continue
+            mid = (lo + hi) // 2
+            stack.append((2 * node, lo, mid, frame))
+            stack.append((2 * node + 1, mid, hi, _COMPOSE[frame][self._symmetry[node]]))
+        # Chaque pas vaut (1, 0) dans le repere de sa feuille: premiere colonne de la matrice.
+        steps = np.array(_GROUP, dtype=np.int64)[frames][:, [0, 2]]
+        steps[0] = 0
+        return np.cumsum(steps, axis=0)
+
+
+def is_self_avoiding(path: np.ndarray) -> bool:
+    """
+    Tell whether a lattice path visits each site once.
+
+    Args:
+        path (numpy.ndarray): Sites, shape (points, 2).
+
+    Returns:
+        bool: True for a self-avoiding path.
+    """
+    return len(set(_site_keys(np.asarray(path, dtype=np.int64)))) == len(path)
+
+
+def pivot_budget(nmb_steps: int, pivots: int | None = None) -> int:
+    """
+    Number of accepted pivots run after the walk is assembled.
+
+    Args:
+        nmb_steps (int): Number of steps of the walk.
+        pivots (int | None): Requested accepted pivots (``PIVOTS_PER_STEP`` per
+            step, at most ``MAX_PIVOTS``, if None).
+
+    Returns:
+        int: Accepted pivots to run.
+
+    Raises:
+        ValueError: If a negative number of pivots is requested.
+    """
+    if pivots is None:
+        return min(PIVOTS_PER_STEP * nmb_steps, MAX_PIVOTS)
+    if pivots < 0:
+        raise ValueError(f"The number of pivots must be non-negative, got {pivots}")
+    return pivots
+
+
+def pivot_saw(nmb_steps: int, rng, pivots: int | None = None) -> np.ndarray:
+    """
+    Sample a self-avoiding walk on the square lattice with the pivot algorithm.
+
+    The walk is held in a ``_SawTree`` and first assembled by
+    pseudo-dimerization (see ``_SawTree.dimerize``), which already leaves
+    it close to uniform. The pivot chain then runs from there: each attempt
+    picks a site of the walk and a lattice symmetry, and applies the
+    symmetry to the sites after it. The move is tested against the fixed
+    sites by comparing bounding boxes of subtrees from the pivot outwards,
+    and an accepted move only updates one path of the tree. An attempt
+    costs O(log n) for the tree plus the pairs of subtrees whose boxes
+    overlap, which grows far slower than the walk; the sites are only
+    written out once, at the end.
+
+    The chain runs until ``pivots`` moves have been accepted, then as many
+    attempts again, a count fixed in advance since stopping on an accepted
+    move would favor the walks whose moves are accepted more often (the
+    extended ones).
+
+    Args:
+        nmb_steps (int): Number of steps of the walk.
+        rng (random.Random): Random number generator.
+        pivots (int | None): Accepted pivots after the assembly (see ``pivot_budget``).
+
+    Returns:
+        numpy.ndarray: int64 sites of the walk, shape (nmb_steps + 1, 2), starting at the origin.
+
+    Raises:
+        ValueError: If a negative number of pivots is requested.
+    """
+    n = nmb_steps
+    budget = pivot_budget(n, pivots)
+    if n < 2:
+        path = np.zeros((n + 1, 2), dtype=np.int64)
+        path[:, 0] = np.arange(n + 1)
+        return path
+    tree = _SawTree(n)
+    tree.dimerize(rng)
+    attempts = 0
+    accepted = 0
+    # Nombre total de tentatives, fixe une fois le budget atteint (arreter sur un nombre
+    # d'acceptations favoriserait les marches dont les pivots passent le plus souvent).
+    planned = None if budget else 0
+    while planned is None or attempts < planned:
+        attempts += 1
+        k = rng.randrange(1, n)
+        # Indice dans le groupe complet (0 est l'identite).
+        symmetry = rng.randrange(len(SYMMETRIES)) + 1
+        if tree.collides(k, symmetry):
+            continue
+        tree.pivot(k, symmetry)
+        accepted += 1
+        if accepted == budget:
+            planned = 2 * attempts
+    logger.debug("Pivot: %s mouvements acceptes sur %s (%s pas)", accepted, attempts, n)
+    return tree.sites()
+
+
+class SelfAvoiding(LatticeModel):
+    """
+    Self-avoiding walk on the 4-neighbor grid.
+
+    In "pivot" mode, the first ``length`` steps come from a walk sampled
+    with ``pivot_saw``. Past them (and in "growth" mode), each step is
+    drawn among the neighbors not visited yet, found with an O(1) lookup in
+    a set of visited sites; a walk with no free neighbor is trapped and
+    stays in place. One instance follows one walker from the origin.
+
+    Attributes:
+        mode (str): "pivot" or "growth".
+        length (int): Steps sampled with the pivot algorithm.
+        pivots (int | None): Accepted pivots (see ``pivot_saw``).
+    """
+
+    DIRECTIONS = Grid4.DIRECTIONS
+
+    mode = "pivot"
+    length = 0
+    pivots: int | None = None
+
+    @classmethod
+    def configured(cls, mode: str = "pivot", length: int = 0, pivots: int | None = None) -> type["SelfAvoiding"]:
+        """
+        Return a step model class with the given settings, for ``World``.
+
+        Args:
+            mode (str): "pivot" or "growth".
+            length (int): Steps sampled with the pivot algorithm.
+            pivots (int | None): Accepted pivots (see ``pivot_saw``).
+
+        Returns:
+            type[SelfAvoiding]: Subclass named ``Saw``.
+
+        Raises:
+            ValueError: If the mode is unknown or the number of pivots negative.
+        """
+        if mode not in ("pivot", "growth"):
+            raise ValueError(f"Unknown self-avoiding walk mode: {mode}")
+        if mode == "pivot":
+            pivot_budget(length, pivots)
+        return type("Saw", (cls,), {"mode": mode, "length": length, "pivots": pivots})
+
+    def __init__(self) -> None:
+        """
+        Start at the origin with nothing sampled yet.
+
+        Args:
+            None.
+
+        Returns:
+            None.
+        """
+        self._x = 0
+        self._y = 0
+        self._visited: set[int] | None = None
+        # Pas de la marche pivot pas encore rendus.
+        self._planned_x: list[int] = []
+        self._planned_y: list[int] = []
+        self._cursor = 0
+        self.trapped = False
+
+    def _plan(self, rng) -> None:
+        """
+        Sample the pivot part of the walk on first use.
+
+        Args:
+            rng (random.Random): Random number generator.
+
+        Returns:
+            None.
+        """
+        self._visited = set()
+        if self.mode != "pivot" or self.length < 1:
+            self._visited.add(site_key(0, 0))
+            return
+        path = pivot_saw(self.length, rng, self.pivots)
+        steps = np.diff(path, axis=0)
+        self._planned_x = steps[:, 0].tolist()
+        self._planned_y = steps[:, 1].tolist()
+        self._visited.update(_site_keys(path))
+        self._x, self._y = path[-1].tolist()
+
+    def sample_delta(self, rng) -> tuple[int, int]:
+        """
+        Return the next step of the walk.
+
+        Args:
+            rng (random.Random): Random number generator.
+
+        Returns:
+            tuple[int, int]: Delta step ((0, 0) once trapped).
+        """
+        if self._visited is None:
+            self._plan(rng)
+        if self._cursor < len(self._planned_x):
+            step = (self._planned_x[self._cursor], self._planned_y[self._cursor])
+            self._cursor += 1
+            return step
+        x, y = self._x, self._y
+        free = [(dx, dy) for dx, dy in self.DIRECTIONS if site_key(x + dx, y + dy) not in self._visited]
+        if not free:
+            self.trapped = True
+            return (0, 0)
+        dx, dy = free[rng.randrange(len(free))]
+        self._x = x + dx
+        self._y = y + dy
+        self._visited.add(site_key(self._x, self._y))
+        return (dx, dy)
+
+    def sample_deltas(self, rng, n: int) -> tuple[list[int], list[int]]:
+        """
+        Return the next ``n`` steps of the walk.
+
+        Args:
+            rng (random.Random): Random number generator.
+            n (int): Number of steps.
+
+        Returns:
+            tuple[list[int], list[int]]: The n dx values and the n dy values.
+        """
+        if self._visited is None:
+            self._plan(rng)
+        stop = min(len(self._planned_x), self._cursor + n)
+        xs = self._planned_x[self._cursor : stop]
+        ys = self._planned_y[self._cursor : stop]
+        self._cursor = stop
+        for _ in range(n - len(xs)):
+            dx, dy = self.sample_delta(rng)
+            xs.append(dx)
+            ys.append(dy)
+        return xs, ys
+
+    def __reduce__(self) -> tuple:
+        """
+        Pickle through the settings, the class made by ``configured`` having no importable name.
+
+        Args:
+            None.
+
+        Returns:
+            tuple: Rebuild function, its arguments and the instance state.
+        """
+        return _configured_instance, (self.mode, self.length, self.pivots), self.__dict__
+
+    # Pas de tirage par blocs: chaque marche depend de son propre passe (pas de moteur numpy).
+    sample_block = StepModel.sample_block
+
+
+def _configured_instance(mode: str, length: int, pivots: int | None) -> SelfAvoiding:
+    """
+    Create a step model instance with the given settings (for pickling).
+
+    Args:
+        mode (str): "pivot" or "growth".
+        length (int): Steps sampled with the pivot algorithm.
+        pivots (int | None): Accepted pivots (see ``pivot_saw``).
+
+    Returns:
+        SelfAvoiding: New instance, with nothing sampled yet.
+    """
+    return SelfAvoiding.configured(mode, length, pivots)()
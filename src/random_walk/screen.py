@@ -1,47 +1,96 @@
 ﻿"""Pygame rendering and event loop for the simulation."""
 
 import logging
+import time
+
 import pygame
+from . import profiling
+from .assets import TextCache, get_font
 from .button import Button
+from .particles import ClusterLayer, ParticleLayer
+from .trail import TrailLayer
 from .world import World
 
 logger = logging.getLogger(__name__)
 
+# Intervalle de mise a jour des mesures affichees, en secondes.
+HUD_INTERVAL = 0.25
+
+# Nombre de phases affichees dans la surcouche de profilage.
+PROFILE_LINES = 8
+
 
 class Screen:
     """
     Main UI controller for menu and simulation views.
 
     Args:
-        world (World): World instance to simulate and render.
+        world (World | Aggregation): World instance to simulate and render.
         simulation_fps (int): Target FPS for the simulation loop.
         max_steps (int | None): Maximum steps to run (None for unlimited).
+        steps_per_frame (int | None): Steps run before each frame (None for the adaptive mode).
+        background (bool): Run the world in a separate process while this one only renders.
+        render (str): "trails", or "particles"/"density" to draw only current positions, or
+            "cluster" for an ``Aggregation`` (cluster and walkers).
+        headless (bool): Render to an off-screen surface instead of a window (see ``export_frames``).
     """
 
-    def __init__(self, world: World, simulation_fps: int = 24, max_steps: int | None = None) -> None:
+    def __init__(
+        self,
+        world: World,
+        simulation_fps: int = 24,
+        max_steps: int | None = None,
+        steps_per_frame: int | None = 1,
+        background: bool = False,
+        render: str = "trails",
+        headless: bool = False,
+    ) -> None:
         """
         Create a screen bound to a world and simulation FPS.
 
         Args:
-            world (World): World instance to simulate and render.
+            world (World | Aggregation): World instance to simulate and render.
             simulation_fps (int): Target FPS for the simulation loop.
             max_steps (int | None): Maximum steps to run (None for unlimited).
+            steps_per_frame (int | None): Steps run before each frame (None for the adaptive mode).
+            background (bool): Run the world in a separate process while this one only renders.
+            render (str): "trails", or "particles"/"density" to draw only current positions, or
+                "cluster" for an ``Aggregation`` (cluster and walkers).
+            headless (bool): Render to an off-screen surface instead of a window (see ``export_frames``).
 
         Returns:
             None.
+
+        Raises:
+            ValueError: If the cluster render is combined with the background mode.
         """
+        if render == "cluster" and background:
+            raise ValueError("The cluster render cannot run in the background")
         # Initialisation Pygame et parametrage global de l'ecran.
         pygame.init()
-        self._screen = pygame.display.set_mode((1280, 720))
+        if headless:
+            # Sans fenetre: meme vue, dessinee sur une surface hors ecran.
+            self._screen = pygame.Surface((1280, 720))
+        else:
+            self._screen = pygame.display.set_mode((1280, 720))
         self._clock = pygame.time.Clock()
         self._world = world
         self._simulation_fps = simulation_fps
         self._max_steps = max_steps
+        self._steps_per_frame = steps_per_frame
+        # Taille des lots du mode adaptatif, conservee d'une image a l'autre.
+        self._chunk = 1
+        self._background = background
+        self._render = render
 
     def main_menue(self) -> None:
         """
         Run the main menu loop.
 
+        The title and buttons are rendered once; afterwards a frame only
+        redraws the buttons whose hover state changed, so an idle menu
+        draws nothing.
+
         Args:
             None.
 
@@ -50,110 +99,247 @@ class Screen:
         """
         logger.info("Ouverture du menu principal")
         pygame.display.set_caption("Random Walk")
-        font = pygame.font.SysFont("Arial", 48)
+        font = get_font("Arial", 48)
+
+        # Titre et boutons construits une seule fois.
+        menu_text = font.render("Random Walk", True, "white")
+        menu_rect = menu_text.get_rect(center=(640, 100))
+        start_button = Button(text="Start", pos=(640, 300), font=font, screen=self._screen)
+        quit_button = Button(text="Quit", pos=(640, 500), font=font, screen=self._screen)
+        buttons = [start_button, quit_button]
 
-        # Boucle principale du menu: rendu + gestion des clics.
+        # Boucle principale du menu: seuls les boutons dont le survol change sont redessines.
+        redraw = True
         running = True
         while running:
-            self._screen.fill("black")
-
-            MENU_MOUSE_POS = pygame.mouse.get_pos()
-
-            MENU_TEXT = font.render("Random Walk", True, "white")
-            MENU_RECT = MENU_TEXT.get_rect(center=(640, 100))
-
-            # Boutons du menu principal.
-            START_BUTTON = Button(
-                text="Start",
-                pos=(640, 300),
-                font=font,
-                screen=self._screen,
-            )
-            QUIT_BUTTON = Button(
-                text="Quit",
-                pos=(640, 500),
-                font=font,
-                screen=self._screen,
-            )
-
-            self._screen.blit(MENU_TEXT, MENU_RECT)
-
-            for button in [START_BUTTON, QUIT_BUTTON]:
-                button.change_color(MENU_MOUSE_POS)
-                button.update()
+            mouse_pos = pygame.mouse.get_pos()
+            if redraw:
+                self._screen.fill("black")
+                self._screen.blit(menu_text, menu_rect)
+                for button in buttons:
+                    button.change_color(mouse_pos)
+                    button.update()
+                pygame.display.update()
+                redraw = False
+            else:
+                dirty = []
+                for button in buttons:
+                    if button.change_color(mouse_pos):
+                        self._screen.fill("black", button.rect)
+                        button.update()
+                        dirty.append(button.rect)
+                if dirty:
+                    pygame.display.update(dirty)
 
             # Gestion des evenements (clics, fermeture).
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
                 if event.type == pygame.MOUSEBUTTONDOWN:
-                    if START_BUTTON.check_for_input(MENU_MOUSE_POS):
+                    if start_button.check_for_input(mouse_pos):
                         logger.info("Lancement de la simulation depuis le menu")
                         self.simulation()
-                    if QUIT_BUTTON.check_for_input(MENU_MOUSE_POS):
+                        # La simulation a occupe tout l'ecran: le menu est a redessiner.
+                        pygame.display.set_caption("Random Walk")
+                        redraw = True
+                    if quit_button.check_for_input(mouse_pos):
                         logger.info("Fermeture depuis le menu")
                         running = False
-            pygame.display.update()
             self._clock.tick(60)
 
-    def simulation(self) -> None:
+    def _run_adaptive(self, deadline: float, limit: int | None) -> int:
         """
-        Run the simulation loop.
+        Run batches of steps until the frame deadline.
+
+        The batch size doubles while batches are short and halves when one
+        takes more than a quarter of the frame budget.
 
         Args:
-            None.
+            deadline (float): ``time.perf_counter`` value at which to stop.
+            limit (int | None): Maximum number of steps (None for unlimited).
 
         Returns:
+            int: Number of steps run.
+        """
+        budget = 1.0 / self._simulation_fps
+        done = 0
+        while limit is None or done < limit:
+            chunk = self._chunk if limit is None else min(self._chunk, limit - done)
+            start = time.perf_counter()
+            self._world.simulate(chunk)
+            done += chunk
+            elapsed = time.perf_counter() - start
+            if elapsed < budget / 8:
+                self._chunk *= 2
+            elif elapsed > budget / 4 and self._chunk > 1:
+                self._chunk //= 2
+            if start + elapsed >= deadline:
+                break
+        return done
+
+    def _walkers(self) -> list:
+        """
+        Walkers of the world, in a stable order (none for a cluster).
+
+        Args:
             None.
+
+        Returns:
+            list[Walker]: Walkers to draw.
         """
-        logger.info("Debut de la simulation")
-        pygame.display.set_caption("Random Walk - Simulation")
-        font = pygame.font.SysFont("Arial", 20)
+        return [] if self._render == "cluster" else self._world._walkers
 
-        world = self._world
-        walkers = world._walkers
-        nmb_walkers = len(walkers)
+    def _build_view(self, walkers, positions):
+        """
+        Create the layer of the configured render mode.
+
+        Args:
+            walkers (Sequence[Walker]): Walkers to draw, in a stable order.
+            positions (Callable[[], numpy.ndarray]): Returns the current positions, shape (walkers, 2).
+
+        Returns:
+            Callable[[], None]: Draws the current state of the walkers on the screen surface.
+        """
+        screen = self._screen
+        if self._render == "cluster":
+            # Agregat: particules fixees peintes une seule fois, marcheurs par-dessus.
+            aggregation = self._world
+            cluster_layer = ClusterLayer(screen.get_size(), aggregation.nmb_particles)
+
+            def draw_cluster() -> None:
+                cluster_layer.update(aggregation.cluster, positions())
+                cluster_layer.draw(screen)
+
+            return draw_cluster
+        if self._render != "trails":
+            # Positions seules: un pixel (ou une densite) par marcheur, sans appel par marcheur.
+            layer = ParticleLayer(screen.get_size(), len(walkers), self._render)
+
+            def draw_positions() -> None:
+                layer.update(positions())
+                layer.draw(screen)
+
+            return draw_positions
 
         # Palette de couleurs pour distinguer les marcheurs.
         colors = []
-        for i in range(nmb_walkers):
+        for i in range(len(walkers)):
             color = pygame.Color(0)
-            color.hsva = (i * 360.0 / max(nmb_walkers, 1), 80, 100, 100)
+            color.hsva = (i * 360.0 / max(len(walkers), 1), 80, 100, 100)
             colors.append(color)
+        # Calque persistant des trainees: seuls les nouveaux segments sont dessines.
+        trails = TrailLayer(screen.get_size(), colors)
+
+        def draw_trails() -> None:
+            # Nouveaux segments (ou redessin complet si le cadrage change).
+            trails.update(walkers)
+            trails.draw(screen)
+            # Positions courantes par-dessus les trainees.
+            for i, walker in enumerate(walkers):
+                x, y = walker.position
+                pygame.draw.circle(screen, colors[i % len(colors)], trails.to_screen(x, y), 4)
 
-        # Bornes du monde pour le cadrage automatique.
-        min_x = max_x = 0.0
-        min_y = max_y = 0.0
-        paused = False
-        running = True
+        return draw_trails
+
+    def export_frames(self, exporter, every: int = 1) -> int:
+        """
+        Run the simulation without window nor clock, exporting the view.
+
+        One frame is rendered at the start, then one every ``every`` steps
+        until ``max_steps``. Frames are handed to the exporter, which
+        encodes them on its own thread while the next steps run.
+
+        Args:
+            exporter (FrameExporter): Frame output.
+            every (int): Steps simulated between two frames.
+
+        Returns:
+            int: Number of frames exported.
+
+        Raises:
+            ValueError: If the screen has no ``max_steps`` or ``every`` is not positive.
+        """
+        if self._max_steps is None:
+            raise ValueError("Frame export needs max_steps")
+        if every < 1:
+            raise ValueError("every must be >= 1")
+        world = self._world
+        draw_view = self._build_view(self._walkers(), world.positions)
+        font = get_font("Arial", 20)
+        logger.info("Export de %s pas, une image tous les %s pas", self._max_steps, every)
         steps_done = 0
+        frames = 0
+        while True:
+            draw_view()
+            self._screen.blit(font.render(f"{steps_done} steps", True, "gray"), (10, 10))
+            exporter.submit(self._screen)
+            frames += 1
+            if steps_done >= self._max_steps:
+                return frames
+            steps = min(every, self._max_steps - steps_done)
+            world.simulate(steps)
+            steps_done += steps
 
-        def update_bounds() -> None:
-            """
-            Update world bounds from walker positions.
+    def simulation(self) -> None:
+        """
+        Run the simulation loop.
 
-            Args:
-                None.
+        Each frame runs ``steps_per_frame`` steps (or, in adaptive mode, as
+        many as fit in the frame budget), then renders once. Keys: space/p
+        pause, +/- double or halve the steps per frame, a toggles the
+        adaptive mode, o toggles the profiling overlay (with ``--profile``),
+        Esc quits.
 
-            Returns:
-                None.
-            """
-            nonlocal min_x, max_x, min_y, max_y
-            for walker in walkers:
-                x, y = walker.position
-                if x < min_x:
-                    min_x = x
-                if x > max_x:
-                    max_x = x
-                if y < min_y:
-                    min_y = y
-                if y > max_y:
-                    max_y = y
+        In background mode, the world runs at full speed in another process
+        and each frame draws the rows it published meanwhile. The
+        "particles" and "density" renders only draw current positions, in
+        one array pass per frame whatever the number of walkers.
+
+        Args:
+            None.
+
+        Returns:
+            None.
+        """
+        logger.info("Debut de la simulation")
+        pygame.display.set_caption("Random Walk - Simulation")
+        font = get_font("Arial", 20)
+        texts = TextCache(font)
+
+        world = self._world
+        walkers = self._walkers()
+        background = None
+        if self._background:
+            # Le monde avance dans un autre processus: on dessine ses copies locales.
+            from .background import BackgroundSimulation
+
+            background = BackgroundSimulation(world, self._max_steps, paths=self._render == "trails")
+            walkers = background.walkers
+        positions = background.positions if background is not None else world.positions
+        draw_view = self._build_view(walkers, positions)
+        paused = False
+        running = True
+        steps_done = 0
+        # Mesures pour l'affichage: pas/s (moyenne glissante), temps de simulation et de rendu.
+        steps_rate = 0.0
+        sim_time = render_time = frame_time = 0.0
+        last_frame = time.perf_counter()
+        # Mesures rendues au plus tous les HUD_INTERVAL; image redessinee seulement si elle change.
+        hud_surface = None
+        hud_time = 0.0
+        redraw = True
+        # Surcouche des phases les plus couteuses, seulement si le profilage est actif.
+        profiler = profiling.active
+        profile_surfaces = []
+        show_profile = profiler is not None
+        # Police a chasse fixe: les colonnes du resume restent alignees.
+        profile_font = get_font("Courier New", 16) if profiler is not None else None
 
         # Boucle principale de simulation.
         while running:
             # Evenements clavier/fenetre.
-            for event in pygame.event.get():
+            events = pygame.event.get()
+            for event in events:
                 if event.type == pygame.QUIT:
                     running = False
                 if event.type == pygame.KEYDOWN:
@@ -163,65 +349,95 @@ class Screen:
                     if event.key in (pygame.K_SPACE, pygame.K_p):
                         paused = not paused
                         logger.debug("Pause=%s", paused)
-
-            if not paused:
+                        if background is not None and paused:
+                            background.pause()
+                        elif background is not None:
+                            background.resume()
+                    if event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                        self._steps_per_frame = 2 * (self._steps_per_frame or self._chunk)
+                        logger.debug("Pas par image=%s", self._steps_per_frame)
+                    if event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                        self._steps_per_frame = max(1, (self._steps_per_frame or self._chunk) // 2)
+                        logger.debug("Pas par image=%s", self._steps_per_frame)
+                    if event.key == pygame.K_a:
+                        self._steps_per_frame = None if self._steps_per_frame else 1
+                        logger.debug("Mode adaptatif=%s", self._steps_per_frame is None)
+                    if event.key == pygame.K_o and profiler is not None:
+                        show_profile = not show_profile
+                        logger.debug("Surcouche de profilage=%s", show_profile)
+
+            frame_start = time.perf_counter()
+            steps = 0
+            if background is not None:
+                # Lecture des lignes publiees depuis l'image precedente.
+                steps = background.poll()
+                steps_done += steps
+                if background.finished:
+                    logger.info("Fin de la simulation apres %s pas", steps_done)
+                    running = False
+            elif not paused:
+                limit = None if self._max_steps is None else self._max_steps - steps_done
+                if limit is not None and limit <= 0:
+                    logger.info("Fin de la simulation apres %s pas", steps_done)
+                    running = False
+                elif self._steps_per_frame is None:
+                    # Budget de l'image moins le temps de rendu de l'image precedente.
+                    deadline = frame_start + 1.0 / self._simulation_fps - render_time
+                    steps = self._run_adaptive(deadline, limit)
+                else:
+                    steps = self._steps_per_frame if limit is None else min(self._steps_per_frame, limit)
+                    world.simulate(steps)
+                steps_done += steps
                 if self._max_steps is not None and steps_done >= self._max_steps:
                     logger.info("Fin de la simulation apres %s pas", steps_done)
                     running = False
+            render_start = time.perf_counter()
+            sim_time = render_start - frame_start
+
+            # Rien n'a bouge (pause sans evenement): l'image affichee reste valable.
+            if redraw or steps or events:
+                redraw = False
+                if profiler is None:
+                    draw_view()
                 else:
-                    world.step()
-                    steps_done += 1
-                    update_bounds()
-                    if self._max_steps is not None and steps_done >= self._max_steps:
-                        logger.info("Fin de la simulation apres %s pas", steps_done)
-                        running = False
-
-            # Conversion monde -> ecran (mise a l'echelle + centrage).
-            screen_w, screen_h = self._screen.get_size()
-            world_w = max_x - min_x
-            world_h = max_y - min_y
-            eps = 1e-6
-            scale_w = (screen_w * 0.9) / max(world_w, eps)
-            scale_h = (screen_h * 0.9) / max(world_h, eps)
-            max_scale = 40.0
-            scale = min(scale_w, scale_h, max_scale)
-            offset_x = (screen_w - world_w * scale) / 2
-            offset_y = (screen_h - world_h * scale) / 2
-
-            def to_screen(x: float, y: float) -> tuple[int, int]:
-                """
-                Convert world coordinates to screen coordinates.
-
-                Args:
-                    x (float): World X coordinate.
-                    y (float): World Y coordinate.
-
-                Returns:
-                    tuple[int, int]: Screen pixel coordinates.
-                """
-                sx = offset_x + (x - min_x) * scale
-                sy = offset_y + (max_y - y) * scale
-                return int(sx), int(sy)
-
-            self._screen.fill("black")
-
-            # Dessin des trajectoires et positions courantes.
-            for i, walker in enumerate(walkers):
-                color = colors[i % len(colors)]
-                path = walker.chemin
-                if len(path) >= 2:
-                    points = [to_screen(x, y) for x, y in path]
-                    pygame.draw.lines(self._screen, color, False, points, 2)
-                x, y = walker.position
-                pygame.draw.circle(self._screen, color, to_screen(x, y), 4)
-
-            # Infos d'etat (pause / raccourcis).
-            if paused:
-                pause_text = font.render("Pause (space/p to resume)", True, "yellow")
-                self._screen.blit(pause_text, (10, 10))
-            else:
-                info = font.render("Space/P: pause, Esc: quit", True, "gray")
-                self._screen.blit(info, (10, 10))
+                    start = profiler.start()
+                    draw_view()
+                    profiler.stop("view.draw", start, len(walkers))
 
-            pygame.display.flip()
+                # Infos d'etat (pause / raccourcis) et mesures de temps.
+                if paused:
+                    self._screen.blit(texts.render("Pause (space/p to resume)", "yellow"), (10, 10))
+                else:
+                    info = texts.render("Space/P: pause, +/-: speed, A: adaptive, Esc: quit", "gray")
+                    self._screen.blit(info, (10, 10))
+                if hud_surface is None or events or render_start - hud_time >= HUD_INTERVAL:
+                    mode = "auto" if self._steps_per_frame is None else self._steps_per_frame
+                    hud = (
+                        f"{steps_done} steps | {mode} steps/frame | {steps_rate:,.0f} steps/s | "
+                        f"frame {frame_time * 1000:.1f} ms (sim {sim_time * 1000:.1f}, render {render_time * 1000:.1f})"
+                    )
+                    hud_surface = font.render(hud, True, "gray")
+                    hud_time = render_start
+                    if show_profile:
+                        lines = profiler.summary(PROFILE_LINES)
+                        profile_surfaces = [profile_font.render(line, True, "orange") for line in lines]
+                self._screen.blit(hud_surface, (10, 35))
+                if show_profile:
+                    for i, surface in enumerate(profile_surfaces):
+                        self._screen.blit(surface, (10, 60 + 18 * i))
+
+                if profiler is None:
+                    pygame.display.flip()
+                else:
+                    start = profiler.start()
+                    pygame.display.flip()
+                    profiler.stop("display.flip", start)
+                render_time = time.perf_counter() - render_start
             self._clock.tick(self._simulation_fps)
+            now = time.perf_counter()
+            frame_time = now - last_frame
+            last_frame = now
+            if frame_time > 0:
+                steps_rate = 0.9 * steps_rate + 0.1 * steps / frame_time
+        if background is not None:
+            background.stop()
@@ -0,0 +1,446 @@
+﻿"""Visited-site indexes of lattice walks: range, visit counts and revisits."""
+
+import logging
+
+import numpy as np
+
+from .trajectories import TrajectoryWriter
+
+logger = logging.getLogger(__name__)
+
+# Cote des tuiles de compteurs (puissance de 2): 8 x 8 sites par tuile.
+TILE_SHIFT = 3
+_TILE_CELLS = 1 << (2 * TILE_SHIFT)
+_TILE_MASK = (1 << TILE_SHIFT) - 1
+
+# Taux de remplissage maximal de la table de hachage avant de la doubler.
+MAX_LOAD = 0.5
+
+# Capacite initiale de la table de hachage (puissance de 2).
+INITIAL_CAPACITY = 1 << 10
+
+# Multiplicateurs du hachage de Fibonacci (tuile, puis proprietaire).
+_TILE_MULTIPLIER = 0x9E3779B97F4A7C15
+_OWNER_MULTIPLIER = 0xC2B2AE3D27D4EB4F
+_MASK64 = (1 << 64) - 1
+
+# Decalage rendant les coordonnees de tuile positives dans la cle.
+_KEY_OFFSET = 1 << 31
+
+
+class SiteIndex:
+    """
+    Visit count of every (owner, lattice site) pair reached, in hashed tiles.
+
+    Sites are grouped in square tiles of ``2**TILE_SHIFT`` sites. An
+    open-addressing table (linear probing, Fibonacci hashing) maps each
+    (owner, tile) pair to a dense block of counters, allocated on first
+    visit, so the memory follows the visited area and not the number of
+    steps, and consecutive steps of a walk hit the same block. Owners let
+    one index keep every walker apart. The number of distinct sites and of
+    visits of each owner are kept up to date, and the count of one site is
+    a short probe.
+
+    Args:
+        nmb_owners (int): Number of owners (1 for a single shared index).
+    """
+
+    def __init__(self, nmb_owners: int = 1) -> None:
+        """
+        Create an empty index.
+
+        Args:
+            nmb_owners (int): Number of owners (1 for a single shared index).
+
+        Returns:
+            None.
+        """
+        self._owner_sites = np.zeros(nmb_owners, dtype=np.int64)
+        self._owner_visits = np.zeros(nmb_owners, dtype=np.int64)
+        self._sites = 0
+        # Compteurs: une ligne par tuile allouee, dans l'ordre d'allocation.
+        self._cells = np.zeros((INITIAL_CAPACITY, _TILE_CELLS), dtype=np.uint32)
+        self._nmb_tiles = 0
+        self._allocate(INITIAL_CAPACITY)
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Replace the hash table by an empty one.
+
+        Args:
+            capacity (int): Number of slots (power of 2).
+
+        Returns:
+            None.
+        """
+        self._bits = capacity.bit_length() - 1
+        # Proprietaire -1: case libre; _ids: ligne des compteurs de la tuile.
+        self._keys = np.zeros(capacity, dtype=np.uint64)
+        self._owners = np.full(capacity, -1, dtype=np.int32)
+        self._ids = np.full(capacity, -1, dtype=np.int64)
+
+    @property
+    def nmb_sites(self) -> int:
+        """
+        Number of distinct (owner, site) pairs: the range for a single owner.
+
+        Args:
+            None.
+
+        Returns:
+            int: Site count.
+        """
+        return self._sites
+
+    @property
+    def nmb_visits(self) -> int:
+        """
+        Number of visits added, revisits included.
+
+        Args:
+            None.
+
+        Returns:
+            int: Visit count.
+        """
+        return int(self._owner_visits.sum())
+
+    @property
+    def revisits(self) -> int:
+        """
+        Number of visits to an already visited site (self-intersections of a path).
+
+        Args:
+            None.
+
+        Returns:
+            int: Visits minus distinct sites.
+        """
+        return self.nmb_visits - self._sites
+
+    @property
+    def nmb_tiles(self) -> int:
+        """
+        Number of tiles allocated.
+
+        Args:
+            None.
+
+        Returns:
+            int: Tile count.
+        """
+        return self._nmb_tiles
+
+    def ranges(self) -> np.ndarray:
+        """
+        Return the number of distinct sites of every owner.
+
+        Args:
+            None.
+
+        Returns:
+            numpy.ndarray: int64 site count per owner.
+        """
+        return self._owner_sites.copy()
+
+    def owner_visits(self) -> np.ndarray:
+        """
+        Return the number of visits of every owner.
+
+        Args:
+            None.
+
+        Returns:
+            numpy.ndarray: int64 visit count per owner.
+        """
+        return self._owner_visits.copy()
+
+    def visits(self, x: int, y: int, owner: int = 0) -> int:
+        """
+        Return how many times an owner visited a site.
+
+        Args:
+            x (int): Site X.
+            y (int): Site Y.
+            owner (int): Owner index.
+
+        Returns:
+            int: Visit count (0 if never visited).
+        """
+        x = int(x)
+        y = int(y)
+        key = (((x >> TILE_SHIFT) + _KEY_OFFSET) << 32) | ((y >> TILE_SHIFT) + _KEY_OFFSET)
+        mask = len(self._keys) - 1
+        slot = ((key * _TILE_MULTIPLIER ^ owner * _OWNER_MULTIPLIER) & _MASK64) >> (64 - self._bits)
+        # Sondage lineaire jusqu'a la tuile ou une case libre.
+        while True:
+            slot_owner = self._owners[slot].item()
+            if slot_owner < 0:
+                return 0
+            if slot_owner == owner and self._keys[slot].item() == key:
+                return self._cells[self._ids[slot], ((x & _TILE_MASK) << TILE_SHIFT) | (y & _TILE_MASK)].item()
+            slot = (slot + 1) & mask
+
+    def _place(self, keys: np.ndarray, owners: np.ndarray) -> np.ndarray:
+        """
+        Find or claim the slot of every key, probing all keys in parallel.
+
+        The table must have more free slots than there are keys.
+
+        Args:
+            keys (numpy.ndarray): uint64 tile keys.
+            owners (numpy.ndarray): int32 owner of each key.
+
+        Returns:
+            numpy.ndarray: Slot of each key.
+        """
+        mask = len(self._keys) - 1
+        mixed = keys * np.uint64(_TILE_MULTIPLIER) ^ owners.astype(np.uint64) * np.uint64(_OWNER_MULTIPLIER)
+        slots = (mixed >> np.uint64(64 - self._bits)).astype(np.int64)
+        result = np.empty(len(keys), dtype=np.int64)
+        pending = np.arange(len(keys))
+        while len(pending):
+            probe = slots[pending]
+            # Cases libres prises par l'une des cles qui y arrivent (la derniere ecrite gagne).
+            free = self._owners[probe] < 0
+            self._keys[probe[free]] = keys[pending[free]]
+            self._owners[probe[free]] = owners[pending[free]]
+            found = (self._owners[probe] == owners[pending]) & (self._keys[probe] == keys[pending])
+            result[pending[found]] = probe[found]
+            pending = pending[~found]
+            slots[pending] = (slots[pending] + 1) & mask
+        return result
+
+    def _rehash(self, capacity: int) -> None:
+        """
+        Move every tile to a new hash table, keeping its counters.
+
+        Args:
+            capacity (int): Number of slots of the new table (power of 2).
+
+        Returns:
+            None.
+        """
+        used = np.flatnonzero(self._owners >= 0)
+        keys, owners, ids = self._keys[used], self._owners[used], self._ids[used]
+        self._allocate(capacity)
+        self._ids[self._place(keys, owners)] = ids
+
+    def _tile_ids(self, keys: np.ndarray, owners: np.ndarray) -> np.ndarray:
+        """
+        Return the counter row of every tile, allocating the new ones.
+
+        Args:
+            keys (numpy.ndarray): uint64 tile keys.
+            owners (numpy.ndarray): int32 owner of each key.
+
+        Returns:
+            numpy.ndarray: Row of ``_cells`` of each key.
+        """
+        # Le sondage doit toujours trouver une case libre, meme si toutes les tuiles sont nouvelles.
+        capacity = len(self._keys)
+        while self._nmb_tiles + len(keys) >= capacity:
+            capacity *= 2
+        if capacity != len(self._keys):
+            self._rehash(capacity)
+        slots = self._place(keys, owners)
+        new = np.unique(slots[self._ids[slots] < 0])
+        if len(new):
+            first = self._nmb_tiles
+            self._nmb_tiles += len(new)
+            self._ids[new] = np.arange(first, self._nmb_tiles)
+            if self._nmb_tiles > len(self._cells):
+                cells = np.zeros((max(self._nmb_tiles, 2 * len(self._cells)), _TILE_CELLS), dtype=np.uint32)
+                cells[:first] = self._cells[:first]
+                self._cells = cells
+        ids = self._ids[slots]
+        # Remplissage ramene sous MAX_LOAD pour garder des sondages courts.
+        capacity = len(self._keys)
+        while self._nmb_tiles > capacity * MAX_LOAD:
+            capacity *= 2
+        if capacity != len(self._keys):
+            self._rehash(capacity)
+        return ids
+
+    def add(self, xs: np.ndarray, ys: np.ndarray, owners: np.ndarray | None = None) -> None:
+        """
+        Record one visit of each given site.
+
+        Consecutive visits in the same tile share one table lookup, so
+        passing the points of a walk in path order is fastest.
+
+        Args:
+            xs (numpy.ndarray): X of the sites (integers).
+            ys (numpy.ndarray): Y of the sites (integers).
+            owners (numpy.ndarray | None): Owner of each visit (owner 0 if None).
+
+        Returns:
+            None.
+
+        Raises:
+            ValueError: If a coordinate does not fit in 32 bits.
+        """
+        xs = np.asarray(xs, dtype=np.int64).ravel()
+        ys = np.asarray(ys, dtype=np.int64).ravel()
+        if not len(xs):
+            return
+        if min(xs.min(), ys.min()) < -_KEY_OFFSET or max(xs.max(), ys.max()) >= _KEY_OFFSET:
+            raise ValueError("Site coordinates must fit in 32-bit integers")
+        owners = np.zeros(len(xs), dtype=np.int32) if owners is None else np.asarray(owners, dtype=np.int32).ravel()
+        keys = (((xs >> TILE_SHIFT) + _KEY_OFFSET) << 32 | ((ys >> TILE_SHIFT) + _KEY_OFFSET)).astype(np.uint64)
+        # Une recherche par suite de points dans la meme tuile.
+        starts = np.ones(len(keys), dtype=bool)
+        starts[1:] = (keys[1:] != keys[:-1]) | (owners[1:] != owners[:-1])
+        runs = np.cumsum(starts) - 1
+        ids = self._tile_ids(keys[starts], owners[starts])[runs]
+        cells = ids * _TILE_CELLS + (((xs & _TILE_MASK) << TILE_SHIFT) | (ys & _TILE_MASK))
+        flat = self._cells.reshape(-1)
+        first_visit = flat[cells] == 0
+        np.add.at(flat, cells, np.uint32(1))
+        # Un site nouveau vu k fois dans le lot compte k fois pour 1/k: somme exacte une fois arrondie.
+        weights = 1.0 / flat[cells[first_visit]]
+        nmb_owners = len(self._owner_sites)
+        fresh = np.rint(np.bincount(owners[first_visit], weights=weights, minlength=nmb_owners)).astype(np.int64)
+        self._owner_sites += fresh
+        self._sites += int(fresh.sum())
+        self._owner_visits += np.bincount(owners, minlength=nmb_owners)
+
+    def sites(self, owner: int = 0) -> np.ndarray:
+        """
+        Return the sites visited by an owner.
+
+        Args:
+            owner (int): Owner index.
+
+        Returns:
+            numpy.ndarray: int64 coordinates, shape (sites, 2), in no particular order.
+        """
+        used = np.flatnonzero(self._owners == owner)
+        keys = self._keys[used]
+        tiles, cells = np.nonzero(self._cells[self._ids[used]])
+        tx = (keys[tiles] >> np.uint64(32)).astype(np.int64) - _KEY_OFFSET
+        ty = (keys[tiles] & np.uint64(0xFFFFFFFF)).astype(np.int64) - _KEY_OFFSET
+        xs = (tx << TILE_SHIFT) + (cells >> TILE_SHIFT)
+        ys = (ty << TILE_SHIFT) + (cells & _TILE_MASK)
+        return np.stack((xs, ys), axis=-1)
+
+
+class VisitedSites(TrajectoryWriter):
+    """
+    Visited-site index of every walker and of the whole world, kept while stepping.
+
+    Registered with ``World.observe`` (or fed like a streaming writer), it
+    adds every row of positions to a global ``SiteIndex`` and to one shared
+    by the walkers (one owner per walker), so ranges and visit counts are
+    available at any time without path history. Lattice coordinates only.
+
+    Args:
+        per_walker (bool): Keep the per-walker index besides the global one.
+    """
+
+    def __init__(self, per_walker: bool = True) -> None:
+        """
+        Create empty indexes.
+
+        Args:
+            per_walker (bool): Keep the per-walker index besides the global one.
+
+        Returns:
+            None.
+        """
+        self._per_walker = per_walker
+        self.total = SiteIndex()
+        self.walkers: SiteIndex | None = None
+
+    def ranges(self) -> np.ndarray:
+        """
+        Return the number of distinct sites visited by each walker.
+
+        Args:
+            None.
+
+        Returns:
+            numpy.ndarray: int64 range of every walker.
+
+        Raises:
+            ValueError: If the per-walker index is not kept.
+        """
+        if not self._per_walker:
+            raise ValueError("Per-walker indexes are disabled")
+        return self.walkers.ranges() if self.walkers is not None else np.zeros(0, dtype=np.int64)
+
+    def revisits(self) -> np.ndarray:
+        """
+        Return the number of self-intersections of each walker's path.
+
+        Args:
+            None.
+
+        Returns:
+            numpy.ndarray: int64 visits to an already visited site, per walker.
+        """
+        ranges = self.ranges()
+        if self.walkers is None:
+            return ranges
+        return self.walkers.owner_visits() - ranges
+
+    def visits(self, x: int, y: int, walker: int | None = None) -> int:
+        """
+        Return how many times a site was visited, by one walker or by all.
+
+        Args:
+            x (int): Site X.
+            y (int): Site Y.
+            walker (int | None): Walker index (all walkers if None).
+
+        Returns:
+            int: Visit count.
+
+        Raises:
+            ValueError: If a walker is given and the per-walker index is not kept.
+        """
+        if walker is None:
+            return self.total.visits(x, y)
+        if not self._per_walker:
+            raise ValueError("Per-walker indexes are disabled")
+        return self.walkers.visits(x, y, walker) if self.walkers is not None else 0
+
+    def write_block(self, points: np.ndarray) -> None:
+        """
+        Add the next rows of positions to the indexes.
+
+        Args:
+            points (numpy.ndarray): Positions, shape (rows, walkers, 2).
+
+        Returns:
+            None.
+
+        Raises:
+            ValueError: If the coordinates are not integers.
+        """
+        if not len(points):
+            return
+        if not np.issubdtype(points.dtype, np.integer):
+            raise ValueError("Visited sites require lattice (integer) coordinates")
+        # Points pris marcheur par marcheur, dans l'ordre du chemin: pas voisins dans la meme tuile.
+        columns = points.transpose(1, 0, 2)
+        self.total.add(columns[..., 0], columns[..., 1])
+        if not self._per_walker:
+            return
+        nmb_walkers = points.shape[1]
+        if self.walkers is None:
+            self.walkers = SiteIndex(nmb_walkers)
+        owners = np.repeat(np.arange(nmb_walkers, dtype=np.int32), len(points))
+        self.walkers.add(columns[..., 0], columns[..., 1], owners)
+
+    def close(self, complete: bool = True) -> None:
+        """
+        Nothing to flush: the indexes are queried directly.
+
+        Args:
+            complete (bool): Unused.
+
+        Returns:
+            None.
+        """
+        logger.debug("Sites visites: %s pour %s visites", self.total.nmb_sites, self.total.nmb_visits)
@@ -0,0 +1,437 @@
+﻿"""Cell-list spatial index of walker positions and interaction rules using it."""
+
+import logging
+import math
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Decalage des coordonnees de cellule dans la cle (31 bits par axe).
+_KEY_SHIFT = 31
+_KEY_OFFSET = 1 << 30
+
+
+def _cell_keys(cx: np.ndarray, cy: np.ndarray) -> np.ndarray:
+    """
+    Pack cell coordinates into int64 keys, ordered by column then row.
+
+    Args:
+        cx (numpy.ndarray): Cell X indices.
+        cy (numpy.ndarray): Cell Y indices.
+
+    Returns:
+        numpy.ndarray: int64 keys; the cells of one column are consecutive.
+    """
+    return ((cx + _KEY_OFFSET) << _KEY_SHIFT) | (cy + _KEY_OFFSET)
+
+
+class CellList:
+    """
+    Uniform-grid spatial index of walker positions.
+
+    Walkers are sorted by the key of their square cell; each occupied cell
+    is a slice of that order, found by binary search among the occupied
+    cells. After a step, ``update`` sorts again starting from the previous
+    order: only the walkers that changed cell are out of place, so the
+    (stable, run-aware) sort is close to linear. Range queries, nearest
+    neighbour and all pairs within a distance only look at nearby cells.
+
+    Args:
+        cell_size (float): Side of the cells, ideally about the interaction distance.
+        positions (numpy.ndarray | None): Initial positions, shape (walkers, 2).
+    """
+
+    def __init__(self, cell_size: float, positions: np.ndarray | None = None) -> None:
+        """
+        Create the index, empty or from positions.
+
+        Args:
+            cell_size (float): Side of the cells, ideally about the interaction distance.
+            positions (numpy.ndarray | None): Initial positions, shape (walkers, 2).
+
+        Returns:
+            None.
+
+        Raises:
+            ValueError: If the cell size is not positive.
+        """
+        if not cell_size > 0:
+            raise ValueError("cell_size must be positive")
+        self.cell_size = float(cell_size)
+        self._positions = np.zeros((0, 2))
+        self._keys = np.zeros(0, dtype=np.int64)
+        self._order = np.zeros(0, dtype=np.int64)
+        self._index_cells()
+        if positions is not None:
+            self.update(positions)
+
+    def __len__(self) -> int:
+        """
+        Number of indexed walkers.
+
+        Args:
+            None.
+
+        Returns:
+            int: Walker count.
+        """
+        return len(self._positions)
+
+    @property
+    def nmb_cells(self) -> int:
+        """
+        Number of occupied cells.
+
+        Args:
+            None.
+
+        Returns:
+            int: Cell count.
+        """
+        return len(self._cell_keys)
+
+    def _cells_of(self, positions: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Cell indices of positions.
+
+        Args:
+            positions (numpy.ndarray): Positions, shape (points, 2).
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: Cell X and Y indices (int64).
+        """
+        cells = np.floor(positions / self.cell_size).astype(np.int64)
+        return cells[:, 0], cells[:, 1]
+
+    def _index_cells(self) -> None:
+        """
+        Rebuild the occupied-cell table and its extent from the sorted order.
+
+        Args:
+            None.
+
+        Returns:
+            None.
+        """
+        keys = self._keys[self._order]
+        starts = np.flatnonzero(np.diff(keys, prepend=keys[:1] - 1)) if len(keys) else np.zeros(0, dtype=np.int64)
+        self._cell_keys = keys[starts]
+        # Debut de chaque cellule dans l'ordre trie, plus la fin de la derniere.
+        self._starts = np.append(starts, len(keys))
+        # Rectangle des cellules occupees (colonnes triees, lignes a parcourir), en indices de cellule.
+        if len(self._cell_keys):
+            rows = (self._cell_keys & ((1 << _KEY_SHIFT) - 1)) - _KEY_OFFSET
+            self._extent = (
+                (self._cell_keys[0].item() >> _KEY_SHIFT) - _KEY_OFFSET,
+                (self._cell_keys[-1].item() >> _KEY_SHIFT) - _KEY_OFFSET,
+                rows.min().item(),
+                rows.max().item(),
+            )
+        else:
+            self._extent = None
+
+    def update(self, positions: np.ndarray) -> None:
+        """
+        Move the index to new positions of the same walkers.
+
+        Args:
+            positions (numpy.ndarray): Positions, shape (walkers, 2).
+
+        Returns:
+            None.
+        """
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        keys = _cell_keys(*self._cells_of(positions))
+        if len(keys) != len(self._keys):
+            # Population differente: tri complet.
+            self._positions = positions
+            self._keys = keys
+            self._order = np.argsort(keys, kind="stable")
+            self._index_cells()
+            return
+        self._positions = positions
+        if np.array_equal(keys, self._keys):
+            return
+        self._keys = keys
+        # Ordre precedent presque trie: seuls les marcheurs ayant change de cellule sont deplaces.
+        self._order = self._order[np.argsort(keys[self._order], kind="stable")]
+        self._index_cells()
+
+    def remove(self, indices: np.ndarray) -> None:
+        """
+        Drop walkers from the index; the remaining ones are renumbered in order.
+
+        Args:
+            indices (numpy.ndarray): Indices of the walkers to drop.
+
+        Returns:
+            None.
+        """
+        keep = np.ones(len(self._positions), dtype=bool)
+        keep[indices] = False
+        renumber = np.cumsum(keep) - 1
+        self._order = renumber[self._order[keep[self._order]]]
+        self._positions = self._positions[keep]
+        self._keys = self._keys[keep]
+        self._index_cells()
+
+    def _walkers_in(self, cx0: int, cx1: int, cy0: int, cy1: int) -> np.ndarray:
+        """
+        Walkers of the cells of a rectangle of cell indices.
+
+        Args:
+            cx0 (int): First cell column.
+            cx1 (int): Last cell column.
+            cy0 (int): First cell row.
+            cy1 (int): Last cell row.
+
+        Returns:
+            numpy.ndarray: Walker indices.
+        """
+        if self._extent is None:
+            return self._order[:0]
+        # Colonnes et lignes limitees a celles qui sont occupees (grands rayons de recherche).
+        cx0 = max(cx0, self._extent[0])
+        cx1 = min(cx1, self._extent[1])
+        cy0 = max(cy0, self._extent[2])
+        cy1 = min(cy1, self._extent[3])
+        columns = np.arange(cx0, cx1 + 1, dtype=np.int64)
+        # Les cellules d'une colonne sont contigues dans l'ordre des cles: une tranche par colonne.
+        first = np.searchsorted(self._cell_keys, _cell_keys(columns, np.int64(cy0)), side="left")
+        last = np.searchsorted(self._cell_keys, _cell_keys(columns, np.int64(cy1)), side="right")
+        starts = self._starts[first]
+        ends = self._starts[last]
+        return np.concatenate([self._order[a:b] for a, b in zip(starts.tolist(), ends.tolist()) if b > a] or [self._order[:0]])
+
+    def within(self, point: tuple[float, float], radius: float) -> np.ndarray:
+        """
+        Return the walkers at distance ``radius`` or less from a point.
+
+        Args:
+            point (tuple[float, float]): Query point.
+            radius (float): Query radius.
+
+        Returns:
+            numpy.ndarray: Walker indices, in no particular order.
+        """
+        px, py = float(point[0]), float(point[1])
+        size = self.cell_size
+        found = self._walkers_in(
+            math.floor((px - radius) / size),
+            math.floor((px + radius) / size),
+            math.floor((py - radius) / size),
+            math.floor((py + radius) / size),
+        )
+        offset = self._positions[found] - (px, py)
+        return found[np.square(offset).sum(axis=1) <= radius * radius]
+
+    def nearest(self, point: tuple[float, float], exclude: int | None = None) -> tuple[int, float]:
+        """
+        Return the walker nearest to a point.
+
+        Cells are searched by square rings around the point's cell, from the
+        first ring that reaches the occupied cells, in bands whose width
+        doubles. The search stops once the best distance found is within the
+        inner radius of the next band, or the occupied cells are all seen,
+        so a query only looks at the walkers near the point.
+
+        Args:
+            point (tuple[float, float]): Query point.
+            exclude (int | None): Walker to ignore (e.g. the one at the point).
+
+        Returns:
+            tuple[int, float]: Walker index and distance, or (-1, inf) if there is none.
+        """
+        if len(self._positions) - (exclude is not None) <= 0:
+            return -1, math.inf
+        px, py = float(point[0]), float(point[1])
+        size = self.cell_size
+        pcx, pcy = math.floor(px / size), math.floor(py / size)
+        cx0, cx1, cy0, cy1 = self._extent
+        # Anneaux (distance de Chebyshev en cellules) du premier qui touche l'etendue au dernier.
+        first = max(cx0 - pcx, pcx - cx1, cy0 - pcy, pcy - cy1, 0)
+        last = max(pcx - cx0, cx1 - pcx, pcy - cy0, cy1 - pcy)
+        best, best_distance = -1, math.inf
+        inner, outer, width = None, first, 1
+        while True:
+            if inner is None:
+                found = self._walkers_in(pcx - outer, pcx + outer, pcy - outer, pcy + outer)
+            else:
+                # Bande entre les anneaux inner (exclu, deja vu) et outer (inclus).
+                found = np.concatenate(
+                    (
+                        self._walkers_in(pcx - outer, pcx + outer, pcy - outer, pcy - inner - 1),
+                        self._walkers_in(pcx - outer, pcx + outer, pcy + inner + 1, pcy + outer),
+                        self._walkers_in(pcx - outer, pcx - inner - 1, pcy - inner, pcy + inner),
+                        self._walkers_in(pcx + inner + 1, pcx + outer, pcy - inner, pcy + inner),
+                    )
+                )
+            if exclude is not None:
+                found = found[found != exclude]
+            if len(found):
+                distances = np.sqrt(np.square(self._positions[found] - (px, py)).sum(axis=1))
+                k = int(distances.argmin())
+                if distances[k] < best_distance:
+                    best, best_distance = int(found[k]), float(distances[k])
+            # Toute cellule au-dela de l'anneau outer est a plus de outer * size du point.
+            if best_distance <= outer * size or outer >= last:
+                return best, best_distance
+            inner, outer, width = outer, outer + width, 2 * width
+
+    def pairs(self, distance: float) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return every pair of walkers at ``distance`` or less from each other.
+
+        Each occupied cell is paired with itself and half of its neighbour
+        cells (enough to cover ``distance``), so the work follows the
+        number of walkers and their local density.
+
+        Args:
+            distance (float): Pair distance.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: Indices i and j of the pairs, with i < j.
+        """
+        reach = max(1, math.ceil(distance / self.cell_size))
+        cell_keys = self._cell_keys
+        starts = self._starts[:-1]
+        counts = np.diff(self._starts)
+        found_i = []
+        found_j = []
+        for ox in range(0, reach + 1):
+            for oy in range(-reach, reach + 1):
+                if ox == 0 and oy < 0:
+                    continue
+                # Cellule voisine (ox, oy) de chaque cellule occupee, si elle l'est aussi.
+                neighbour = cell_keys + ((ox << _KEY_SHIFT) + oy)
+                b = np.searchsorted(cell_keys, neighbour)
+                valid = b < len(cell_keys)
+                valid[valid] = cell_keys[b[valid]] == neighbour[valid]
+                a = np.flatnonzero(valid)
+                b = b[valid]
+                sizes = counts[a] * counts[b]
+                total = int(sizes.sum())
+                if not total:
+                    continue
+                # Tous les couples (k, l) d'une paire de cellules, a plat.
+                pair = np.repeat(np.arange(len(a)), sizes)
+                rank = np.arange(total) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+                width = counts[b][pair]
+                slot_i = starts[a][pair] + rank // width
+                slot_j = starts[b][pair] + rank % width
+                if ox == 0 and oy == 0:
+                    kept = slot_i < slot_j
+                    slot_i = slot_i[kept]
+                    slot_j = slot_j[kept]
+                found_i.append(self._order[slot_i])
+                found_j.append(self._order[slot_j])
+        if not found_i:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        i = np.concatenate(found_i)
+        j = np.concatenate(found_j)
+        close = np.square(self._positions[i] - self._positions[j]).sum(axis=1) <= distance * distance
+        i = i[close]
+        j = j[close]
+        return np.minimum(i, j), np.maximum(i, j)
+
+
+class PairCounter:
+    """
+    Interaction rule counting the pairs of walkers within a distance after every step.
+
+    Args:
+        distance (float): Pair distance.
+    """
+
+    def __init__(self, distance: float) -> None:
+        """
+        Create the counter.
+
+        Args:
+            distance (float): Pair distance.
+
+        Returns:
+            None.
+        """
+        self.distance = distance
+        self.counts: list[int] = []
+
+    def __call__(self, world, index: CellList) -> None:
+        """
+        Count the close pairs of the current step.
+
+        Args:
+            world (World): World being stepped.
+            index (CellList): Index of the current positions.
+
+        Returns:
+            None.
+        """
+        self.counts.append(len(index.pairs(self.distance)[0]))
+
+
+class Annihilation:
+    """
+    Interaction rule A + A -> 0: two walkers within ``distance`` both disappear.
+
+    Closest pairs go first and a walker takes part in one reaction at most.
+
+    Args:
+        distance (float): Contact distance.
+    """
+
+    # Les deux marcheurs disparaissent (sinon seul le second).
+    _both = True
+
+    def __init__(self, distance: float) -> None:
+        """
+        Create the rule.
+
+        Args:
+            distance (float): Contact distance.
+
+        Returns:
+            None.
+        """
+        self.distance = distance
+        self.reactions = 0
+
+    def __call__(self, world, index: CellList) -> None:
+        """
+        Apply the reactions of the current step.
+
+        Args:
+            world (World): World being stepped.
+            index (CellList): Index of the current positions.
+
+        Returns:
+            None.
+        """
+        i, j = index.pairs(self.distance)
+        if not len(i):
+            return
+        positions = world.positions()
+        order = np.argsort(np.square(positions[i] - positions[j]).sum(axis=1), kind="stable")
+        free = np.ones(len(positions), dtype=bool)
+        removed = []
+        for a, b in zip(i[order].tolist(), j[order].tolist()):
+            if free[a] and free[b]:
+                free[a] = free[b] = False
+                self.reactions += 1
+                removed.append(b)
+                if self._both:
+                    removed.append(a)
+        world.remove_walkers(np.array(removed, dtype=np.int64))
+
+
+class Coalescence(Annihilation):
+    """
+    Interaction rule A + A -> A: of two walkers within ``distance``, the one with the lower index stays.
+
+    Args:
+        distance (float): Contact distance.
+    """
+
+    _both = False
@@ -0,0 +1,293 @@
+﻿"""Streaming mean-squared-displacement and diffusion statistics."""
+
+import logging
+import math
+
+import numpy as np
+
+from .trajectories import TrajectoryWriter
+
+logger = logging.getLogger(__name__)
+
+# Nombre de points de mesure par decade de pas.
+CHECKPOINTS_PER_DECADE = 10
+
+# Colonnes du fichier de statistiques.
+STATS_COLUMNS = ("t", "walkers", "mean_x", "mean_y", "var_x", "var_y", "msd", "var_r2")
+
+
+class RunningMoments:
+    """
+    Count, mean and sum of squared deviations of a stream of values.
+
+    Batches are merged with the pairwise form of Welford's update (Chan et
+    al.), which stays accurate when the mean is large compared with the
+    spread.
+    """
+
+    def __init__(self) -> None:
+        """
+        Create empty moments.
+
+        Args:
+            None.
+
+        Returns:
+            None.
+        """
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, values: np.ndarray) -> None:
+        """
+        Accumulate a batch of values.
+
+        Args:
+            values (numpy.ndarray): New values.
+
+        Returns:
+            None.
+        """
+        count = len(values)
+        if not count:
+            return
+        mean = float(values.mean())
+        m2 = float(np.square(values - mean).sum())
+        self._combine(count, mean, m2)
+
+    def merge(self, other: "RunningMoments") -> None:
+        """
+        Accumulate the values seen by other moments.
+
+        Args:
+            other (RunningMoments): Moments to merge in.
+
+        Returns:
+            None.
+        """
+        if other.count:
+            self._combine(other.count, other.mean, other.m2)
+
+    def _combine(self, count: int, mean: float, m2: float) -> None:
+        """
+        Merge the moments of a batch.
+
+        Args:
+            count (int): Batch size.
+            mean (float): Batch mean.
+            m2 (float): Batch sum of squared deviations.
+
+        Returns:
+            None.
+        """
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    @property
+    def variance(self) -> float:
+        """
+        Population variance of the values seen so far.
+
+        Args:
+            None.
+
+        Returns:
+            float: Variance (0.0 when empty).
+        """
+        return self.m2 / self.count if self.count else 0.0
+
+
+def next_checkpoint(step: int, per_decade: int = CHECKPOINTS_PER_DECADE) -> int:
+    """
+    Return the log-spaced checkpoint following a step.
+
+    Args:
+        step (int): Current checkpoint (0 for none yet).
+        per_decade (int): Number of checkpoints per decade.
+
+    Returns:
+        int: Next checkpoint, strictly after ``step``.
+    """
+    return max(step + 1, math.ceil(step * 10 ** (1.0 / per_decade)))
+
+
+class DiffusionStats(TrajectoryWriter):
+    """
+    Displacement statistics across walkers at log-spaced times.
+
+    The first row received is the reference (time 0); at every checkpoint
+    the displacement of each walker from its reference position feeds
+    running moments of x, y and r², so neither paths nor rows are kept.
+    Usable as a streaming writer or registered with ``World.observe``; in
+    the latter case the world only builds the checkpoint rows.
+
+    Args:
+        per_decade (int): Number of checkpoints per decade of steps.
+    """
+
+    def __init__(self, per_decade: int = CHECKPOINTS_PER_DECADE) -> None:
+        """
+        Create empty statistics.
+
+        Args:
+            per_decade (int): Number of checkpoints per decade of steps.
+
+        Returns:
+            None.
+        """
+        self._per_decade = per_decade
+        self._origin: np.ndarray | None = None
+        self._steps = 0
+        self._next = 1
+        self._moments: dict[int, tuple[RunningMoments, RunningMoments, RunningMoments]] = {}
+
+    @property
+    def steps(self) -> int:
+        """
+        Number of steps received after the reference row.
+
+        Args:
+            None.
+
+        Returns:
+            int: Step count.
+        """
+        return self._steps
+
+    def rows_until_needed(self) -> int:
+        """
+        Number of rows until the next checkpoint row.
+
+        Args:
+            None.
+
+        Returns:
+            int: 1 if the next row is a checkpoint.
+        """
+        return self._next - self._steps
+
+    def skip(self, rows: int) -> None:
+        """
+        Account for rows that were not sent, all before the next checkpoint.
+
+        Args:
+            rows (int): Number of rows skipped.
+
+        Returns:
+            None.
+
+        Raises:
+            ValueError: If the skipped rows include a checkpoint.
+        """
+        if self._steps + rows >= self._next:
+            raise ValueError("Cannot skip a checkpoint row")
+        self._steps += rows
+
+    def write_block(self, points: np.ndarray) -> None:
+        """
+        Consume the next rows of positions, keeping the checkpoint rows.
+
+        Args:
+            points (numpy.ndarray): Positions, shape (rows, walkers, 2).
+
+        Returns:
+            None.
+        """
+        if self._origin is None:
+            if not len(points):
+                return
+            self._origin = points[0].astype(np.float64)
+            points = points[1:]
+        end = self._steps + len(points)
+        # Lignes des points de mesure compris dans ce bloc (la ligne i est au pas steps + i + 1).
+        while self._next <= end:
+            self._record(self._next, points[self._next - self._steps - 1])
+            self._next = next_checkpoint(self._next, self._per_decade)
+        self._steps = end
+
+    def _record(self, step: int, row: np.ndarray) -> None:
+        """
+        Accumulate the displacements of one checkpoint row.
+
+        Args:
+            step (int): Step of the row.
+            row (numpy.ndarray): Positions, shape (walkers, 2).
+
+        Returns:
+            None.
+        """
+        moments = self._moments.get(step)
+        if moments is None:
+            moments = self._moments[step] = (RunningMoments(), RunningMoments(), RunningMoments())
+        displacement = row - self._origin
+        dx = displacement[:, 0]
+        dy = displacement[:, 1]
+        moments[0].add(dx)
+        moments[1].add(dy)
+        moments[2].add(dx * dx + dy * dy)
+
+    def close(self, complete: bool = True) -> None:
+        """
+        Nothing to flush: see ``save``.
+
+        Args:
+            complete (bool): Unused.
+
+        Returns:
+            None.
+        """
+        return None
+
+    def table(self) -> np.ndarray:
+        """
+        Return one row of statistics per checkpoint.
+
+        Args:
+            None.
+
+        Returns:
+            numpy.ndarray: Shape (checkpoints, 8), columns as in ``STATS_COLUMNS``.
+        """
+        rows = []
+        for step in sorted(self._moments):
+            mx, my, mr2 = self._moments[step]
+            rows.append((step, mr2.count, mx.mean, my.mean, mx.variance, my.variance, mr2.mean, mr2.variance))
+        return np.array(rows, dtype=np.float64).reshape(-1, len(STATS_COLUMNS))
+
+    def diffusion_coefficient(self, dims: int = 2) -> float:
+        """
+        Fit MSD(t) = 2 * dims * D * t by least squares through the origin.
+
+        Args:
+            dims (int): Number of space dimensions.
+
+        Returns:
+            float: Diffusion coefficient D (nan without checkpoints).
+        """
+        table = self.table()
+        if not len(table):
+            return math.nan
+        t = table[:, 0]
+        return float((t * table[:, 6]).sum() / (2 * dims * (t * t).sum()))
+
+    def save(self, filename: str) -> None:
+        """
+        Write the statistics as a small text table.
+
+        Args:
+            filename (str): Output path.
+
+        Returns:
+            None.
+        """
+        table = self.table()
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(f"# steps {self._steps} diffusion_coefficient {self.diffusion_coefficient()!r}\n")
+            f.write("# " + " ".join(STATS_COLUMNS) + "\n")
+            for row in table:
+                f.write(f"{int(row[0])} {int(row[1])} " + " ".join(repr(float(v)) for v in row[2:]) + "\n")
+        logger.info("Statistiques de diffusion ecrites dans %s (%s points)", filename, len(table))
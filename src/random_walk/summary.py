@@ -0,0 +1,175 @@
+﻿"""Per-walker summaries kept instead of the path history."""
+
+import logging
+import sys
+
+import numpy as np
+
+from .trajectories import TrajectoryWriter
+
+logger = logging.getLogger(__name__)
+
+
+class PathSummary(TrajectoryWriter):
+    """
+    Running aggregates of every walker: endpoints, bounding box and largest excursion.
+
+    Fed like a streaming writer (or through ``World.observe``), it keeps
+    O(walkers) values whatever the number of steps. The first row received
+    is the start of every walker; ``max_r`` is the largest distance from
+    that start.
+    """
+
+    columns = ("walker", "steps", "start_x", "start_y", "end_x", "end_y", "min_x", "max_x", "min_y", "max_y", "max_r")
+
+    # Bornes et excursion mises a jour a chaque ligne.
+    _extremes = True
+
+    def __init__(self) -> None:
+        """
+        Create an empty summary.
+
+        Args:
+            None.
+
+        Returns:
+            None.
+        """
+        self._steps = 0
+        self._start: np.ndarray | None = None
+        self._end: np.ndarray | None = None
+        self._low: np.ndarray | None = None
+        self._high: np.ndarray | None = None
+        self._max_r2: np.ndarray | None = None
+
+    @property
+    def steps(self) -> int:
+        """
+        Number of steps received after the starting row.
+
+        Args:
+            None.
+
+        Returns:
+            int: Step count.
+        """
+        return self._steps
+
+    def write_block(self, points: np.ndarray) -> None:
+        """
+        Update the aggregates with the next rows of positions.
+
+        Args:
+            points (numpy.ndarray): Positions, shape (rows, walkers, 2).
+
+        Returns:
+            None.
+        """
+        if not len(points):
+            return
+        if self._start is None:
+            self._start = points[0].copy()
+            self._end = self._start
+            self._low = self._start.copy()
+            self._high = self._start.copy()
+            self._max_r2 = np.zeros(len(self._start), dtype=np.result_type(self._start.dtype, np.int64))
+            points = points[1:]
+            if not len(points):
+                return
+        self._steps += len(points)
+        self._end = points[-1].copy()
+        if self._extremes:
+            np.minimum(self._low, points.min(axis=0), out=self._low)
+            np.maximum(self._high, points.max(axis=0), out=self._high)
+            offset = points - self._start
+            np.maximum(self._max_r2, np.square(offset).sum(axis=-1).max(axis=0), out=self._max_r2)
+
+    def close(self, complete: bool = True) -> None:
+        """
+        Nothing to flush: see ``save``.
+
+        Args:
+            complete (bool): Unused.
+
+        Returns:
+            None.
+        """
+        return None
+
+    def table(self) -> np.ndarray:
+        """
+        Return one row per walker, with the columns listed in ``columns``.
+
+        Args:
+            None.
+
+        Returns:
+            numpy.ndarray: Shape (walkers, len(columns)), float64.
+        """
+        if self._start is None:
+            return np.zeros((0, len(self.columns)))
+        nmb_walkers = len(self._start)
+        parts = [np.arange(nmb_walkers), np.full(nmb_walkers, self._steps), self._start[:, 0], self._start[:, 1]]
+        parts += [self._end[:, 0], self._end[:, 1]]
+        if self._extremes:
+            parts += [self._low[:, 0], self._high[:, 0], self._low[:, 1], self._high[:, 1], np.sqrt(self._max_r2)]
+        return np.stack(parts, axis=-1).astype(np.float64)
+
+    def save(self, filename: str) -> None:
+        """
+        Write the per-walker table as text, one walker per line.
+
+        Integer columns (and coordinates on lattices) are written as integers.
+
+        Args:
+            filename (str): Output path.
+
+        Returns:
+            None.
+        """
+        table = self.table()
+        exact = self._start is not None and np.issubdtype(self._start.dtype, np.integer)
+        # Colonnes entieres: indice, pas, et coordonnees sur une grille (sauf max_r).
+        integral = [name in ("walker", "steps") or (exact and name != "max_r") for name in self.columns]
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write("# " + " ".join(self.columns) + "\n")
+            for row in table.tolist():
+                f.write(" ".join(str(int(v)) if whole else repr(v) for v, whole in zip(row, integral)) + "\n")
+        logger.info("Resume de %s marcheurs ecrit dans %s", len(table), filename)
+
+
+class EndpointSummary(PathSummary):
+    """
+    Start and end position of every walker.
+
+    Only the first and last rows matter, so through ``World.observe`` the
+    world runs without building the intermediate rows.
+    """
+
+    columns = ("walker", "steps", "start_x", "start_y", "end_x", "end_y")
+
+    _extremes = False
+
+    def rows_until_needed(self) -> int:
+        """
+        Number of rows until one is needed: none before the end of a run.
+
+        Args:
+            None.
+
+        Returns:
+            int: A number larger than any run.
+        """
+        return sys.maxsize
+
+    def skip(self, rows: int) -> None:
+        """
+        Account for rows that were not sent.
+
+        Args:
+            rows (int): Number of rows skipped.
+
+        Returns:
+            None.
+        """
+        self._steps += rows
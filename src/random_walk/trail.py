@@ -0,0 +1,231 @@
+﻿"""Persistent off-screen layer holding the drawn walker trails."""
+
+import logging
+
+import pygame
+
+from . import profiling
+from .lod import PathPyramid, level_for
+from .viewport import Viewport
+
+logger = logging.getLogger(__name__)
+
+
+class TrailLayer:
+    """
+    Off-screen surface receiving only the new trail segments of each frame.
+
+    The world-to-screen transform only changes when a point leaves the
+    visible area; the view is then refitted with a margin around the
+    visited bounds and the whole layer is redrawn once. When zoomed out,
+    paths are drawn from a ``PathPyramid`` level with about one vertex per
+    pixel, so drawing cost follows screen size rather than path length.
+
+    Args:
+        size (tuple[int, int]): Layer size in pixels.
+        colors (Sequence): One color per walker.
+        width (int): Line width in pixels.
+        max_scale (float): Maximum zoom, in pixels per world unit.
+        margin (float): Extra room added around the bounds on refit, as a fraction of their extent.
+    """
+
+    def __init__(
+        self, size: tuple[int, int], colors, width: int = 2, max_scale: float = 40.0, margin: float = 1.0
+    ) -> None:
+        """
+        Create the layer and the initial view centered on the origin.
+
+        Args:
+            size (tuple[int, int]): Layer size in pixels.
+            colors (Sequence): One color per walker.
+            width (int): Line width in pixels.
+            max_scale (float): Maximum zoom, in pixels per world unit.
+            margin (float): Extra room added around the bounds on refit, as a fraction of their extent.
+
+        Returns:
+            None.
+        """
+        self._surface = pygame.Surface(size)
+        self._colors = colors
+        self._width = width
+        self._viewport = Viewport(size, max_scale=max_scale, margin=margin)
+        self._level = level_for(self._viewport.scale)
+        self._drawn: list[int] = []
+        self._last: list[tuple[float, float]] = []
+        # Pyramide de simplification par marcheur et sommets deja dessines au niveau courant.
+        self._pyramids: list[PathPyramid] = []
+        self._lod_drawn: list[int] = []
+        self.redraws = 0
+        self._refit = False
+
+    @property
+    def scale(self) -> float:
+        """
+        Current zoom of the view.
+
+        Args:
+            None.
+
+        Returns:
+            float: Pixels per world unit.
+        """
+        return self._viewport.scale
+
+    def to_screen(self, x: float, y: float) -> tuple[int, int]:
+        """
+        Convert world coordinates to screen coordinates.
+
+        Args:
+            x (float): World X coordinate.
+            y (float): World Y coordinate.
+
+        Returns:
+            tuple[int, int]: Screen pixel coordinates.
+        """
+        return self._viewport.to_screen(x, y)
+
+    def _new_points(self, index: int, walker) -> list[tuple[float, float]]:
+        """
+        Return the points of a walker not yet drawn.
+
+        Args:
+            index (int): Walker index.
+            walker (Walker): Walker exposing ``chemin`` and ``position``.
+
+        Returns:
+            list[tuple[float, float]]: New points, in visiting order.
+        """
+        path = walker.chemin
+        length = len(path)
+        if length > self._drawn[index]:
+            # Tranche de l'historique: seuls les nouveaux points sont lus.
+            points = path[self._drawn[index] :]
+            self._drawn[index] = length
+            return points
+        # Sans historique, seule la position courante est connue.
+        position = walker.position
+        return [position] if position != self._last[index] else []
+
+    def update(self, walkers) -> bool:
+        """
+        Draw the segments walked since the previous call.
+
+        Args:
+            walkers (Sequence[Walker]): Walkers to draw, in a stable order.
+
+        Returns:
+            bool: True if the view changed and the layer was fully redrawn.
+        """
+        while len(self._drawn) < len(walkers):
+            # Nouveau marcheur: son trajet commence a sa position actuelle si pas d'historique.
+            first = tuple(walkers[len(self._drawn)].chemin[0])
+            self._drawn.append(1)
+            self._last.append(first)
+            self._include([first])
+            self._pyramids.append(PathPyramid())
+            self._pyramids[-1].extend([first])
+            self._lod_drawn.append(1)
+        fresh = [self._new_points(i, walker) for i, walker in enumerate(walkers)]
+        for i, points in enumerate(fresh):
+            if points:
+                self._include(points)
+                self._pyramids[i].extend(points)
+        if self._refit:
+            self._refit = False
+            self._level = level_for(self._viewport.scale)
+            self._redraw(walkers, fresh)
+            return True
+        for i, points in enumerate(fresh):
+            if self._level:
+                # Vue eloignee: seulement les nouveaux sommets du niveau simplifie.
+                points = self._pyramids[i].vertices(self._level, self._lod_drawn[i])
+                self._lod_drawn[i] += len(points)
+            if points:
+                self._draw_path(i, [self._last[i]] + points)
+                self._last[i] = points[-1]
+        return False
+
+    def _include(self, points: list[tuple[float, float]]) -> None:
+        """
+        Extend the view bounds with some points, noting if the view changed.
+
+        Args:
+            points (list[tuple[float, float]]): World points, at least one.
+
+        Returns:
+            None.
+        """
+        profiler = profiling.active
+        start = profiler.start() if profiler is not None else 0.0
+        xs = [x for x, _ in points]
+        ys = [y for _, y in points]
+        if self._viewport.include(min(xs), max(xs), min(ys), max(ys)):
+            self._refit = True
+        if profiler is not None:
+            profiler.stop("view.bounds", start, len(points))
+
+    def _draw_path(self, index: int, points: list[tuple[float, float]]) -> None:
+        """
+        Draw a polyline of world points in the walker color.
+
+        Args:
+            index (int): Walker index, selecting the color.
+            points (list[tuple[float, float]]): World points, at least two.
+
+        Returns:
+            None.
+        """
+        color = self._colors[index % len(self._colors)]
+        profiler = profiling.active
+        if profiler is None:
+            pygame.draw.lines(self._surface, color, False, [self.to_screen(x, y) for x, y in points], self._width)
+            return
+        # Conversion et trace mesures separement.
+        start = profiler.start()
+        screen_points = [self.to_screen(x, y) for x, y in points]
+        start = profiler.stop("view.to_screen", start, len(points))
+        pygame.draw.lines(self._surface, color, False, screen_points, self._width)
+        profiler.stop("draw.lines", start, len(points))
+
+    def _redraw(self, walkers, fresh: list[list[tuple[float, float]]]) -> None:
+        """
+        Clear the layer and draw every known trail with the current view.
+
+        Args:
+            walkers (Sequence[Walker]): Walkers to draw.
+            fresh (list[list[tuple[float, float]]]): Points just read for each walker.
+
+        Returns:
+            None.
+        """
+        self.redraws += 1
+        if profiling.active is not None:
+            profiling.active.count("trail.redraws")
+        logger.debug("Trainees redessinees (echelle %.3f, niveau %s)", self.scale, self._level)
+        self._surface.fill("black")
+        for i, walker in enumerate(walkers):
+            path = walker.chemin
+            if self._level:
+                points = self._pyramids[i].vertices(self._level)
+                self._lod_drawn[i] = len(points)
+            elif len(path) > 1:
+                points = list(path)
+            else:
+                # Sans historique ni simplification, on ne connait que le dernier segment.
+                points = [self._last[i]] + fresh[i]
+            if points:
+                self._last[i] = points[-1]
+            if len(points) >= 2:
+                self._draw_path(i, points)
+
+    def draw(self, target) -> None:
+        """
+        Blit the layer onto a target surface.
+
+        Args:
+            target (pygame.Surface): Surface to draw on.
+
+        Returns:
+            None.
+        """
+        target.blit(self._surface, (0, 0))
@@ -0,0 +1,609 @@
+﻿"""Text and binary trajectory files."""
+
+import logging
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from .history import PathView
+
+# Extensions reconnues comme format binaire en mode "auto".
+BINARY_EXTENSIONS = (".rwb", ".bin")
+
+# En-tete binaire: magic, pattern, seed, seed presente, dtype, marcheurs, pas.
+MAGIC = b"RWTRAJ\x00\x01"
+HEADER = struct.Struct("<8s16sQB1s6xQQ")
+DTYPES = {b"d": np.dtype("<f8"), b"i": np.dtype("<i4")}
+
+# Nombre de points relus a la fois lors de la conversion du spool en texte.
+TEXT_CHUNK_POINTS = 1 << 16
+
+logger = logging.getLogger(__name__)
+
+
+class Trajectories:
+    """
+    Trajectories loaded from a binary file.
+
+    Args:
+        pattern (str): Step model name recorded in the header.
+        seed (int | None): Seed recorded in the header.
+        steps (int): Number of steps of the longest walker.
+        offsets (numpy.ndarray): Start of each walker in ``points`` (length walkers + 1).
+        points (numpy.ndarray): Packed (x, y) points of every walker, shape (n, 2).
+    """
+
+    def __init__(self, pattern: str, seed: int | None, steps: int, offsets: np.ndarray, points: np.ndarray) -> None:
+        """
+        Store the header fields and packed coordinate blocks.
+
+        Args:
+            pattern (str): Step model name recorded in the header.
+            seed (int | None): Seed recorded in the header.
+            steps (int): Number of steps of the longest walker.
+            offsets (numpy.ndarray): Start of each walker in ``points`` (length walkers + 1).
+            points (numpy.ndarray): Packed (x, y) points of every walker, shape (n, 2).
+
+        Returns:
+            None.
+        """
+        self.pattern = pattern
+        self.seed = seed
+        self.steps = steps
+        self.offsets = offsets
+        self.points = points
+
+    def __len__(self) -> int:
+        """
+        Number of walkers in the file.
+
+        Args:
+            None.
+
+        Returns:
+            int: Walker count.
+        """
+        return len(self.offsets) - 1
+
+    def walker(self, index: int) -> np.ndarray:
+        """
+        Return the path of one walker.
+
+        Args:
+            index (int): Walker index.
+
+        Returns:
+            numpy.ndarray: Points of the walker, shape (n, 2) (no copy).
+        """
+        return self.points[self.offsets[index] : self.offsets[index + 1]]
+
+    def __iter__(self):
+        """
+        Iterate over walker paths in file order.
+
+        Args:
+            None.
+
+        Returns:
+            Iterator[numpy.ndarray]: One (n, 2) array per walker.
+        """
+        return (self.walker(i) for i in range(len(self)))
+
+
+def resolve_format(filename: str, fmt: str = "auto") -> str:
+    """
+    Return the output format to use for a file.
+
+    Args:
+        filename (str): Output path.
+        fmt (str): "text", "binary" or "auto" (chosen from the extension).
+
+    Returns:
+        str: "text" or "binary".
+
+    Raises:
+        ValueError: If an unknown format is provided.
+    """
+    if fmt == "auto":
+        return "binary" if os.path.splitext(filename)[1].lower() in BINARY_EXTENSIONS else "text"
+    if fmt not in ("text", "binary"):
+        raise ValueError(f"Unknown format: {fmt}")
+    return fmt
+
+
+def path_array(path, dtype=np.float64) -> np.ndarray:
+    """
+    Copy a walker path into a (n, 2) array.
+
+    Args:
+        path (Sequence[tuple[float, float]]): Path to convert.
+        dtype (numpy.dtype): Output dtype.
+
+    Returns:
+        numpy.ndarray: Points, shape (n, 2).
+    """
+    if isinstance(path, PathView):
+        # Copie directe depuis les colonnes, sans passer par des tuples.
+        xs, ys = path.columns()
+        out = np.empty((len(xs), 2), dtype=dtype)
+        out[:, 0] = xs
+        out[:, 1] = ys
+        return out
+    return np.asarray(list(path), dtype=dtype).reshape(-1, 2)
+
+
+def write_text(filename: str, walkers) -> None:
+    """
+    Write walker paths as text, one block per walker.
+
+    Args:
+        filename (str): Path to the output file.
+        walkers (Sequence): Walkers exposing ``chemin``.
+
+    Returns:
+        None.
+    """
+    # Export texte: un bloc par marcheur, puis les points du trajet (entiers sur les grilles).
+    with open(filename, "w") as f:
+        for i, walker in enumerate(walkers):
+            f.write(f"# Walker {i}\n")
+            for x, y in walker.chemin:
+                f.write(f"{x} {y}\n")
+            f.write("\n")
+
+
+def coordinate_typecode(walkers) -> str:
+    """
+    Choose the coordinate storage type for a set of walkers.
+
+    Args:
+        walkers (Sequence): Walkers exposing a ``typecode`` attribute.
+
+    Returns:
+        str: "i" if every walker stores integer coordinates, "d" otherwise.
+    """
+    if walkers and all(getattr(walker, "typecode", "d") == "i" for walker in walkers):
+        return "i"
+    return "d"
+
+
+def _header(pattern: str, seed: int | None, code: bytes, nmb_walkers: int, steps: int) -> bytes:
+    """
+    Pack the fixed-size binary header.
+
+    Args:
+        pattern (str): Step model name.
+        seed (int | None): Seed of the run.
+        code (bytes): Coordinate dtype code, b"d" or b"i".
+        nmb_walkers (int): Number of walkers.
+        steps (int): Number of steps of the longest walker.
+
+    Returns:
+        bytes: Packed header.
+    """
+    # Graine stockee modulo 2**64 (equivalente pour walker_seed).
+    stored_seed = 0 if seed is None else seed % (1 << 64)
+    return HEADER.pack(MAGIC, pattern.encode()[:16], stored_seed, seed is not None, code, nmb_walkers, steps)
+
+
+def write_binary(filename: str, walkers, pattern: str = "", seed: int | None = None) -> None:
+    """
+    Write walker paths in the packed binary format.
+
+    Layout: fixed header, ``walkers + 1`` uint64 offsets (in points), then
+    every walker's (x, y) points packed one after the other.
+
+    Args:
+        filename (str): Path to the output file.
+        walkers (Sequence): Walkers exposing ``chemin``.
+        pattern (str): Step model name stored in the header.
+        seed (int | None): Seed stored in the header.
+
+    Returns:
+        None.
+    """
+    code = coordinate_typecode(walkers).encode()
+    lengths = [len(walker.chemin) for walker in walkers]
+    offsets = np.zeros(len(lengths) + 1, dtype="<u8")
+    np.cumsum(lengths, out=offsets[1:])
+    steps = max(lengths, default=1) - 1
+    with open(filename, "wb") as f:
+        f.write(_header(pattern, seed, code, len(lengths), steps))
+        f.write(offsets.tobytes())
+        for walker in walkers:
+            f.write(path_array(walker.chemin, DTYPES[code]).tobytes())
+
+
+def _read_header(f, filename: str) -> tuple[str, int | None, np.dtype, int, int, np.ndarray]:
+    """
+    Read and validate the header and offsets of a binary file.
+
+    Args:
+        f (BinaryIO): File positioned at its start.
+        filename (str): File name used in error messages.
+
+    Returns:
+        tuple[str, int | None, numpy.dtype, int, int, numpy.ndarray]:
+            Pattern, seed, coordinate dtype, walker count, steps and offsets.
+
+    Raises:
+        ValueError: If the file is not a trajectory file.
+    """
+    raw = f.read(HEADER.size)
+    if len(raw) < HEADER.size or raw[: len(MAGIC)] != MAGIC:
+        raise ValueError(f"Not a random walk trajectory file: {filename}")
+    _, pattern, seed, has_seed, code, nmb_walkers, steps = HEADER.unpack(raw)
+    dtype = DTYPES.get(code)
+    if dtype is None:
+        raise ValueError(f"Unknown dtype in {filename}: {code!r}")
+    offsets = np.fromfile(f, dtype="<u8", count=nmb_walkers + 1).astype(np.int64)
+    return pattern.rstrip(b"\x00").decode(), seed if has_seed else None, dtype, nmb_walkers, steps, offsets
+
+
+def load_trajectories(filename: str) -> Trajectories:
+    """
+    Read a binary trajectory file in bulk.
+
+    Args:
+        filename (str): Path to the binary file.
+
+    Returns:
+        Trajectories: Header fields and packed points.
+
+    Raises:
+        ValueError: If the file is not a trajectory file.
+    """
+    with open(filename, "rb") as f:
+        pattern, seed, dtype, _, steps, offsets = _read_header(f, filename)
+        # Lecture en bloc: tous les points d'un coup, sans analyse ligne a ligne.
+        points = np.fromfile(f, dtype=dtype, count=2 * int(offsets[-1])).reshape(-1, 2)
+    return Trajectories(pattern, seed, steps, offsets, points)
+
+
+class TrajectoryWriter:
+    """
+    Interface of the streaming outputs fed by ``World.simulate``.
+
+    Writers receive the positions of all walkers one block of steps at a
+    time and are used as context managers.
+    """
+
+    def write_block(self, points: np.ndarray) -> None:
+        """
+        Write the next rows of positions.
+
+        Args:
+            points (numpy.ndarray): Positions, shape (rows, walkers, 2).
+
+        Returns:
+            None.
+
+        Raises:
+            NotImplementedError: Always, must be implemented by subclasses.
+        """
+        raise NotImplementedError
+
+    def close(self, complete: bool = True) -> None:
+        """
+        Close the writer.
+
+        Args:
+            complete (bool): Check and finalize the output (False when aborting).
+
+        Returns:
+            None.
+
+        Raises:
+            NotImplementedError: Always, must be implemented by subclasses.
+        """
+        raise NotImplementedError
+
+    def __enter__(self) -> "TrajectoryWriter":
+        """
+        Enter the context manager.
+
+        Args:
+            None.
+
+        Returns:
+            TrajectoryWriter: The writer itself.
+        """
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        """
+        Close the writer, skipping finalization on error.
+
+        Args:
+            exc_type (type | None): Exception type, if any.
+            exc (BaseException | None): Exception instance, if any.
+            tb (TracebackType | None): Traceback, if any.
+
+        Returns:
+            None.
+        """
+        self.close(complete=exc_type is None)
+
+
+class TrajectoryStore(TrajectoryWriter):
+    """
+    Fixed-stride binary trajectory file accessed through ``mmap``.
+
+    The file uses the binary format with every walker holding ``steps + 1``
+    points, so its data is a (walkers, steps + 1, 2) array that can be read
+    and written in place without loading the rest.
+
+    Args:
+        filename (str): Path to an existing store.
+        mode (str): "r" for read-only access, "r+" to write into it.
+    """
+
+    def __init__(self, filename: str, mode: str = "r") -> None:
+        """
+        Map an existing store.
+
+        Args:
+            filename (str): Path to an existing store.
+            mode (str): "r" for read-only access, "r+" to write into it.
+
+        Returns:
+            None.
+
+        Raises:
+            ValueError: If the file is not a fixed-stride trajectory file.
+        """
+        with open(filename, "rb") as f:
+            self.pattern, self.seed, dtype, nmb_walkers, self.steps, offsets = _read_header(f, filename)
+            base = f.tell()
+        rows = self.steps + 1
+        if not np.array_equal(offsets, np.arange(nmb_walkers + 1) * rows):
+            raise ValueError(f"Not a fixed-stride trajectory store: {filename}")
+        self.filename = filename
+        self._written: int | None = None
+        if nmb_walkers == 0:
+            self._array = np.empty((0, rows, 2), dtype=dtype)
+        else:
+            self._array = np.memmap(filename, dtype=dtype, mode=mode, offset=base, shape=(nmb_walkers, rows, 2))
+
+    @classmethod
+    def create(
+        cls,
+        filename: str,
+        nmb_walkers: int,
+        nmb_steps: int,
+        pattern: str = "",
+        seed: int | None = None,
+        typecode: str = "d",
+    ) -> "TrajectoryStore":
+        """
+        Create a store sized for a run and map it for writing.
+
+        Args:
+            filename (str): Path to the output file.
+            nmb_walkers (int): Number of walkers.
+            nmb_steps (int): Number of steps that will be written.
+            pattern (str): Step model name stored in the header.
+            seed (int | None): Seed stored in the header.
+            typecode (str): "i" for int32 coordinates, "d" for doubles.
+
+        Returns:
+            TrajectoryStore: Writable store expecting ``nmb_steps + 1`` rows.
+        """
+        code = typecode.encode()
+        rows = nmb_steps + 1
+        # Tous les marcheurs ont la meme longueur: offsets reguliers.
+        offsets = np.arange(nmb_walkers + 1, dtype="<u8") * rows
+        with open(filename, "wb") as f:
+            f.write(_header(pattern, seed, code, nmb_walkers, nmb_steps))
+            f.write(offsets.tobytes())
+            f.truncate(f.tell() + nmb_walkers * rows * 2 * DTYPES[code].itemsize)
+        store = cls(filename, mode="r+")
+        store._written = 0
+        return store
+
+    def __len__(self) -> int:
+        """
+        Number of walkers in the store.
+
+        Args:
+            None.
+
+        Returns:
+            int: Walker count.
+        """
+        return self._array.shape[0]
+
+    @property
+    def array(self) -> np.ndarray:
+        """
+        Whole mapped data.
+
+        Args:
+            None.
+
+        Returns:
+            numpy.ndarray: Points, shape (walkers, steps + 1, 2) (no copy).
+        """
+        return self._array
+
+    def walker(self, index: int) -> np.ndarray:
+        """
+        Return the path of one walker.
+
+        Args:
+            index (int): Walker index.
+
+        Returns:
+            numpy.ndarray: Points of the walker, shape (steps + 1, 2) (no copy).
+        """
+        return self._array[index]
+
+    def window(self, start: int, stop: int) -> np.ndarray:
+        """
+        Return the positions of every walker over a step range.
+
+        Args:
+            start (int): First step (included).
+            stop (int): Last step (excluded).
+
+        Returns:
+            numpy.ndarray: Points, shape (walkers, stop - start, 2) (no copy).
+        """
+        return self._array[:, start:stop]
+
+    def write_block(self, points: np.ndarray) -> None:
+        """
+        Write the next rows of positions in place.
+
+        Args:
+            points (numpy.ndarray): Positions, shape (rows, walkers, 2).
+
+        Returns:
+            None.
+
+        Raises:
+            ValueError: If the store is read-only or the block does not fit.
+        """
+        if self._written is None:
+            raise ValueError(f"Trajectory store {self.filename} was not opened for writing")
+        rows = points.shape[0]
+        if points.shape[1:] != (len(self), 2) or self._written + rows > self.steps + 1:
+            raise ValueError(f"Block of shape {points.shape} does not fit the trajectory layout")
+        self._array[:, self._written : self._written + rows] = points.transpose(1, 0, 2)
+        self._written += rows
+
+    def close(self, complete: bool = True) -> None:
+        """
+        Flush written data to disk.
+
+        Args:
+            complete (bool): Check that every row was written (False when aborting).
+
+        Returns:
+            None.
+
+        Raises:
+            ValueError: If fewer rows than announced were written.
+        """
+        if isinstance(self._array, np.memmap):
+            self._array.flush()
+        if complete and self._written is not None and self._written != self.steps + 1:
+            raise ValueError(f"Incomplete trajectory: {self._written}/{self.steps + 1} rows written")
+
+
+class TextTrajectoryWriter(TrajectoryWriter):
+    """
+    Streaming writer producing the text format.
+
+    Blocks are spooled to a temporary store next to the output, then
+    converted walker by walker on close, with the same lines as ``write_text``.
+
+    Args:
+        filename (str): Path to the output file.
+        nmb_walkers (int): Number of walkers.
+        nmb_steps (int): Number of steps that will be written.
+        typecode (str): "i" to write integer coordinates, "d" for doubles.
+    """
+
+    def __init__(self, filename: str, nmb_walkers: int, nmb_steps: int, typecode: str = "d") -> None:
+        """
+        Create the temporary spool store.
+
+        Args:
+            filename (str): Path to the output file.
+            nmb_walkers (int): Number of walkers.
+            nmb_steps (int): Number of steps that will be written.
+            typecode (str): "i" to write integer coordinates, "d" for doubles.
+
+        Returns:
+            None.
+        """
+        self._filename = filename
+        fd, self._spool_name = tempfile.mkstemp(suffix=".rwb", dir=os.path.dirname(os.path.abspath(filename)))
+        os.close(fd)
+        self._spool = TrajectoryStore.create(self._spool_name, nmb_walkers, nmb_steps, typecode=typecode)
+
+    def write_block(self, points: np.ndarray) -> None:
+        """
+        Spool the next rows of positions.
+
+        Args:
+            points (numpy.ndarray): Positions, shape (rows, walkers, 2).
+
+        Returns:
+            None.
+        """
+        self._spool.write_block(points)
+
+    def close(self, complete: bool = True) -> None:
+        """
+        Convert the spool to text, one walker block at a time, then delete it.
+
+        Args:
+            complete (bool): Check and convert the output (False when aborting).
+
+        Returns:
+            None.
+
+        Raises:
+            ValueError: If fewer rows than announced were written.
+        """
+        try:
+            self._spool.close(complete)
+            if complete:
+                self._convert()
+        finally:
+            self._spool = None
+            os.remove(self._spool_name)
+
+    def _convert(self) -> None:
+        """
+        Write the text output from the spool in fixed-size chunks.
+
+        Args:
+            None.
+
+        Returns:
+            None.
+        """
+        rows = self._spool.steps + 1
+        with open(self._filename, "w") as out:
+            for i in range(len(self._spool)):
+                out.write(f"# Walker {i}\n")
+                path = self._spool.walker(i)
+                for t0 in range(0, rows, TEXT_CHUNK_POINTS):
+                    pts = path[t0 : t0 + TEXT_CHUNK_POINTS].tolist()
+                    out.writelines(f"{x} {y}\n" for x, y in pts)
+                out.write("\n")
+        logger.debug("Spool converti en texte: %s", self._filename)
+
+
+def open_writer(
+    filename: str,
+    nmb_walkers: int,
+    nmb_steps: int,
+    fmt: str = "auto",
+    pattern: str = "",
+    seed: int | None = None,
+    typecode: str = "d",
+) -> TrajectoryWriter:
+    """
+    Create a streaming writer for the requested format.
+
+    Args:
+        filename (str): Path to the output file.
+        nmb_walkers (int): Number of walkers.
+        nmb_steps (int): Number of steps that will be written.
+        fmt (str): "text", "binary" or "auto" (chosen from the extension).
+        pattern (str): Step model name stored in binary headers.
+        seed (int | None): Seed stored in binary headers.
+        typecode (str): Coordinate storage type, "i" for lattices ("d" otherwise).
+
+    Returns:
+        TrajectoryWriter: Writer expecting ``nmb_steps + 1`` rows.
+    """
+    if resolve_format(filename, fmt) == "binary":
+        return TrajectoryStore.create(filename, nmb_walkers, nmb_steps, pattern=pattern, seed=seed, typecode=typecode)
+    return TextTrajectoryWriter(filename, nmb_walkers, nmb_steps, typecode=typecode)
@@ -0,0 +1,130 @@
+﻿"""Auto-fitting world-to-screen transform shared by the renderers."""
+
+import numpy as np
+
+
+class Viewport:
+    """
+    World-to-screen transform refitted only when points leave the view.
+
+    On refit, the visited bounds are enlarged by ``margin`` times their
+    extent, so refits happen a logarithmic number of times as walkers
+    spread out.
+
+    Args:
+        size (tuple[int, int]): Screen size in pixels.
+        max_scale (float): Maximum zoom, in pixels per world unit.
+        margin (float): Extra room added around the bounds on refit, as a fraction of their extent.
+    """
+
+    def __init__(self, size: tuple[int, int], max_scale: float = 40.0, margin: float = 1.0) -> None:
+        """
+        Create a view centered on the origin.
+
+        Args:
+            size (tuple[int, int]): Screen size in pixels.
+            max_scale (float): Maximum zoom, in pixels per world unit.
+            margin (float): Extra room added around the bounds on refit, as a fraction of their extent.
+
+        Returns:
+            None.
+        """
+        self.size = size
+        self._max_scale = max_scale
+        self._margin = margin
+        # Bornes de tout ce qui a ete vu, et vue courante (centre + echelle).
+        self._bounds = [0.0, 0.0, 0.0, 0.0]
+        self.fit()
+
+    @property
+    def scale(self) -> float:
+        """
+        Current zoom of the view.
+
+        Args:
+            None.
+
+        Returns:
+            float: Pixels per world unit.
+        """
+        return self._scale
+
+    def fit(self) -> None:
+        """
+        Choose the scale and center so the visited bounds fit with a margin.
+
+        Args:
+            None.
+
+        Returns:
+            None.
+        """
+        min_x, max_x, min_y, max_y = self._bounds
+        screen_w, screen_h = self.size
+        # Marge autour des bornes: la vue ne bouge plus tant que les marcheurs y restent.
+        grow = 1.0 + self._margin
+        world_w = max((max_x - min_x) * grow, 1e-6)
+        world_h = max((max_y - min_y) * grow, 1e-6)
+        self._scale = min(screen_w * 0.9 / world_w, screen_h * 0.9 / world_h, self._max_scale)
+        self._center = ((min_x + max_x) / 2, (min_y + max_y) / 2)
+        # Zone visible (90% de l'ecran) en coordonnees monde.
+        half_w = screen_w * 0.45 / self._scale
+        half_h = screen_h * 0.45 / self._scale
+        cx, cy = self._center
+        self._view = (cx - half_w, cx + half_w, cy - half_h, cy + half_h)
+
+    def include(self, min_x: float, max_x: float, min_y: float, max_y: float) -> bool:
+        """
+        Extend the visited bounds, refitting the view if they leave it.
+
+        Args:
+            min_x (float): Smallest new X.
+            max_x (float): Largest new X.
+            min_y (float): Smallest new Y.
+            max_y (float): Largest new Y.
+
+        Returns:
+            bool: True if the view changed.
+        """
+        bounds = self._bounds
+        bounds[0] = min(bounds[0], min_x)
+        bounds[1] = max(bounds[1], max_x)
+        bounds[2] = min(bounds[2], min_y)
+        bounds[3] = max(bounds[3], max_y)
+        view = self._view
+        if bounds[0] < view[0] or bounds[1] > view[1] or bounds[2] < view[2] or bounds[3] > view[3]:
+            self.fit()
+            return True
+        return False
+
+    def to_screen(self, x: float, y: float) -> tuple[int, int]:
+        """
+        Convert world coordinates to screen coordinates.
+
+        Args:
+            x (float): World X coordinate.
+            y (float): World Y coordinate.
+
+        Returns:
+            tuple[int, int]: Screen pixel coordinates.
+        """
+        cx, cy = self._center
+        screen_w, screen_h = self.size
+        return int(screen_w / 2 + (x - cx) * self._scale), int(screen_h / 2 - (y - cy) * self._scale)
+
+    def to_pixels(self, xs: np.ndarray, ys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Convert arrays of world coordinates to pixel indices.
+
+        Args:
+            xs (numpy.ndarray): World X coordinates.
+            ys (numpy.ndarray): World Y coordinates.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: Pixel columns and rows (int64, may be off screen).
+        """
+        cx, cy = self._center
+        screen_w, screen_h = self.size
+        px = np.floor(screen_w / 2 + (xs - cx) * self._scale).astype(np.int64)
+        py = np.floor(screen_h / 2 - (ys - cy) * self._scale).astype(np.int64)
+        return px, py
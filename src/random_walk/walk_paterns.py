@@ -2,11 +2,23 @@
 
 import math
 import random
+from array import array
+from collections.abc import Sequence
+from operator import mul
+
+import numpy as np
+
+# Constantes de splitmix64 pour deriver des graines independantes.
+_MASK64 = (1 << 64) - 1
+_GOLDEN_GAMMA = 0x9E3779B97F4A7C15
 
 
 def seed(seed: int | None = None) -> None:
     """
-    Seed the global random generator used by step models.
+    Seed the global random generator.
+
+    It drives walkers created without their own seed and is used to draw a
+    world seed when none is given.
 
     Args:
         seed (int | None): Seed value for the RNG.
@@ -17,83 +29,417 @@ def seed(seed: int | None = None) -> None:
     random.seed(seed)
 
 
+def walker_seed(master_seed: int, index: int) -> int:
+    """
+    Derive the seed of one walker from a master seed.
+
+    Uses the ``index``-th output of a splitmix64 sequence started at
+    ``master_seed``, so nearby indices give unrelated seeds.
+
+    Args:
+        master_seed (int): Seed of the whole run.
+        index (int): Walker index.
+
+    Returns:
+        int: 64-bit seed for the walker.
+    """
+    z = (master_seed + (index + 1) * _GOLDEN_GAMMA) & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+
+def walker_seeds(master_seed: int, first_index: int, count: int) -> np.ndarray:
+    """
+    Vectorized ``walker_seed`` for a range of walker indices.
+
+    Args:
+        master_seed (int): Seed of the whole run.
+        first_index (int): Index of the first walker.
+        count (int): Number of walkers.
+
+    Returns:
+        numpy.ndarray: uint64 seeds, equal to ``walker_seed`` element by element.
+    """
+    index = np.arange(first_index + 1, first_index + count + 1, dtype=np.uint64)
+    return _splitmix_mix(np.uint64(master_seed & _MASK64) + index * np.uint64(_GOLDEN_GAMMA))
+
+
+def _splitmix_mix(z: np.ndarray) -> np.ndarray:
+    """
+    Apply the splitmix64 output function to an array (wrapping uint64 arithmetic).
+
+    Args:
+        z (numpy.ndarray): uint64 input array.
+
+    Returns:
+        numpy.ndarray: Mixed uint64 array.
+    """
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+class WalkerStreams:
+    """
+    Counter-based generator giving each column of a block its own stream.
+
+    The value drawn for walker ``i`` at step ``t`` is a splitmix64 hash of
+    the walker seed and ``t``, so a walker gets the same steps whatever the
+    other walkers, their number or the block size. It offers the subset of
+    ``numpy.random.Generator`` used by ``StepModel.sample_block``.
+
+    Args:
+        seeds (numpy.ndarray): uint64 seed of each walker (one per column).
+    """
+
+    # Nombre maximal de tirages par pas et par marcheur dans un bloc.
+    SLOTS = 16
+
+    def __init__(self, seeds: np.ndarray) -> None:
+        """
+        Create the streams positioned at step 0.
+
+        Args:
+            seeds (numpy.ndarray): uint64 seed of each walker (one per column).
+
+        Returns:
+            None.
+        """
+        self._seeds = seeds.astype(np.uint64)
+        self._step = 0
+        self._slot = 0
+
+    def begin(self, step: int) -> None:
+        """
+        Position the streams at the first step of the next block.
+
+        Args:
+            step (int): Index of the first step of the block.
+
+        Returns:
+            None.
+        """
+        self._step = step
+        self._slot = 0
+
+    def subset(self, columns: np.ndarray) -> "WalkerStreams":
+        """
+        Return the streams of some walkers, positioned at the same step.
+
+        Since every draw only depends on the walker seed and the step, the
+        selected walkers get the same values as in the full block.
+
+        Args:
+            columns (numpy.ndarray): Indices of the walkers to keep.
+
+        Returns:
+            WalkerStreams: Streams of the selected walkers.
+        """
+        streams = WalkerStreams(self._seeds[columns])
+        streams.begin(self._step)
+        return streams
+
+    def _bits(self, shape: tuple[int, int]) -> np.ndarray:
+        """
+        Draw 64 random bits per (step, walker) cell.
+
+        Args:
+            shape (tuple[int, int]): Block shape (steps, walkers).
+
+        Returns:
+            numpy.ndarray: uint64 array of the given shape.
+        """
+        rows = shape[0]
+        # Compteur = (pas, numero de tirage dans le pas): independant du decoupage en blocs.
+        steps = np.arange(self._step, self._step + rows, dtype=np.uint64)
+        counters = steps * np.uint64(self.SLOTS) + np.uint64(self._slot + 1)
+        self._slot += 1
+        return _splitmix_mix(self._seeds[np.newaxis, :] + counters[:, np.newaxis] * np.uint64(_GOLDEN_GAMMA))
+
+    def random(self, size: tuple[int, int]) -> np.ndarray:
+        """
+        Draw floats uniformly in [0, 1).
+
+        Args:
+            size (tuple[int, int]): Block shape (steps, walkers).
+
+        Returns:
+            numpy.ndarray: float64 array.
+        """
+        return (self._bits(size) >> np.uint64(11)) * (1.0 / (1 << 53))
+
+    def uniform(self, low: float, high: float, size: tuple[int, int]) -> np.ndarray:
+        """
+        Draw floats uniformly in [low, high).
+
+        Args:
+            low (float): Lower bound.
+            high (float): Upper bound.
+            size (tuple[int, int]): Block shape (steps, walkers).
+
+        Returns:
+            numpy.ndarray: float64 array.
+        """
+        return low + (high - low) * self.random(size)
+
+    def integers(self, low: int, high: int, size: tuple[int, int], dtype=np.int64) -> np.ndarray:
+        """
+        Draw integers uniformly in [low, high).
+
+        Args:
+            low (int): Lower bound.
+            high (int): Upper bound (excluded).
+            size (tuple[int, int]): Block shape (steps, walkers).
+            dtype (numpy.dtype): Output dtype.
+
+        Returns:
+            numpy.ndarray: Integer array (modulo bias below 2**-59 for small ranges).
+        """
+        values = self._bits(size) % np.uint64(high - low)
+        return (values + low).astype(dtype)
+
+
+def implements(model, method: str) -> bool:
+    """
+    Tell whether a step model provides its own version of a method.
+
+    Args:
+        model (object): Step model instance (a StepModel or any duck-typed model).
+        method (str): Method name, e.g. "sample_delta" or "sample_block".
+
+    Returns:
+        bool: True if the method exists and is not the StepModel stub.
+    """
+    impl = getattr(type(model), method, None)
+    return impl is not None and impl is not getattr(StepModel, method, None)
+
+
 class StepModel:
     """
     Interface for step models.
 
     Methods:
-        next_step: Return the next step delta.
+        sample_delta: Return the next step delta drawn from a given RNG.
+        next_step: Return the next step delta drawn from the global RNG.
+        sample_deltas: Return n step deltas drawn from a given RNG.
+        next_steps: Return n step deltas drawn from the global RNG.
+        sample_block: Return a block of deltas as arrays (optional).
+        interact: Apply interaction rules between walkers after each step (optional).
+
+    Attributes:
+        interaction_range (float | None): Cell size of the spatial index used by ``interact``.
     """
 
+    interaction_range: float | None = None
+
+    def sample_delta(self, rng) -> tuple[float, float]:
+        """
+        Sample a (dx, dy) step using the provided RNG.
+
+        Args:
+            rng (random.Random): Random number generator to sample from.
+
+        Returns:
+            tuple[float, float]: Delta step.
+
+        Raises:
+            NotImplementedError: Always, must be implemented by subclasses.
+        """
+        raise NotImplementedError
+
     def next_step(self) -> tuple[float, float]:
         """
-        Return the next (dx, dy) step.
+        Return the next (dx, dy) step from the global RNG.
 
         Args:
             None.
 
         Returns:
             tuple[float, float]: Delta step.
+        """
+        return self.sample_delta(random)
+
+    def sample_deltas(self, rng, n: int) -> tuple[list[float], list[float]]:
+        """
+        Sample ``n`` steps at once using the provided RNG.
+
+        The default draws them one by one with ``sample_delta``.
+
+        Args:
+            rng (random.Random): Random number generator to sample from.
+            n (int): Number of steps.
+
+        Returns:
+            tuple[list[float], list[float]]: The n dx values and the n dy values.
+        """
+        deltas = [self.sample_delta(rng) for _ in range(n)]
+        return [dx for dx, _ in deltas], [dy for _, dy in deltas]
+
+    def next_steps(self, n: int) -> tuple[list[float], list[float]]:
+        """
+        Return ``n`` steps at once from the global RNG.
+
+        Args:
+            n (int): Number of steps.
+
+        Returns:
+            tuple[list[float], list[float]]: The n dx values and the n dy values.
+        """
+        return self.sample_deltas(random, n)
+
+    def sample_block(self, rng: np.random.Generator, shape: tuple[int, int]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Sample a whole block of steps for the vectorized engine.
+
+        Args:
+            rng (numpy.random.Generator): Generator to sample from.
+            shape (tuple[int, int]): Block shape (steps, walkers).
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: Arrays of dx and dy with the given shape.
 
         Raises:
-            NotImplementedError: Always, must be implemented by subclasses.
+            NotImplementedError: If the model has no vectorized sampler.
         """
         raise NotImplementedError
 
+    def interact(self, world, index) -> None:
+        """
+        Apply interaction rules after each step of a world.
+
+        Called by ``World.step`` with the spatial index of the current
+        positions when a model overrides it; the default does nothing.
+
+        Args:
+            world (World): World being stepped.
+            index (CellList): Spatial index of the current positions.
 
-class Grid4(StepModel):
+        Returns:
+            None.
+        """
+        return None
+
+
+class LatticeModel(StepModel):
     """
-    Random step on a 4-neighbor grid.
+    Base class for steps drawn uniformly from a fixed set of grid directions.
 
-    Returns steps to N, S, E, or W.
+    Attributes:
+        DIRECTIONS (tuple[tuple[int, int], ...]): Allowed integer deltas.
     """
 
-    def next_step(self) -> tuple[float, float]:
+    DIRECTIONS: tuple[tuple[int, int], ...] = ()
+
+    def sample_delta(self, rng) -> tuple[int, int]:
         """
-        Return a step to N, S, E, or W.
+        Return a step drawn uniformly among the grid directions.
 
         Args:
-            None.
+            rng (random.Random): Random number generator to sample from.
 
         Returns:
-            tuple[float, float]: Delta step.
+            tuple[int, int]: Delta step.
         """
-        # Tirage uniforme parmi les 4 directions cardinales.
-        dx, dy = random.choice([(1.0, 0.0), (-1.0, 0.0), (0.0, 1.0), (0.0, -1.0)])
+        dx, dy = rng.choice(self.DIRECTIONS)
         return (dx, dy)
 
+    @classmethod
+    def _byte_tables(cls) -> tuple[bytes, bytes] | None:
+        """
+        Build (once per class) the tables decoding random bytes into steps.
 
-class Grid8(StepModel):
-    """
-    Random step on a 8-neighbor grid (including diagonals).
+        Byte ``b`` encodes the direction ``b % len(DIRECTIONS)``, which is
+        uniform when the number of directions divides 256.
 
-    Returns steps to N, S, E, W, NE, NW, SE, or SW.
-    """
+        Args:
+            None.
 
-    def next_step(self) -> tuple[float, float]:
+        Returns:
+            tuple[bytes, bytes] | None: ``bytes.translate`` tables giving the
+                signed dx and dy of each byte, or None if the directions do not
+                fit this encoding.
         """
-        Return a step to the 8 grid neighbors.
+        if "_tables" in cls.__dict__:
+            return cls._tables
+        nmb = len(cls.DIRECTIONS)
+        tables = None
+        small = all(-128 <= d <= 127 for step in cls.DIRECTIONS for d in step)
+        if nmb and 256 % nmb == 0 and small:
+            table_x = bytes(cls.DIRECTIONS[b % nmb][0] & 0xFF for b in range(256))
+            table_y = bytes(cls.DIRECTIONS[b % nmb][1] & 0xFF for b in range(256))
+            tables = (table_x, table_y)
+        cls._tables = tables
+        return tables
+
+    def sample_deltas(self, rng, n: int) -> tuple[Sequence[int], Sequence[int]]:
+        """
+        Sample ``n`` grid steps from a single block of random bytes.
+
+        The bytes come from one ``getrandbits`` call (through ``randbytes``)
+        and are decoded with ``bytes.translate``, so no Python code runs per step.
 
         Args:
-            None.
+            rng (random.Random): Random number generator to sample from.
+            n (int): Number of steps.
 
         Returns:
-            tuple[float, float]: Delta step.
+            tuple[Sequence[int], Sequence[int]]: The n dx values and the n dy values.
         """
-        # Tirage uniforme parmi les 8 directions (incluant diagonales).
-        dx, dy = random.choice(
-            [
-                (1.0, 0.0),
-                (-1.0, 0.0),
-                (0.0, 1.0),
-                (0.0, -1.0),
-                (1.0, 1.0),
-                (1.0, -1.0),
-                (-1.0, 1.0),
-                (-1.0, -1.0),
-            ]
-        )
-        return (dx, dy)
+        tables = self._byte_tables()
+        if tables is None:
+            return super().sample_deltas(rng, n)
+        table_x, table_y = tables
+        raw = rng.randbytes(n)
+        # Octets signes: array('b') relit directement -1, 0 et 1.
+        return array("b", raw.translate(table_x)), array("b", raw.translate(table_y))
+
+    def sample_block(self, rng: np.random.Generator, shape: tuple[int, int]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Sample a block of grid steps at once.
+
+        Args:
+            rng (numpy.random.Generator): Generator to sample from.
+            shape (tuple[int, int]): Block shape (steps, walkers).
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: int16 arrays of dx and dy.
+        """
+        # Un indice de direction par pas, puis lecture dans la table (deltas int16).
+        table = np.asarray(self.DIRECTIONS, dtype=np.int16)
+        idx = rng.integers(0, len(table), size=shape, dtype=np.uint8)
+        return table[idx, 0], table[idx, 1]
+
+
+class Grid4(LatticeModel):
+    """
+    Random step on a 4-neighbor grid.
+
+    Returns steps to N, S, E, or W.
+    """
+
+    # Les 4 directions cardinales.
+    DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+class Grid8(LatticeModel):
+    """
+    Random step on a 8-neighbor grid (including diagonals).
+
+    Returns steps to N, S, E, W, NE, NW, SE, or SW.
+    """
+
+    # Les 8 directions (incluant diagonales).
+    DIRECTIONS = (
+        (1, 0),
+        (-1, 0),
+        (0, 1),
+        (0, -1),
+        (1, 1),
+        (1, -1),
+        (-1, 1),
+        (-1, -1),
+    )
 
 
 class Continuous(StepModel):
@@ -137,14 +483,35 @@ class Continuous(StepModel):
         dy = r * math.sin(theta)
         return dx, dy
 
-    def next_step(self) -> tuple[float, float]:
+    def sample_deltas(self, rng, n: int) -> tuple[list[float], list[float]]:
         """
-        Return a step sampled from the global RNG.
+        Sample ``n`` steps uniformly in the disk, drawing like ``sample_delta``.
 
         Args:
-            None.
+            rng (random.Random): Random number generator to sample from.
+            n (int): Number of steps.
 
         Returns:
-            tuple[float, float]: Delta step.
+            tuple[list[float], list[float]]: The n dx values and the n dy values.
         """
-        return self.sample_delta(random)
+        # Memes tirages que n appels a sample_delta (u puis theta), calcules par map.
+        draws = [rng.random() for _ in range(2 * n)]
+        thetas = [2 * math.pi * v for v in draws[1::2]]
+        radii = [self.radius * math.sqrt(u) for u in draws[0::2]]
+        return list(map(mul, radii, map(math.cos, thetas))), list(map(mul, radii, map(math.sin, thetas)))
+
+    def sample_block(self, rng: np.random.Generator, shape: tuple[int, int]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Sample a block of steps uniformly in the disk.
+
+        Args:
+            rng (numpy.random.Generator): Generator to sample from.
+            shape (tuple[int, int]): Block shape (steps, walkers).
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: Arrays of dx and dy.
+        """
+        # Meme loi que sample_delta, vectorisee sur tout le bloc.
+        r = self.radius * np.sqrt(rng.random(shape))
+        theta = rng.uniform(0.0, 2 * math.pi, shape)
+        return r * np.cos(theta), r * np.sin(theta)
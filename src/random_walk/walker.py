@@ -1,5 +1,21 @@
 ﻿"""Walker state and stepping logic."""
 
+import random
+from itertools import accumulate, chain
+
+import numpy as np
+
+from . import profiling
+from .history import PathBuffer, PathView
+from .passage import block_steps
+from .walk_paterns import LatticeModel, StepModel, implements
+
+# Nombre de pas tires d'un coup dans le flux du marcheur.
+STEP_BLOCK = 4096
+
+# Plus grand bloc de pas d'une recherche de premier passage.
+PASSAGE_BLOCK_LIMIT = 1 << 16
+
 
 class Walker:
     """
@@ -7,28 +23,47 @@ class Walker:
 
     Args:
         step_model (type): Callable returning a step model instance.
+        record (bool): Keep the full path history (only the position otherwise).
+        seed (int | None): Seed of the walker's own generator (global RNG if None).
+
+    Attributes:
+        typecode (str): Storage typecode of the coordinates, "i" on lattices, "d" otherwise.
     """
 
-    def __init__(self, step_model) -> None:
+    def __init__(self, step_model, record: bool = True, seed: int | None = None) -> None:
         """
         Initialize a walker at the origin using the step model factory.
 
         Args:
             step_model (type): Callable returning a step model instance.
+            record (bool): Keep the full path history (only the position otherwise).
+            seed (int | None): Seed of the walker's own generator (global RNG if None).
 
         Returns:
             None.
         """
-        # Etat interne et historique du trajet.
-        self._x = 0.0
-        self._y = 0.0
-        self._chemin = [(self._x, self._y)]
+        # Etat interne et historique du trajet (entiers exacts sur les grilles, int32 en memoire).
         self._model = step_model()
+        self.typecode = "i" if isinstance(self._model, LatticeModel) else "d"
+        self._x = 0 if self.typecode == "i" else 0.0
+        self._y = self._x
+        # Generateur propre, cree au premier tirage (construction gratuite pour 1M marcheurs).
+        self._seed = seed
+        self._rng: random.Random | None = None
+        self._own_stream = seed is not None and implements(self._model, "sample_delta")
+        # Pas deja tires mais pas encore joues (toujours tires par blocs de STEP_BLOCK).
+        self._pending_x: list[float] = []
+        self._pending_y: list[float] = []
+        self._cursor = 0
+        self._chemin: PathBuffer | None = None
+        if record:
+            self._chemin = PathBuffer(self.typecode)
+            self._chemin.append(self._x, self._y)
 
     @property
     def position(self) -> tuple[float, float]:
         """
-        Current (x, y) position.
+        Current (x, y) position, as integers on lattices.
 
         Args:
             None.
@@ -39,17 +74,36 @@ class Walker:
         return (self._x, self._y)
 
     @property
-    def chemin(self) -> list[tuple[float, float]]:
+    def rng(self) -> random.Random | None:
+        """
+        Generator owned by the walker, created on first use.
+
+        Args:
+            None.
+
+        Returns:
+            random.Random | None: Walker generator, or None without a seed.
+        """
+        if self._rng is None and self._seed is not None:
+            self._rng = random.Random(self._seed)
+        return self._rng
+
+    @property
+    def chemin(self) -> PathView | list[tuple[float, float]]:
         """
-        List of positions visited so far.
+        Sequence view of the positions visited so far.
+
+        Without history recording, only the current position is returned.
 
         Args:
             None.
 
         Returns:
-            list[tuple[float, float]]: Path history.
+            PathView | list[tuple[float, float]]: Path history.
         """
-        return self._chemin
+        if self._chemin is None:
+            return [self.position]
+        return self._chemin.view()
 
     def walk(self) -> None:
         """
@@ -61,8 +115,209 @@ class Walker:
         Returns:
             None.
         """
-        # Avance d'un pas et memorise la nouvelle position.
-        dx, dy = self._model.next_step()
+        # Avance d'un pas (flux propre si disponible) et memorise la nouvelle position.
+        if self._own_stream:
+            if self._cursor == len(self._pending_x):
+                self._refill()
+            dx = self._pending_x[self._cursor]
+            dy = self._pending_y[self._cursor]
+            self._cursor += 1
+        else:
+            dx, dy = self._model.next_step()
         self._x += dx
         self._y += dy
-        self._chemin.append((self._x, self._y))
+        if self._chemin is not None:
+            self._chemin.append(self._x, self._y)
+
+    def _refill(self) -> None:
+        """
+        Draw the next block of steps from the walker generator.
+
+        Args:
+            None.
+
+        Returns:
+            None.
+        """
+        profiler = profiling.active
+        start = profiler.start() if profiler is not None else 0.0
+        sampler = getattr(self._model, "sample_deltas", None)
+        if sampler is None:
+            # Modele sans tirage par lot: version generique de StepModel.
+            self._pending_x, self._pending_y = StepModel.sample_deltas(self._model, self.rng, STEP_BLOCK)
+        else:
+            self._pending_x, self._pending_y = sampler(self.rng, STEP_BLOCK)
+        self._cursor = 0
+        if profiler is not None:
+            profiler.stop("model.sample", start, STEP_BLOCK)
+
+    def _take(self, nmb_steps: int) -> tuple[list, list]:
+        """
+        Consume the next steps of the walker stream.
+
+        Args:
+            nmb_steps (int): Number of steps wanted.
+
+        Returns:
+            tuple[list, list]: Slices of the X and Y step buffers, in order.
+        """
+        # Consomme le tampon courant puis des blocs entiers.
+        chunks_x = []
+        chunks_y = []
+        remaining = nmb_steps
+        while remaining > 0:
+            if self._cursor == len(self._pending_x):
+                self._refill()
+            stop = min(len(self._pending_x), self._cursor + remaining)
+            chunks_x.append(self._pending_x[self._cursor : stop])
+            chunks_y.append(self._pending_y[self._cursor : stop])
+            remaining -= stop - self._cursor
+            self._cursor = stop
+        return chunks_x, chunks_y
+
+    def advance_array(self, nmb_steps: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Advance the walker and return the new positions as arrays.
+
+        Same path as ``advance``; the steps are summed with ``numpy.cumsum``
+        straight from the step buffers (no Python number per step), which
+        makes it the fast way to feed blocks of positions to writers.
+
+        Args:
+            nmb_steps (int): Number of steps to run.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: X and Y of the new positions
+                (int64 on lattices, float64 otherwise).
+        """
+        dtype = np.int64 if self.typecode == "i" else np.float64
+        if not self._own_stream:
+            xs, ys = self.advance(nmb_steps, positions=True)
+            return np.array(xs, dtype=dtype), np.array(ys, dtype=dtype)
+        chunks_x, chunks_y = self._take(nmb_steps)
+        # Somme sequentielle depuis la position courante: memes arrondis qu'accumulate.
+        xs = np.cumsum(np.concatenate([[self._x], *chunks_x]).astype(dtype))[1:]
+        ys = np.cumsum(np.concatenate([[self._y], *chunks_y]).astype(dtype))[1:]
+        if len(xs):
+            self._x = xs[-1].item()
+            self._y = ys[-1].item()
+            if self._chemin is not None:
+                self._append(xs.tolist(), ys.tolist())
+        return xs, ys
+
+    def first_passage(self, target, max_steps: int) -> int:
+        """
+        Walk until the target is reached, for at most ``max_steps`` steps.
+
+        Steps are drawn and summed by doubling blocks, the target being
+        tested on whole blocks; the walker then stops on the absorbing
+        position and the path (if recorded) ends there.
+
+        Args:
+            target (Callable[[numpy.ndarray, numpy.ndarray], numpy.ndarray]): Absorbing region,
+                see ``passage.Circle``.
+            max_steps (int): Horizon of the run.
+
+        Returns:
+            int: Number of steps to the first absorption (0 if the walker starts
+                in the target), or -1 if it is not absorbed within ``max_steps``.
+        """
+        dtype = np.int64 if self.typecode == "i" else np.float64
+        if target(np.array([self._x], dtype=dtype), np.array([self._y], dtype=dtype))[0]:
+            return 0
+        done = 0
+        while done < max_steps:
+            size = block_steps(done, max_steps - done, PASSAGE_BLOCK_LIMIT)
+            if self._own_stream:
+                chunks_x, chunks_y = self._take(size)
+            else:
+                chunks_x, chunks_y = self._model.next_steps(size)
+                chunks_x, chunks_y = [chunks_x], [chunks_y]
+            xs = np.cumsum(np.concatenate([[self._x], *chunks_x]).astype(dtype))[1:]
+            ys = np.cumsum(np.concatenate([[self._y], *chunks_y]).astype(dtype))[1:]
+            hits = np.flatnonzero(target(xs, ys))
+            stop = hits[0] + 1 if len(hits) else size
+            # Les pas tires apres l'absorption sont abandonnes.
+            self._x = xs[stop - 1].item()
+            self._y = ys[stop - 1].item()
+            if self._chemin is not None:
+                self._chemin.extend(xs[:stop].tolist(), ys[:stop].tolist())
+            done += stop
+            if len(hits):
+                return done
+        return -1
+
+    def hold(self, nmb_steps: int) -> None:
+        """
+        Stay in place for several steps, repeating the position in the path.
+
+        Args:
+            nmb_steps (int): Number of steps spent in place.
+
+        Returns:
+            None.
+        """
+        if self._chemin is not None and nmb_steps > 0:
+            self._chemin.extend([self._x] * nmb_steps, [self._y] * nmb_steps)
+
+    def advance(self, nmb_steps: int, positions: bool = False) -> tuple[list[float], list[float]] | None:
+        """
+        Advance the walker by several steps at once.
+
+        Gives the same path as ``nmb_steps`` calls to ``walk``, but sums the
+        steps with ``itertools.accumulate`` and appends them in bulk.
+
+        Args:
+            nmb_steps (int): Number of steps to run.
+            positions (bool): Also return the new positions.
+
+        Returns:
+            tuple[list[float], list[float]] | None: X and Y of the new positions
+                if ``positions`` is set, None otherwise.
+        """
+        if not self._own_stream:
+            profiler = profiling.active
+            start = profiler.start() if profiler is not None else 0.0
+            xs, ys = [], []
+            for _ in range(nmb_steps):
+                self.walk()
+                xs.append(self._x)
+                ys.append(self._y)
+            if profiler is not None:
+                # Pas un a un: tirage (next_step) et ajout a l'historique melanges.
+                profiler.stop("walker.walk", start, nmb_steps)
+            return (xs, ys) if positions else None
+        chunks_x, chunks_y = self._take(nmb_steps)
+        if not positions and self._chemin is None and self.typecode == "i":
+            # Seule la position finale compte (somme exacte sur une grille).
+            self._x += sum(chain.from_iterable(chunks_x))
+            self._y += sum(chain.from_iterable(chunks_y))
+            return None
+        xs = list(accumulate(chain.from_iterable(chunks_x), initial=self._x))
+        ys = list(accumulate(chain.from_iterable(chunks_y), initial=self._y))
+        del xs[0], ys[0]
+        if xs:
+            self._x = xs[-1]
+            self._y = ys[-1]
+            if self._chemin is not None:
+                self._append(xs, ys)
+        return (xs, ys) if positions else None
+
+    def _append(self, xs: list, ys: list) -> None:
+        """
+        Append a batch of positions to the recorded path.
+
+        Args:
+            xs (list): X of the new positions.
+            ys (list): Y of the new positions.
+
+        Returns:
+            None.
+        """
+        profiler = profiling.active
+        if profiler is None:
+            self._chemin.extend(xs, ys)
+            return
+        start = profiler.start()
+        self._chemin.extend(xs, ys)
+        profiler.stop("walker.append", start, len(xs))
@@ -1,11 +1,20 @@
 ﻿"""World container for multiple walkers and simulation helpers."""
 
 import logging
+import random
 
+import numpy as np
+
+from . import profiling
+from .trajectories import TrajectoryWriter, coordinate_typecode, open_writer, resolve_format, write_binary, write_text
+from .walk_paterns import implements, walker_seed
 from .walker import Walker
 
 logger = logging.getLogger(__name__)
 
+# Nombre de points accumules avant chaque envoi au writer (moteur python).
+STREAM_BLOCK_POINTS = 1 << 18
+
 
 class World:
     """
@@ -14,22 +23,62 @@ class World:
     Args:
         step_model (type): Callable returning a step model instance.
         nmb_walkers (int): Number of walkers to create.
+        engine (str): Simulation engine, "python" or "numpy".
+        seed (int | None): Master seed of the per-walker generators (drawn from the global RNG if None).
+        record (bool): Keep the full path history of every walker.
     """
 
-    def __init__(self, step_model, nmb_walkers: int) -> None:
+    def __init__(
+        self, step_model, nmb_walkers: int, engine: str = "python", seed: int | None = None, record: bool = True
+    ) -> None:
         """
         Create a world with a given number of walkers.
 
         Args:
             step_model (type): Callable returning a step model instance.
             nmb_walkers (int): Number of walkers to create.
+            engine (str): Simulation engine, "python" or "numpy".
+            seed (int | None): Master seed of the per-walker generators (drawn from the global RNG if None).
+            record (bool): Keep the full path history of every walker.
 
         Returns:
             None.
+
+        Raises:
+            ValueError: If an unknown engine is provided, or the step model
+                interacts without an interaction range.
         """
         # Initialise une population de marcheurs independants.
-        self._walkers = [Walker(step_model) for _ in range(nmb_walkers)]
-        logger.debug("World cree avec %s marcheurs", nmb_walkers)
+        self._pattern = getattr(step_model, "__name__", type(step_model).__name__).lower()
+        # Chaque marcheur a son propre generateur, derive de la graine maitre et de son indice.
+        self._seed = seed if seed is not None else random.getrandbits(64)
+        self._step_model = step_model
+        self._steps_done = 0
+        # Sorties alimentees a chaque nouvelle ligne de positions (statistiques, ...).
+        self._observers: list[TrajectoryWriter] = []
+        # Regles d'interaction appliquees apres chaque pas, avec l'index spatial qu'elles utilisent.
+        self._rules: list = []
+        self._index = None
+        self._engine = None
+        if engine == "python":
+            self._walkers = [
+                Walker(step_model, record=record, seed=walker_seed(self._seed, i)) for i in range(nmb_walkers)
+            ]
+        elif engine == "numpy":
+            # Moteur vectorise: les marcheurs sont des vues sur ses tableaux.
+            from .engine import NumpyEngine
+
+            self._engine = NumpyEngine(step_model, nmb_walkers, record=record, seed=self._seed)
+            self._walkers = self._engine.walkers()
+        else:
+            raise ValueError(f"Unknown engine: {engine}")
+        model = step_model()
+        if implements(model, "interact"):
+            # Le modele de pas applique lui-meme ses regles d'interaction.
+            if model.interaction_range is None:
+                raise ValueError(f"Step model {type(model).__name__} defines interact without interaction_range")
+            self.add_interaction(model.interact, cell_size=model.interaction_range)
+        logger.debug("World cree avec %s marcheurs (moteur %s)", nmb_walkers, engine)
 
     def add_walker(self, walker: Walker) -> None:
         """
@@ -40,10 +89,107 @@ class World:
 
         Returns:
             None.
+
+        Raises:
+            ValueError: If the world runs on the numpy engine.
         """
+        if self._engine is not None:
+            raise ValueError("Cannot add a walker to a world running on the numpy engine")
         self._walkers.append(walker)
         logger.info("Ajout d'un marcheur. Total=%s", len(self._walkers))
 
+    def spatial_index(self, cell_size: float | None = None):
+        """
+        Return the spatial index of the walkers, kept up to date by ``step``.
+
+        The index is created on first call (or rebuilt with a new cell size).
+
+        Args:
+            cell_size (float | None): Side of the index cells (required on first call).
+
+        Returns:
+            CellList: Index of the current positions.
+
+        Raises:
+            ValueError: If no index exists and no cell size is given.
+        """
+        from .spatial import CellList
+
+        if cell_size is None:
+            if self._index is None:
+                raise ValueError("cell_size is required to create the spatial index")
+            return self._index
+        if self._index is None or self._index.cell_size != cell_size:
+            self._index = CellList(cell_size, self.positions())
+            logger.debug("Index spatial cree: cellules de %s", cell_size)
+        return self._index
+
+    def add_interaction(self, rule, cell_size: float | None = None) -> None:
+        """
+        Apply an interaction rule after every step.
+
+        Rules are called as ``rule(world, index)`` with the spatial index of
+        the new positions; they may measure (``spatial.PairCounter``) or
+        remove walkers (``spatial.Annihilation``, ``spatial.Coalescence``).
+        With rules, ``simulate`` runs step by step.
+
+        Args:
+            rule (Callable[[World, CellList], None]): Interaction rule.
+            cell_size (float | None): Side of the index cells (the rule distance if None).
+
+        Returns:
+            None.
+        """
+        if cell_size is None and self._index is None:
+            cell_size = getattr(rule, "distance", None)
+        self.spatial_index(cell_size)
+        self._rules.append(rule)
+
+    def remove_walkers(self, indices) -> None:
+        """
+        Remove walkers; the remaining ones are renumbered in order.
+
+        Args:
+            indices (Sequence[int] | numpy.ndarray): Indices of the walkers to remove.
+
+        Returns:
+            None.
+
+        Raises:
+            ValueError: If observers are registered.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if not len(indices):
+            return
+        if self._observers:
+            raise ValueError("Cannot remove walkers while observers are registered")
+        if self._engine is not None:
+            self._engine.remove(indices)
+            self._walkers = self._engine.walkers()
+        else:
+            removed = set(indices.tolist())
+            self._walkers = [walker for i, walker in enumerate(self._walkers) if i not in removed]
+        if self._index is not None:
+            self._index.remove(indices)
+        logger.debug("%s marcheurs retires. Total=%s", len(indices), len(self._walkers))
+
+    def observe(self, observer: TrajectoryWriter) -> None:
+        """
+        Feed an observer with the current positions, then every later row.
+
+        Observers receive the same blocks as a streaming writer from every
+        ``step`` and ``simulate`` call, so they see each step without the
+        world keeping any history.
+
+        Args:
+            observer (TrajectoryWriter): Receiver of the position rows.
+
+        Returns:
+            None.
+        """
+        observer.write_block(self.positions()[np.newaxis])
+        self._observers.append(observer)
+
     def step(self) -> None:
         """
         Advance all walkers by one step.
@@ -55,39 +201,256 @@ class World:
             None.
         """
         # Applique un pas a tous les marcheurs.
-        for walker in self._walkers:
-            walker.walk()
+        self._steps_done += 1
+        if self._engine is not None:
+            self._engine.advance(1)
+        else:
+            for walker in self._walkers:
+                walker.walk()
+        if self._index is not None:
+            self._index.update(self.positions())
+            for rule in self._rules:
+                rule(self, self._index)
+        if self._observers:
+            row = self.positions()[np.newaxis]
+            for observer in self._observers:
+                observer.write_block(row)
 
-    def simulate(self, nmb_steps: int) -> None:
+    def simulate(self, nmb_steps: int, writer: TrajectoryWriter | None = None, jobs: int | None = None) -> None:
         """
         Run multiple steps of the simulation.
 
+        With a writer, the current positions then every new row of positions
+        are streamed to it block by block. With ``jobs``, walkers are split
+        across worker processes; since each one owns its generator, the result
+        does not depend on the number of jobs.
+
         Args:
             nmb_steps (int): Number of steps to run.
+            writer (TrajectoryWriter | None): Streaming output, if any.
+            jobs (int | None): Number of worker processes (None for in-process).
 
         Returns:
             None.
+
+        Raises:
+            ValueError: If jobs are combined with a writer or observers, or
+                interactions with jobs or a writer.
         """
         logger.debug("Simulation en mode batch: %s pas", nmb_steps)
-        # Boucle de simulation simple, sans interface graphique.
-        for _ in range(nmb_steps):
-            self.step()
+        profiler = profiling.active
+        start = profiler.start() if profiler is not None else 0.0
+        try:
+            if self._index is not None:
+                # L'index et les regles suivent chaque pas: pas d'avance par blocs.
+                if jobs is not None or writer is not None:
+                    raise ValueError("Interactions cannot be combined with jobs or streaming output")
+                for _ in range(nmb_steps):
+                    self.step()
+                return
+            if jobs is not None:
+                if writer is not None or self._observers:
+                    raise ValueError("Streaming output cannot be combined with jobs")
+                from .parallel import simulate_sharded
+
+                simulate_sharded(self, nmb_steps, jobs)
+                self._steps_done += nmb_steps
+                return
+            if writer is None and self._observers and all(hasattr(o, "rows_until_needed") for o in self._observers):
+                self._simulate_sampled(nmb_steps)
+                return
+            if writer is not None or self._observers:
+                self._simulate_streaming(nmb_steps, writer)
+                return
+            self._advance(nmb_steps)
+        finally:
+            if profiler is not None:
+                profiler.stop("world.simulate", start, nmb_steps * len(self._walkers))
+
+    def first_passage(self, target, max_steps: int) -> np.ndarray:
+        """
+        Run every walker until it reaches a target region, within a horizon.
+
+        Absorbed walkers leave the active set at once and stay on their
+        absorbing position, so the cost follows the surviving walkers
+        rather than ``walkers * max_steps``. The world clock moves on by the
+        horizon, or by the last hitting time if every walker was absorbed
+        before; recorded paths get one point per step, absorbed walkers
+        repeating their position.
+
+        Args:
+            target (Callable[[numpy.ndarray, numpy.ndarray], numpy.ndarray]): Absorbing region,
+                such as ``passage.Circle`` or ``passage.HalfPlane``: maps X and Y
+                arrays to a boolean array, True for absorbed points.
+            max_steps (int): Horizon of the run.
+
+        Returns:
+            numpy.ndarray: int64 hitting time of every walker (0 if it starts in
+                the target, -1 if it is not absorbed within ``max_steps``).
+
+        Raises:
+            ValueError: If observers or a spatial index are registered.
+        """
+        if self._observers or self._index is not None:
+            raise ValueError("First-passage runs cannot feed observers or interactions")
+        if self._engine is not None:
+            times, run = self._engine.first_passage(target, max_steps)
+        else:
+            # Chaque marcheur a son propre flux: il s'arrete des qu'il est absorbe.
+            times = np.array([walker.first_passage(target, max_steps) for walker in self._walkers], dtype=np.int64)
+            run = max_steps if (times < 0).any() else int(times.max(initial=0))
+            for walker, time in zip(self._walkers, times.tolist()):
+                if time >= 0:
+                    walker.hold(run - time)
+        self._steps_done += run
+        logger.debug("Premier passage: %s marcheurs absorbes sur %s", int((times >= 0).sum()), len(times))
+        return times
+
+    def _advance(self, nmb_steps: int) -> None:
+        """
+        Run steps without producing any row of positions.
+
+        Args:
+            nmb_steps (int): Number of steps to run.
+
+        Returns:
+            None.
+        """
+        if self._engine is not None:
+            # Le moteur vectorise genere les pas par blocs entiers.
+            self._engine.advance(nmb_steps)
+        else:
+            # Chaque marcheur a son propre flux: on les avance l'un apres l'autre, par lot.
+            for walker in self._walkers:
+                walker.advance(nmb_steps)
+        self._steps_done += nmb_steps
+
+    def _simulate_sampled(self, nmb_steps: int) -> None:
+        """
+        Run the simulation, handing observers only the rows they need.
+
+        Observers exposing ``rows_until_needed`` and ``skip`` (such as
+        ``DiffusionStats``) let the world run at full speed between the
+        rows they use instead of building every row.
+
+        Args:
+            nmb_steps (int): Number of steps to run.
+
+        Returns:
+            None.
+        """
+        observers = self._observers
+        done = 0
+        while done < nmb_steps:
+            rows = min(nmb_steps - done, *(observer.rows_until_needed() for observer in observers))
+            self._advance(rows)
+            row = self.positions()[np.newaxis]
+            for observer in observers:
+                # Lignes intermediaires sautees, puis la ligne courante.
+                observer.skip(rows - 1)
+                observer.write_block(row)
+            done += rows
+
+    def positions(self) -> np.ndarray:
+        """
+        Return the current position of every walker.
+
+        Args:
+            None.
+
+        Returns:
+            numpy.ndarray: Positions, shape (walkers, 2), int64 on lattices and float64 otherwise.
+        """
+        if self._engine is not None:
+            return self._engine.positions()
+        dtype = np.int64 if coordinate_typecode(self._walkers) == "i" else np.float64
+        return np.array([walker.position for walker in self._walkers], dtype=dtype).reshape(-1, 2)
+
+    def _simulate_streaming(self, nmb_steps: int, writer: TrajectoryWriter | None) -> None:
+        """
+        Run the simulation while flushing blocks of positions to a writer and the observers.
+
+        The writer first receives the current positions; observers only get
+        the new rows.
+
+        Args:
+            nmb_steps (int): Number of steps to run.
+            writer (TrajectoryWriter | None): Streaming output, if any.
+
+        Returns:
+            None.
+        """
+        outputs = self._observers if writer is None else [writer, *self._observers]
+
+        def emit(block: np.ndarray) -> None:
+            for output in outputs:
+                output.write_block(block)
+
+        current = self.positions()
+        if writer is not None:
+            writer.write_block(current[np.newaxis])
+        if self._engine is not None:
+            self._engine.advance(nmb_steps, on_block=emit)
+            self._steps_done += nmb_steps
+            return
+        # Avance chaque marcheur d'un bloc de pas puis envoie le bloc (lignes, marcheurs, 2).
+        walkers = self._walkers
+        block_rows = max(1, STREAM_BLOCK_POINTS // max(len(walkers), 1))
+        dtype = current.dtype
+        done = 0
+        while done < nmb_steps:
+            rows = min(block_rows, nmb_steps - done)
+            block = np.empty((rows, len(walkers), 2), dtype=dtype)
+            for i, walker in enumerate(walkers):
+                block[:, i, 0], block[:, i, 1] = walker.advance_array(rows)
+            emit(block)
+            done += rows
+        self._steps_done += nmb_steps
+
+    def stream_to_file(self, filename: str, nmb_steps: int, fmt: str = "auto") -> None:
+        """
+        Run the simulation and stream the trajectories to a file.
+
+        The output matches ``to_file`` after ``simulate(nmb_steps)``, but only
+        the current positions and one block are held in memory.
+
+        Args:
+            filename (str): Path to the output file.
+            nmb_steps (int): Number of steps to run.
+            fmt (str): "text", "binary" or "auto" (binary for .rwb/.bin files).
+
+        Returns:
+            None.
+        """
+        with open_writer(
+            filename,
+            len(self._walkers),
+            nmb_steps,
+            fmt=fmt,
+            pattern=self._pattern,
+            seed=self._seed,
+            typecode=coordinate_typecode(self._walkers),
+        ) as writer:
+            self.simulate(nmb_steps, writer=writer)
+        logger.info("Trajectoires ecrites au fil de l'eau dans %s", filename)
 
-    def to_file(self, filename: str) -> None:
+    def to_file(self, filename: str, fmt: str = "auto") -> None:
         """
-        Write all walker paths to a text file.
+        Write all walker paths to a text or binary file.
 
         Args:
             filename (str): Path to the output file.
+            fmt (str): "text", "binary" or "auto" (binary for .rwb/.bin files).
 
         Returns:
             None.
         """
-        # Export texte: un bloc par marcheur, puis les points du trajet.
-        with open(filename, "w") as f:
-            for i, walker in enumerate(self._walkers):
-                f.write(f"# Walker {i}\n")
-                for x, y in walker.chemin:
-                    f.write(f"{x} {y}\n")
-                f.write("\n")
+        profiler = profiling.active
+        start = profiler.start() if profiler is not None else 0.0
+        if resolve_format(filename, fmt) == "binary":
+            write_binary(filename, self._walkers, pattern=self._pattern, seed=self._seed)
+        else:
+            write_text(filename, self._walkers)
+        if profiler is not None:
+            profiler.stop("world.to_file", start, len(self._walkers))
         logger.info("Trajectoires ecrites dans %s", filename)
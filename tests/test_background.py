@@ -0,0 +1,61 @@
+﻿import time
+
+import numpy as np
+
+from random_walk.background import BackgroundSimulation, PositionRing
+from random_walk.walk_paterns import Continuous, Grid4
+from random_walk.world import World
+
+
+def wait_finished(sim: BackgroundSimulation) -> None:
+    deadline = time.monotonic() + 60
+    while not sim.finished and time.monotonic() < deadline:
+        sim.poll()
+        time.sleep(0.01)
+    assert sim.finished
+
+
+def test_ring_wraps_and_waits_for_release() -> None:
+    ring = PositionRing(2, 4)
+    try:
+        rows = np.arange(3 * 2 * 2, dtype=np.float64).reshape(3, 2, 2)
+        ring.write(rows)
+        views = ring.available()
+        np.testing.assert_array_equal(np.concatenate(views), rows)
+        ring.release(3)
+        # Lignes 3 a 6: l'anneau de 4 lignes boucle.
+        ring.write(rows + 100)
+        views = ring.available()
+        assert len(views) == 2
+        np.testing.assert_array_equal(np.concatenate(views), rows + 100)
+    finally:
+        ring.close()
+
+
+def test_background_run_matches_in_process_run() -> None:
+    for model in (Grid4, Continuous):
+        world = World(model, 3, seed=5)
+        sim = BackgroundSimulation(world, max_steps=2000)
+        wait_finished(sim)
+        sim.stop()
+        reference = World(model, 3, seed=5)
+        reference.simulate(2000)
+        assert sim.steps_done == 2000
+        assert world._steps_done == 2000
+        for remote, local, expected in zip(sim.walkers, world._walkers, reference._walkers):
+            assert list(remote.chemin) == list(local.chemin) == list(expected.chemin)
+
+
+def test_background_pause_and_stop() -> None:
+    world = World(Grid4, 1, seed=2)
+    sim = BackgroundSimulation(world)
+    sim.pause()
+    time.sleep(0.2)
+    sim.poll()
+    paused_at = sim.steps_done
+    time.sleep(0.2)
+    assert sim.poll() == 0
+    sim.resume()
+    sim.stop()
+    assert sim.steps_done >= paused_at
+    assert list(sim.walkers[0].chemin) == list(world._walkers[0].chemin)
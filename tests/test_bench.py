@@ -0,0 +1,83 @@
+﻿import copy
+import json
+
+import pytest
+
+import random_walk.main as main_mod
+from random_walk import bench
+from random_walk import parser as parser_mod
+
+
+class DummyParser:
+    def __init__(self, args):
+        self._args = args
+
+    def parse_args(self):
+        return self._args
+
+
+def small_suite() -> dict:
+    return bench.run_suite(["grid4", "continuous"], ["numpy"], [3], [50], ["binary"], repeat=1)
+
+
+def test_suite_measures_steps_exports_and_memory(tmp_path) -> None:
+    document = small_suite()
+    assert document["version"] == bench.BENCH_VERSION
+    kinds = [(row["kind"], row["pattern"]) for row in document["results"]]
+    assert kinds == [("steps", "grid4"), ("export", "grid4"), ("steps", "continuous"), ("export", "continuous")]
+    steps = document["results"][0]
+    assert steps["steps_per_sec"] > 0 and steps["bytes_per_step"] > 0
+    export = document["results"][1]
+    # Binaire: en-tete, decalages puis 3 x 51 points de deux entiers de 4 octets.
+    assert export["bytes"] > 3 * 51 * 8 and export["points_per_sec"] > 0
+    assert "export grid4/binary" in bench.format_table(document)
+    path = tmp_path / "bench.json"
+    bench.save_results(document, str(path))
+    assert bench.load_results(str(path)) == json.loads(json.dumps(document))
+
+
+def test_compare_flags_regressions_beyond_tolerance() -> None:
+    current = small_suite()
+    baseline = copy.deepcopy(current)
+    assert bench.compare(current, baseline) == []
+    # Reference deux fois plus rapide, et memoire divisee par deux: deux regressions sur la premiere mesure.
+    baseline["results"][0]["steps_per_sec"] *= 2
+    baseline["results"][0]["bytes_per_step"] /= 2
+    # Une mesure un peu plus lente reste dans la tolerance; une mesure absente est ignoree.
+    baseline["results"][1]["points_per_sec"] *= 1.1
+    baseline["results"].pop()
+    regressions = bench.compare(current, baseline, tolerance=0.15)
+    assert [(r["key"][:2], r["metric"]) for r in regressions] == [
+        (["steps", "grid4"], "steps_per_sec"),
+        (["steps", "grid4"], "bytes_per_step"),
+    ]
+    assert regressions[0]["change"] == pytest.approx(-0.5)
+    with pytest.raises(ValueError):
+        bench.compare(current, dict(baseline, version=0))
+
+
+def test_bench_subcommand_exit_status(tmp_path, monkeypatch, capsys) -> None:
+    output = tmp_path / "bench.json"
+    argv = ["bench", "--patterns", "grid8", "--engines", "numpy", "--walkers", "2", "--steps", "20", "--repeat", "1"]
+    args = parser_mod.build_parser().parse_args(argv + ["--formats", "--json", str(output)])
+    monkeypatch.setattr(main_mod, "build_parser", lambda: DummyParser(args))
+    main_mod.main()
+    assert "steps grid8/numpy" in capsys.readouterr().out
+    baseline = json.loads(output.read_text())
+    baseline["results"][0]["steps_per_sec"] *= 100
+    output.write_text(json.dumps(baseline))
+    args = parser_mod.build_parser().parse_args(argv + ["--formats", "--baseline", str(output)])
+    monkeypatch.setattr(main_mod, "build_parser", lambda: DummyParser(args))
+    with pytest.raises(SystemExit) as exit_info:
+        main_mod.main()
+    assert exit_info.value.code == 1
+    assert "1 regression(s)" in capsys.readouterr().out
+
+
+def test_bench_tolerance_must_be_non_negative(capsys) -> None:
+    assert parser_mod.build_parser().parse_args(["bench", "--tolerance", "0"]).tolerance == 0.0
+    for value in ("-0.1", "nan", "abc"):
+        with pytest.raises(SystemExit) as exit_info:
+            parser_mod.build_parser().parse_args(["bench", "--tolerance", value])
+        assert exit_info.value.code == 2
+    assert "--tolerance" in capsys.readouterr().err
@@ -0,0 +1,69 @@
+﻿import numpy as np
+import pytest
+
+from random_walk.dla import DISTANCE_CAP, MIN_HALF, Aggregation
+
+
+def assert_connected_cluster(cluster: np.ndarray) -> None:
+    # Chaque particule touche (4 voisins) une particule arrivee avant elle.
+    sites = [tuple(site) for site in cluster.tolist()]
+    assert sites[0] == (0, 0)
+    assert len(set(sites)) == len(sites)
+    seen = {sites[0]}
+    for x, y in sites[1:]:
+        assert {(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)} & seen
+        seen.add((x, y))
+
+
+@pytest.mark.parametrize("walkers", [1, 40])
+def test_cluster_grows_connected(walkers) -> None:
+    aggregation = Aggregation(3000, walkers=walkers, seed=1)
+    assert aggregation.grow() == 3000
+    assert aggregation.finished and len(aggregation) == 3000
+    cluster = aggregation.cluster
+    assert_connected_cluster(cluster)
+    assert aggregation.radius == pytest.approx(np.hypot(cluster[:, 0], cluster[:, 1]).max())
+    # Rayon au-dela de la grille initiale: elle a ete agrandie.
+    assert aggregation.radius > MIN_HALF
+    assert len(aggregation.positions()) == 0
+    # Amas fractal: bien plus etendu qu'un disque plein de meme masse.
+    assert aggregation.radius > 2 * np.sqrt(3000 / np.pi)
+
+
+def test_occupancy_and_distance_maps_match_cluster() -> None:
+    aggregation = Aggregation(400, walkers=8, seed=3)
+    aggregation.grow()
+    half = aggregation._half
+    cluster = aggregation.cluster
+    rng = np.random.default_rng(0)
+    for x, y in rng.integers(-40, 41, (300, 2)).tolist():
+        chebyshev = np.abs(cluster - (x, y)).max(axis=1)
+        assert aggregation._grid[x + half, y + half] == (chebyshev.min() == 0)
+        touching = (np.abs(cluster - (x, y)).sum(axis=1) == 1).any()
+        assert aggregation._sticky[x + half, y + half] == touching
+        expected = min(int(chebyshev.min()), DISTANCE_CAP)
+        assert aggregation._distance[x + half + DISTANCE_CAP, y + half + DISTANCE_CAP] == expected
+
+
+def test_same_seed_same_cluster_and_partial_growth(tmp_path) -> None:
+    first = Aggregation(200, walkers=5, seed=9)
+    first.grow()
+    second = Aggregation(200, walkers=5, seed=9)
+    second.simulate(10)
+    assert not second.finished and len(second.positions()) == 5
+    second.grow()
+    np.testing.assert_array_equal(first.cluster, second.cluster)
+    output = tmp_path / "cluster.txt"
+    first.save(str(output))
+    lines = output.read_text().splitlines()
+    assert lines[0] == "# x y" and len(lines) == 201
+    assert np.loadtxt(output, dtype=np.int64).tolist() == first.cluster.tolist()
+
+
+def test_invalid_settings_raise() -> None:
+    with pytest.raises(ValueError):
+        Aggregation(0)
+    with pytest.raises(ValueError):
+        Aggregation(10, walkers=0)
+    with pytest.raises(ValueError):
+        Aggregation(10, kill_factor=1.0)
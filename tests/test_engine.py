@@ -0,0 +1,116 @@
+﻿import math
+
+import numpy as np
+import pytest
+
+from random_walk import engine as engine_mod
+from random_walk.engine import NumpyEngine
+from random_walk.walk_paterns import Continuous, Grid4, Grid8, seed, walker_seed, walker_seeds
+from random_walk.world import World
+
+
+class FixedStepModel:
+    def next_step(self):
+        return (1.0, -1.0)
+
+
+def test_grid_sample_block_uses_allowed_directions() -> None:
+    rng = np.random.default_rng(0)
+    for model in (Grid4(), Grid8()):
+        dx, dy = model.sample_block(rng, (50, 4))
+        assert dx.shape == dy.shape == (50, 4)
+        allowed = set(model.DIRECTIONS)
+        assert set(zip(dx.ravel().tolist(), dy.ravel().tolist())) <= allowed
+
+
+def test_continuous_sample_block_within_radius() -> None:
+    dx, dy = Continuous(radius=1.5).sample_block(np.random.default_rng(1), (100, 3))
+    assert np.all(np.hypot(dx, dy) <= 1.5 + 1e-12)
+
+
+def test_numpy_world_paths_are_cumulative_views() -> None:
+    seed(3)
+    world = World(Grid4, 5, engine="numpy")
+    world.simulate(20)
+    world.step()
+    for walker in world._walkers:
+        path = walker.chemin
+        assert len(path) == 22
+        assert path[0] == (0.0, 0.0)
+        assert path[-1] == walker.position
+        for (x0, y0), (x1, y1) in zip(path, path[1:]):
+            assert math.hypot(x1 - x0, y1 - y0) == 1.0
+
+
+def test_numpy_world_reproducible_with_seed() -> None:
+    seed(11)
+    w1 = World(Continuous, 3, engine="numpy")
+    w1.simulate(10)
+    seed(11)
+    w2 = World(Continuous, 3, engine="numpy")
+    w2.simulate(10)
+    assert [w.chemin for w in w1._walkers] == [list(w.chemin) for w in w2._walkers]
+
+
+def test_numpy_world_to_file(tmp_path) -> None:
+    world = World(Grid8, 2, engine="numpy")
+    world.simulate(3)
+    path = tmp_path / "walk.txt"
+    world.to_file(str(path))
+    content = path.read_text().strip().splitlines()
+    assert content[0] == "# Walker 0"
+    assert content[1] == "0 0"
+    assert "# Walker 1" in content
+
+
+def test_numpy_engine_rejects_unvectorized_model() -> None:
+    with pytest.raises(ValueError):
+        NumpyEngine(FixedStepModel, 1)
+
+
+def test_numpy_world_rejects_add_walker_and_unknown_engine() -> None:
+    world = World(Grid4, 1, engine="numpy")
+    with pytest.raises(ValueError):
+        world.add_walker(world._walkers[0])
+    with pytest.raises(ValueError, match="Unknown engine"):
+        World(Grid4, 1, engine="gpu")
+
+
+def test_walker_streams_match_scalar_seeds() -> None:
+    seeds = walker_seeds(123, 10, 4)
+    assert seeds.tolist() == [walker_seed(123, i) for i in range(10, 14)]
+
+
+def test_numpy_streams_do_not_depend_on_population_or_blocks() -> None:
+    small = World(Continuous, 2, engine="numpy", seed=9)
+    large = World(Continuous, 6, engine="numpy", seed=9)
+    small.simulate(30)
+    for _ in range(3):
+        large.simulate(10)
+    # Sommes faites pas apres pas: egalite exacte quel que soit le decoupage.
+    assert list(small._walkers[1].chemin) == list(large._walkers[1].chemin)
+
+
+def test_numpy_float_positions_do_not_depend_on_blocks_or_jobs(monkeypatch) -> None:
+    # Petits blocs ici, blocs par defaut dans les processus de --jobs.
+    monkeypatch.setattr(engine_mod, "BLOCK_ELEMENTS", 64)
+    runs = []
+    for jobs in (None, 2):
+        world = World(Continuous, 8, engine="numpy", seed=5)
+        world.simulate(300, jobs=jobs)
+        runs.append(world.positions())
+    stepped = World(Continuous, 8, engine="numpy", seed=5)
+    for _ in range(300):
+        stepped.step()
+    assert runs[0].tolist() == runs[1].tolist() == stepped.positions().tolist()
+
+
+def test_numpy_lattice_engine_uses_integers() -> None:
+    world = World(Grid4, 3, engine="numpy", seed=2)
+    world.simulate(50)
+    engine = world._engine
+    assert engine._x.dtype == np.int64 and engine._hist_x.dtype == np.int32
+    x, y = world._walkers[0].position
+    assert isinstance(x, int) and isinstance(y, int)
+    assert all(isinstance(v, int) for point in world._walkers[1].chemin for v in point)
+    assert World(Continuous, 1, engine="numpy")._engine._x.dtype == np.float64
@@ -0,0 +1,80 @@
+﻿import struct
+import zlib
+
+import pygame
+import pytest
+
+from random_walk.frames import FrameExporter, FrameSink, RawFrameSink, encode_png, open_frame_sink
+
+
+class ListSink(FrameSink):
+    def __init__(self, fail_at=None) -> None:
+        self.frames = []
+        self.closed = False
+        self._fail_at = fail_at
+
+    def write(self, index, data, size) -> None:
+        if index == self._fail_at:
+            raise OSError("disque plein")
+        self.frames.append((index, data, size))
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def read_png(content: bytes):
+    # Decodage minimal: en-tete, IDAT decompresse, une ligne par rangee avec son filtre.
+    assert content[:8] == b"\x89PNG\r\n\x1a\n"
+    chunks = {}
+    offset = 8
+    while offset < len(content):
+        (length,) = struct.unpack(">I", content[offset : offset + 4])
+        kind = content[offset + 4 : offset + 8]
+        payload = content[offset + 8 : offset + 8 + length]
+        (crc,) = struct.unpack(">I", content[offset + 8 + length : offset + 12 + length])
+        assert crc == zlib.crc32(kind + payload)
+        chunks[kind] = payload
+        offset += 12 + length
+    width, height, depth, color = struct.unpack(">IIBB", chunks[b"IHDR"][:10])
+    return (width, height, depth, color), zlib.decompress(chunks[b"IDAT"])
+
+
+def test_encode_png_layout() -> None:
+    data = bytes(range(2 * 3 * 3))
+    header, raw = read_png(encode_png(data, (3, 2)))
+    assert header == (3, 2, 8, 2)
+    # Filtre 0 puis les 9 octets RGB de chaque ligne.
+    assert raw == b"\x00" + data[:9] + b"\x00" + data[9:18]
+
+
+def test_exporter_writes_frames_in_order() -> None:
+    sink = ListSink()
+    surface = pygame.Surface((4, 3))
+    with FrameExporter(sink, queue_frames=2) as exporter:
+        for shade in range(5):
+            surface.fill((shade, 0, 0))
+            exporter.submit(surface)
+    assert sink.closed
+    assert [index for index, _, _ in sink.frames] == list(range(5))
+    # Copie au moment de la soumission: chaque image garde sa propre couleur.
+    assert [data[0] for _, data, _ in sink.frames] == list(range(5))
+    assert all(len(data) == 4 * 3 * 3 and size == (4, 3) for _, data, size in sink.frames)
+
+
+def test_exporter_reraises_sink_errors() -> None:
+    exporter = FrameExporter(ListSink(fail_at=1))
+    surface = pygame.Surface((2, 2))
+    exporter.submit(surface)
+    exporter.submit(surface)
+    with pytest.raises(OSError, match="disque plein"):
+        exporter.close()
+
+
+def test_open_frame_sink_choice(tmp_path) -> None:
+    raw = open_frame_sink(str(tmp_path / "video.rgb"))
+    assert isinstance(raw, RawFrameSink)
+    raw.close()
+    png = open_frame_sink(str(tmp_path / "frames"))
+    png.write(0, bytes(12), (2, 2))
+    png.close()
+    assert (tmp_path / "frames" / "frame_000000.png").exists()
@@ -0,0 +1,62 @@
+﻿from random_walk.history import PathBuffer
+from random_walk.walk_paterns import Continuous, Grid4
+from random_walk.walker import Walker
+
+
+def test_path_buffer_grows_geometrically() -> None:
+    buffer = PathBuffer("d")
+    capacities = set()
+    for i in range(1000):
+        buffer.append(float(i), -float(i))
+        capacities.add(len(buffer._data))
+    assert len(buffer) == 1000
+    # Quelques doublements seulement, pas une reallocation par point.
+    assert len(capacities) <= 8
+    view = buffer.view()
+    assert view[999] == (999.0, -999.0)
+    assert view[-1] == (999.0, -999.0)
+    assert view[1:3] == [(1.0, -1.0), (2.0, -2.0)]
+
+
+def test_lattice_walker_stores_int32_history() -> None:
+    walker = Walker(Grid4)
+    for _ in range(10):
+        walker.walk()
+    assert walker._chemin.typecode == "i"
+    path = walker.chemin
+    assert len(path) == 11
+    assert path[-1] == walker.position
+    assert all(isinstance(x, int) and isinstance(y, int) for x, y in path)
+    assert isinstance(path[3][0], int)
+
+
+def test_continuous_walker_stores_doubles() -> None:
+    walker = Walker(Continuous)
+    walker.walk()
+    assert walker._chemin.typecode == "d"
+    assert list(walker.chemin) == [(0.0, 0.0), walker.position]
+
+
+def test_view_follows_buffer_growth() -> None:
+    walker = Walker(Continuous)
+    view = walker.chemin
+    for _ in range(100):
+        walker.walk()
+    assert len(view) == 101
+    assert view[-1] == walker.position
+
+
+def test_columns_are_detached_from_the_buffer() -> None:
+    walker = Walker(Grid4, seed=1)
+    walker.advance(20)
+    xs, ys = walker.chemin.columns()
+    # Colonnes gardees: le tampon peut encore grandir (pas de BufferError).
+    walker.advance(1000)
+    for _ in range(100):
+        walker.walk()
+    assert len(xs) == 21 and len(walker.chemin) == 1121
+    points = list(walker.chemin)
+    assert list(zip(xs, ys)) == points[:21]
+    view = walker.chemin
+    assert view[5:40:3] == points[5:40:3] and view[::-7] == points[::-7] and view[50:10] == []
+
@@ -0,0 +1,51 @@
+﻿from random_walk.lod import PathPyramid, level_for
+from random_walk.walk_paterns import Grid4
+from random_walk.walker import Walker
+
+
+def test_level_for_matches_pixel_size() -> None:
+    assert level_for(40.0) == 0
+    assert level_for(0.5) == 0
+    assert level_for(0.25) == 2
+    assert level_for(0.3) == 1
+    assert level_for(1e-12, depth=5) == 5
+
+
+def test_pyramid_levels_are_nested_simplifications() -> None:
+    walker = Walker(Grid4, seed=3)
+    walker.advance(20000)
+    path = list(walker.chemin)
+    pyramid = PathPyramid(max_levels=8)
+    # Alimentation incrementale, par morceaux irreguliers.
+    for start in range(0, len(path), 777):
+        pyramid.extend(path[start : start + 777])
+    source = path
+    for level in range(1, 9):
+        size = 2**level
+        expected = []
+        for x, y in source:
+            if not expected or max(abs(x - expected[-1][0]), abs(y - expected[-1][1])) >= size:
+                expected.append((x, y))
+        assert pyramid.vertices(level) == expected
+        assert pyramid.count(level) == len(expected)
+        source = expected
+    # Environ un sommet pour 4**k pas: bien moins que le trajet.
+    assert pyramid.count(3) < len(path) / 20
+    assert pyramid.vertices(3, 5) == pyramid.vertices(3)[5:]
+
+
+def test_pyramid_dropped_points_stay_within_cumulative_bound() -> None:
+    walker = Walker(Grid4, seed=5)
+    walker.advance(20000)
+    path = list(walker.chemin)
+    pyramid = PathPyramid(max_levels=6)
+    worst = [0.0] * 6
+    for x, y in path:
+        pyramid.extend([(x, y)])
+        for level in range(1, 7):
+            vx, vy = pyramid.vertices(level, pyramid.count(level) - 1)[0]
+            worst[level - 1] = max(worst[level - 1], abs(x - vx), abs(y - vy))
+    for level in range(1, 7):
+        assert worst[level - 1] < 2 ** (level + 1)
+    # Les niveaux grossiers heritent de l'erreur des niveaux fins.
+    assert any(worst[level - 1] >= 2**level for level in range(2, 7))
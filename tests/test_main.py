@@ -1,4 +1,4 @@
-import argparse
+﻿import argparse
 from types import SimpleNamespace
 
 import pytest
@@ -17,6 +17,13 @@ class DummyParser:
         return self._args
 
 
+def make_args(**overrides) -> SimpleNamespace:
+    # Part des valeurs par defaut du vrai parser pour suivre les nouvelles options.
+    values = vars(parser_mod.build_parser().parse_args([]))
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
 def test_non_negative_int_validation() -> None:
     assert parser_mod._non_negative_int("0") == 0
     assert parser_mod._non_negative_int("5") == 5
@@ -39,7 +46,7 @@ def test_positive_int_validation() -> None:
 
 def test_main_text_writes_output(tmp_path, monkeypatch) -> None:
     output = tmp_path / "walk.txt"
-    args = SimpleNamespace(
+    args = make_args(
         seed=123,
         pattern="grid4",
         walkers=1,
@@ -63,7 +70,7 @@ def test_main_text_writes_output(tmp_path, monkeypatch) -> None:
 
 
 def test_main_unknown_pattern_raises(tmp_path, monkeypatch) -> None:
-    args = SimpleNamespace(
+    args = make_args(
         seed=1,
         pattern="unknown",
         walkers=1,
@@ -77,3 +84,145 @@ def test_main_unknown_pattern_raises(tmp_path, monkeypatch) -> None:
 
     with pytest.raises(ValueError, match="Unknown pattern"):
         main_mod.main()
+
+
+def test_main_numpy_engine_writes_output(tmp_path, monkeypatch) -> None:
+    output = tmp_path / "walk.txt"
+    args = make_args(seed=7, pattern="grid8", walkers=3, steps=5, output=str(output), engine="numpy")
+    monkeypatch.setattr(main_mod, "build_parser", lambda: DummyParser(args))
+
+    main_mod.main()
+
+    lines = output.read_text().strip().splitlines()
+    assert lines.count("# Walker 2") == 1
+    assert len([line for line in lines if not line.startswith("#") and line]) == args.walkers * (args.steps + 1)
+
+
+def test_main_saw_pattern_writes_self_avoiding_walks(tmp_path, monkeypatch) -> None:
+    from random_walk.saw import is_self_avoiding
+
+    output = tmp_path / "walk.txt"
+    args = make_args(seed=3, pattern="saw", walkers=2, steps=200, output=str(output))
+    monkeypatch.setattr(main_mod, "build_parser", lambda: DummyParser(args))
+
+    main_mod.main()
+
+    walks = output.read_text().strip().split("# Walker")[1:]
+    assert len(walks) == 2
+    for walk in walks:
+        points = [tuple(map(float, line.split())) for line in walk.strip().splitlines()[1:]]
+        assert len(points) == 201
+        assert is_self_avoiding(points)
+
+
+def test_main_saw_rejects_numpy_engine(tmp_path, monkeypatch) -> None:
+    output = tmp_path / "walk.txt"
+    args = make_args(pattern="saw", engine="numpy", steps=20, output=str(output))
+    monkeypatch.setattr(main_mod, "build_parser", lambda: DummyParser(args))
+
+    with pytest.raises(ValueError, match="python engine"):
+        main_mod.main()
+    assert not output.exists()
+
+
+def test_main_stream_matches_batch_output(tmp_path, monkeypatch) -> None:
+    outputs = []
+    for stream in (False, True):
+        output = tmp_path / f"walk_{stream}.txt"
+        args = make_args(seed=4, walkers=2, steps=30, output=str(output), stream=stream)
+        monkeypatch.setattr(main_mod, "build_parser", lambda: DummyParser(args))
+        main_mod.main()
+        outputs.append(output.read_text())
+    assert outputs[0] == outputs[1]
+
+
+def test_main_frames_writes_raw_stream(tmp_path, monkeypatch) -> None:
+    # Export sans fenetre vers un flux RGB brut: une image au depart puis tous les 5 pas.
+    import sys
+
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    monkeypatch.setenv("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    # Modules d'affichage importes avec le vrai pygame (d'autres tests les chargent avec un faux).
+    for name in ("random_walk.screen", "random_walk.trail", "random_walk.particles", "random_walk.assets"):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    output = tmp_path / "video.rgb"
+    args = make_args(seed=2, walkers=30, steps=10, display="frames", frames=str(output), frame_every=5)
+    args.render = "density"
+    monkeypatch.setattr(main_mod, "build_parser", lambda: DummyParser(args))
+
+    try:
+        main_mod.main()
+    finally:
+        sys.modules["pygame"].quit()
+        for name in ("random_walk.screen", "random_walk.trail", "random_walk.particles", "random_walk.assets"):
+            sys.modules.pop(name, None)
+
+    assert output.stat().st_size == 3 * 1280 * 720 * 3
+
+
+def test_main_stats_without_trajectories(tmp_path, monkeypatch) -> None:
+    output = tmp_path / "walk.txt"
+    stats = tmp_path / "stats.txt"
+    args = make_args(seed=4, walkers=10, steps=100, output=str(output), stats=str(stats), no_trajectories=True)
+    monkeypatch.setattr(main_mod, "build_parser", lambda: DummyParser(args))
+
+    main_mod.main()
+
+    assert not output.exists()
+    lines = stats.read_text().splitlines()
+    assert lines[0].startswith("# steps 100 ")
+    assert lines[-1].split()[1] == "10"
+
+
+def test_main_stats_rejects_jobs(tmp_path, monkeypatch) -> None:
+    stats = tmp_path / "stats.txt"
+    args = make_args(seed=4, walkers=4, steps=10, output=str(tmp_path / "walk.txt"), stats=str(stats), jobs=2)
+    monkeypatch.setattr(main_mod, "build_parser", lambda: DummyParser(args))
+    # Refus avant toute creation du monde.
+    monkeypatch.setattr(main_mod, "World", None)
+
+    with pytest.raises(ValueError, match="--stats"):
+        main_mod.main()
+    assert not stats.exists()
+
+
+@pytest.mark.parametrize("record", ["endpoints", "summary"])
+def test_main_record_summary_rejects_jobs(tmp_path, monkeypatch, record) -> None:
+    output = tmp_path / "summary.txt"
+    args = make_args(seed=4, walkers=4, steps=10, output=str(output), record=record, jobs=2)
+    monkeypatch.setattr(main_mod, "build_parser", lambda: DummyParser(args))
+    monkeypatch.setattr(main_mod, "World", None)
+
+    with pytest.raises(ValueError, match="--record"):
+        main_mod.main()
+    assert not output.exists()
+
+
+@pytest.mark.parametrize("no_trajectories", [False, True])
+def test_main_record_summary_writes_table(tmp_path, monkeypatch, no_trajectories) -> None:
+    output = tmp_path / "summary.txt"
+    args = make_args(
+        seed=4, walkers=3, steps=50, output=str(output), record="summary", no_trajectories=no_trajectories
+    )
+    monkeypatch.setattr(main_mod, "build_parser", lambda: DummyParser(args))
+
+    main_mod.main()
+
+    lines = output.read_text().splitlines()
+    assert lines[0].startswith("# walker steps start_x")
+    assert [line.split()[:2] for line in lines[1:]] == [["0", "50"], ["1", "50"], ["2", "50"]]
+
+
+def test_main_dla_writes_cluster(tmp_path, monkeypatch) -> None:
+    output = tmp_path / "cluster.txt"
+    args = make_args(seed=5, dla=150, walkers=10, output=str(output))
+    monkeypatch.setattr(main_mod, "build_parser", lambda: DummyParser(args))
+
+    main_mod.main()
+
+    lines = output.read_text().splitlines()
+    assert lines[0] == "# x y"
+    assert len(lines) == 151
+    args.pattern = "grid8"
+    with pytest.raises(ValueError):
+        main_mod.main()
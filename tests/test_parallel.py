@@ -0,0 +1,76 @@
+﻿import numpy as np
+import pytest
+
+from random_walk.parallel import _run_array_shard, shard_bounds
+from random_walk.walk_paterns import Continuous, Grid4, WalkerStreams, walker_seed, walker_seeds
+from random_walk.world import World
+
+
+def test_shard_bounds_cover_all_walkers_in_order() -> None:
+    assert shard_bounds(10, 3) == [(0, 4), (4, 7), (7, 10)]
+    assert shard_bounds(2, 8) == [(0, 1), (1, 2)]
+    assert shard_bounds(5, 1) == [(0, 5)]
+
+
+def test_walker_seed_is_deterministic_and_spread() -> None:
+    assert walker_seed(1, 0) == walker_seed(1, 0)
+    seeds = {walker_seed(1, i) for i in range(1000)}
+    assert len(seeds) == 1000
+    assert walker_seed(1, 0) != walker_seed(2, 0)
+
+
+@pytest.mark.parametrize("engine,pattern", [("python", Grid4), ("numpy", Continuous)])
+def test_sharded_results_do_not_depend_on_jobs(engine, pattern) -> None:
+    runs = []
+    for jobs in (None, 1, 2, 3):
+        world = World(pattern, 5, engine=engine, seed=42)
+        world.simulate(15, jobs=jobs)
+        world.simulate(5, jobs=jobs)
+        runs.append([list(w.chemin) for w in world._walkers])
+    assert runs[0] == runs[1] == runs[2] == runs[3]
+    assert all(len(path) == 21 for path in runs[0])
+    # Les deux appels successifs ne rejouent pas les memes increments.
+    path = runs[0][0]
+    deltas = [(b[0] - a[0], b[1] - a[1]) for a, b in zip(path, path[1:])]
+    assert deltas[:5] != deltas[15:20]
+
+
+@pytest.mark.parametrize("record", [True, False])
+def test_numpy_shards_merge_in_place(record) -> None:
+    reference = World(Grid4, 7, engine="numpy", seed=3, record=record)
+    reference.simulate(40)
+    world = World(Grid4, 7, engine="numpy", seed=3, record=record)
+    world.simulate(25, jobs=3)
+    world.simulate(15, jobs=2)
+    assert (world.positions() == reference.positions()).all()
+    if record:
+        assert [list(w.chemin) for w in world._walkers] == [list(w.chemin) for w in reference._walkers]
+
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+def test_jobs_follow_walkers_after_removal(engine) -> None:
+    runs = []
+    for jobs in (None, 2):
+        world = World(Grid4, 6, engine=engine, seed=11)
+        world.simulate(10)
+        world.remove_walkers([0, 1])
+        world.simulate(50, jobs=jobs)
+        runs.append([list(w.chemin) for w in world._walkers])
+    assert runs[0] == runs[1]
+
+
+def test_unrecorded_shard_returns_only_positions() -> None:
+    starts = np.zeros((4, 2), dtype=np.int64)
+    streams = WalkerStreams(walker_seeds(5, 0, 4))
+    positions, history = _run_array_shard(Grid4, starts, streams, 0, 30, False)
+    assert history is None
+    assert positions.shape == (4, 2)
+    positions, (xs, ys) = _run_array_shard(Grid4, starts, streams, 0, 30, True)
+    assert xs.shape == ys.shape == (30, 4)
+    assert (xs[-1] == positions[:, 0]).all()
+
+
+def test_jobs_reject_streaming_writer() -> None:
+    world = World(Grid4, 2, record=False)
+    with pytest.raises(ValueError, match="jobs"):
+        world.simulate(3, writer=object(), jobs=2)
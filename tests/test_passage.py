@@ -0,0 +1,115 @@
+﻿import numpy as np
+import pytest
+
+from random_walk.passage import Circle, HalfPlane, block_steps
+from random_walk.stats import DiffusionStats
+from random_walk.trajectories import path_array
+from random_walk.walk_paterns import Continuous, Grid4, Grid8
+from random_walk.world import World
+
+
+def brute_force_times(world: World, target, max_steps: int) -> np.ndarray:
+    # Reference: simulation complete puis premier point absorbe de chaque chemin.
+    world.simulate(max_steps)
+    times = []
+    for walker in world._walkers:
+        path = path_array(walker.chemin)
+        hits = np.flatnonzero(target(path[:, 0], path[:, 1]))
+        times.append(hits[0] if len(hits) else -1)
+    return np.array(times)
+
+
+def test_targets() -> None:
+    xs = np.array([0, 3, -4, 1])
+    ys = np.array([0, 4, 0, 1])
+    np.testing.assert_array_equal(Circle(5)(xs, ys), [False, True, False, False])
+    np.testing.assert_array_equal(Circle(2, center=(1, 1))(xs, ys), [False, True, True, False])
+    np.testing.assert_array_equal(HalfPlane((1, 0), 1)(xs, ys), [False, True, False, True])
+    np.testing.assert_array_equal(HalfPlane((1, 1), 2)(xs, ys), [False, True, False, True])
+    with pytest.raises(ValueError):
+        Circle(-1)
+    with pytest.raises(ValueError):
+        HalfPlane((0, 0), 1)
+
+
+def test_block_steps_double_up_to_limits() -> None:
+    assert block_steps(0, 10_000, 1 << 16) == 64
+    assert block_steps(1000, 10_000, 1 << 16) == 1000
+    assert block_steps(1000, 10, 1 << 16) == 10
+    assert block_steps(1000, 10_000, 200) == 200
+    assert block_steps(0, 10, 0) == 1
+
+
+@pytest.mark.parametrize(
+    ("model", "engine", "target"),
+    [
+        (Grid4, "python", Circle(20)),
+        (Grid8, "numpy", Circle(25, center=(2, -1))),
+        (Continuous, "python", HalfPlane((0, 1), 12.5)),
+        (Continuous, "numpy", HalfPlane((1, -1), 10)),
+    ],
+)
+def test_first_passage_matches_full_simulation(model, engine, target) -> None:
+    world = World(model, 40, engine=engine, seed=3, record=False)
+    times = world.first_passage(target, 400)
+    expected = brute_force_times(World(model, 40, engine=engine, seed=3), target, 400)
+    np.testing.assert_array_equal(times, expected)
+    assert (times > 0).any() and (times < 0).any()
+
+
+def test_absorbed_walkers_stop_on_target() -> None:
+    target = Circle(15)
+    world = World(Grid4, 30, engine="numpy", seed=8)
+    reference = World(Grid4, 30, engine="numpy", seed=8)
+    times = world.first_passage(target, 200)
+    reference.simulate(200)
+    positions = world.positions()
+    absorbed = times >= 0
+    assert absorbed.any() and not absorbed.all()
+    assert target(positions[absorbed, 0], positions[absorbed, 1]).all()
+    # Survivants: meme position qu'apres une simulation complete.
+    np.testing.assert_array_equal(positions[~absorbed], reference.positions()[~absorbed])
+    for i, walker in enumerate(world._walkers):
+        path = path_array(walker.chemin)
+        assert len(path) == 201
+        np.testing.assert_array_equal(path[-1], positions[i])
+        if absorbed[i]:
+            assert (path[times[i] :] == positions[i]).all()
+        else:
+            np.testing.assert_array_equal(path, path_array(reference._walkers[i].chemin))
+
+
+def test_numpy_history_follows_steps_run_not_horizon() -> None:
+    world = World(Grid4, 50, engine="numpy", seed=1)
+    times = world.first_passage(Circle(3), 10**9)
+    assert (times >= 0).all()
+    run = int(times.max())
+    # Blocs doubles puis capacite doublee: au plus quatre fois les pas faits.
+    assert world._engine._hist_x.shape[0] <= 4 * (run + 1)
+    for walker, time in zip(world._walkers, times):
+        path = path_array(walker.chemin)
+        assert len(path) == run + 1
+        assert (path[time:] == path[time]).all()
+
+
+def test_python_paths_end_at_absorption() -> None:
+    world = World(Grid4, 5, seed=2)
+    times = world.first_passage(Circle(4), 10_000)
+    assert (times > 0).all()
+    run = times.max()
+    assert world._steps_done == run
+    for walker, time in zip(world._walkers, times):
+        path = path_array(walker.chemin)
+        assert len(path) == run + 1
+        assert Circle(4)(path[time, :1], path[time, 1:]).all()
+        assert not Circle(4)(path[:time, 0], path[:time, 1]).any()
+        assert (path[time:] == path[time]).all()
+
+
+def test_start_in_target_and_observers() -> None:
+    world = World(Grid4, 3, engine="numpy", seed=1, record=False)
+    np.testing.assert_array_equal(world.first_passage(Circle(0), 50), [0, 0, 0])
+    assert world._steps_done == 0
+    world.observe(DiffusionStats())
+    with pytest.raises(ValueError):
+        world.first_passage(Circle(5), 50)
@@ -0,0 +1,95 @@
+﻿import logging
+
+import pytest
+
+import random_walk.main as main_mod
+from random_walk import profiling
+from random_walk.walk_paterns import Grid4
+from random_walk.world import World
+
+
+class DummyParser:
+    def __init__(self, args):
+        self._args = args
+
+    def parse_args(self):
+        return self._args
+
+
+class FakeClock:
+    # Horloge manuelle: chaque lecture avance de `tick` secondes.
+    def __init__(self, tick=1.0) -> None:
+        self.now = 0.0
+        self.tick = tick
+
+    def __call__(self) -> float:
+        self.now += self.tick
+        return self.now
+
+
+def test_phases_accumulate_and_rank_by_time() -> None:
+    profiler = profiling.Profiler(interval=0, clock=FakeClock())
+    start = profiler.start()
+    start = profiler.stop("model.sample", start, 100)
+    profiler.stop("walker.append", start, 100)
+    profiler.stop("walker.append", profiler.start(), 50)
+    profiler.count("trail.redraws", 2)
+    snapshot = profiler.snapshot()
+    assert snapshot["phases"]["model.sample"] == {"seconds": 1.0, "calls": 1, "items": 100}
+    assert snapshot["phases"]["walker.append"] == {"seconds": 2.0, "calls": 2, "items": 150}
+    assert snapshot["counters"] == {"trail.redraws": 2}
+    lines = profiler.summary()
+    assert lines[1].startswith("walker.append") and lines[2].startswith("model.sample")
+    assert lines[-1].split() == ["trail.redraws", "2"]
+    assert len(profiler.summary(limit=1)) == 3
+    with pytest.raises(ValueError):
+        profiling.Profiler(interval=-1)
+
+
+def test_periodic_summary_is_logged(caplog) -> None:
+    clock = FakeClock(tick=0.0)
+    profiler = profiling.Profiler(interval=2.5, clock=clock)
+    with caplog.at_level(logging.INFO, logger=profiling.__name__):
+        for now in (1.0, 3.0, 4.0, 5.0):
+            start = profiler.start()
+            clock.now = now
+            profiler.stop("view.draw", start)
+        profiler.report(final=True)
+    # Resume a 3 s (2.5 s apres la creation), pas a 4 ni 5 s (moins de 2.5 s apres le precedent).
+    assert [record.getMessage().splitlines()[0] for record in caplog.records] == [
+        "Profil apres 3.0 s:",
+        "Profil final apres 5.0 s:",
+    ]
+
+
+def test_world_phases_when_enabled_only() -> None:
+    assert profiling.active is None
+    World(Grid4, 2, seed=1).simulate(10)
+    profiler = profiling.enable(interval=0)
+    try:
+        World(Grid4, 2, seed=1).simulate(10)
+        World(Grid4, 3, engine="numpy", seed=1).simulate(10)
+    finally:
+        assert profiling.disable() is profiler
+    phases = profiler.snapshot()["phases"]
+    assert phases["world.simulate"]["calls"] == 2 and phases["world.simulate"]["items"] == 2 * 10 + 3 * 10
+    # Un bloc de pas tire par marcheur python, puis un bloc pour tout le moteur numpy.
+    assert phases["model.sample"]["calls"] == 3
+    assert phases["walker.append"]["items"] == 2 * 10
+    assert phases["engine.cumsum"]["items"] == 3 * 10
+    assert profiling.active is None
+
+
+def test_main_profile_logs_final_breakdown(tmp_path, monkeypatch, caplog) -> None:
+    from random_walk import parser as parser_mod
+
+    output = tmp_path / "walk.txt"
+    args = parser_mod.build_parser().parse_args(["--steps", "20", "--seed", "3", "-o", str(output), "--profile"])
+    assert args.profile == profiling.REPORT_INTERVAL
+    monkeypatch.setattr(main_mod, "build_parser", lambda: DummyParser(args))
+    with caplog.at_level(logging.INFO, logger=profiling.__name__):
+        main_mod.main()
+    final = [record.getMessage() for record in caplog.records if record.getMessage().startswith("Profil final")]
+    assert len(final) == 1
+    assert "world.simulate" in final[0] and "world.to_file" in final[0]
+    assert profiling.active is None and output.exists()
@@ -149,12 +149,18 @@ def test_parser_defaults() -> None:
     assert args.verbose == 0
     assert args.walkers == 1
     assert args.pattern == "grid4"
+    assert args.engine == "python"
+    assert args.format == "auto"
+    assert args.steps_per_frame == 1
+    assert args.render == "trails"
+    assert args.frames == "frames"
+    assert args.frame_every == 1
 
 
 def test_parser_custom_args() -> None:
     parser = build_parser()
     args = parser.parse_args(
-        ["--seed", "5", "--steps", "10", "--fps", "30", "-vv", "--walkers", "3", "--pattern", "grid8"]
+        ["--seed", "5", "--steps", "10", "--fps", "30", "-vv", "--walkers", "3", "--pattern", "grid8", "--engine", "numpy"]
     )
     assert args.seed == 5
     assert args.steps == 10
@@ -162,3 +168,79 @@ def test_parser_custom_args() -> None:
     assert args.verbose == 2
     assert args.walkers == 3
     assert args.pattern == "grid8"
+    assert args.engine == "numpy"
+    assert parser.parse_args(["--steps-per-frame", "auto"]).steps_per_frame is None
+    assert parser.parse_args(["--steps-per-frame", "50"]).steps_per_frame == 50
+    assert parser.parse_args(["--render", "density"]).render == "density"
+
+
+def test_walker_streams_do_not_depend_on_population() -> None:
+    # Le marcheur 1 suit la meme trajectoire avec 2 ou 5 marcheurs.
+    small = World(Grid4, 2, seed=77)
+    large = World(Grid4, 5, seed=77)
+    small.simulate(20)
+    for _ in range(20):
+        # Ordre de pas inverse: aucune influence sur les flux.
+        for walker in reversed(large._walkers):
+            walker.walk()
+    assert list(small._walkers[1].chemin) == list(large._walkers[1].chemin)
+    assert list(small._walkers[0].chemin) != list(small._walkers[1].chemin)
+
+
+def test_walker_rng_is_created_lazily() -> None:
+    walker = Walker(Continuous, seed=5)
+    assert walker._rng is None
+    walker.walk()
+    assert walker._rng is not None
+    assert Walker(Continuous).rng is None
+
+
+def test_walker_without_sample_delta_uses_next_step() -> None:
+    world = World(FixedStepModel, 1, seed=3)
+    world.step()
+    assert world._walkers[0].position == (1.0, -1.0)
+
+
+def test_walker_advance_matches_walk() -> None:
+    # Un lot de pas donne le meme trajet que des pas un par un, quel que soit le decoupage.
+    for model in (Grid4, Grid8, Continuous):
+        stepped = Walker(model, seed=11)
+        for _ in range(5000):
+            stepped.walk()
+        batched = Walker(model, seed=11)
+        batched.advance(1234)
+        batched.advance(3766)
+        assert batched.position == stepped.position
+        assert list(batched.chemin) == list(stepped.chemin)
+        arrays = Walker(model, seed=11)
+        xs, ys = arrays.advance_array(1234)
+        arrays.advance_array(3766)
+        assert (xs[-1].item(), ys[-1].item()) == stepped.chemin[1234]
+        assert arrays.position == stepped.position
+        assert list(arrays.chemin) == list(stepped.chemin)
+
+
+def test_lattice_sample_deltas_uniform() -> None:
+    rng = random.Random(4)
+    for model, nmb in ((Grid4(), 4), (Grid8(), 8)):
+        dxs, dys = model.sample_deltas(rng, 40000)
+        assert len(dxs) == len(dys) == 40000
+        counts = {}
+        for step in zip(dxs, dys):
+            counts[step] = counts.get(step, 0) + 1
+        assert set(counts) == set(model.DIRECTIONS)
+        assert all(abs(count - 40000 / nmb) < 0.1 * 40000 / nmb for count in counts.values())
+    assert [len(d) for d in Grid4().sample_deltas(rng, 0)] == [0, 0]
+
+
+def test_lattice_text_output_uses_integers(tmp_path: Path) -> None:
+    world = World(Grid8, 2, seed=9)
+    world.simulate(20)
+    path = tmp_path / "walk.txt"
+    world.to_file(str(path))
+    points = [line for line in path.read_text().splitlines() if line and not line.startswith("#")]
+    assert points[0] == "0 0"
+    assert all("." not in line for line in points)
+    streamed = tmp_path / "stream.txt"
+    World(Grid8, 2, seed=9, record=False).stream_to_file(str(streamed), 20)
+    assert streamed.read_text() == path.read_text()
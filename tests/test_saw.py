@@ -0,0 +1,114 @@
+﻿import pickle
+import random
+import time
+
+import numpy as np
+import pytest
+
+from random_walk.saw import _GROUP, SelfAvoiding, _SawTree, is_self_avoiding, pivot_saw
+from random_walk.trajectories import path_array
+from random_walk.world import World
+
+
+def test_pivot_saw_is_self_avoiding() -> None:
+    path = pivot_saw(400, random.Random(3))
+    assert path.shape == (401, 2)
+    assert path[0].tolist() == [0, 0]
+    assert (np.abs(np.diff(path, axis=0)).sum(axis=1) == 1).all()
+    assert is_self_avoiding(path)
+    # Les pivots ont replie la barre de depart.
+    assert np.abs(path[-1]).sum() < 400
+    assert not is_self_avoiding(np.array([[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]))
+
+
+def test_pivot_saw_samples_walks_uniformly() -> None:
+    # <R^2> exact des 44100 marches auto-evitantes de 10 pas (enumeration complete);
+    # la barre de depart donnerait 100, l'amplitude asymptotique 0.771 n^1.5 environ 24.
+    exact = 1157296 / 44100
+    rng = random.Random(11)
+    squares = np.array([(pivot_saw(10, rng)[-1] ** 2).sum() for _ in range(150)], dtype=float)
+    error = squares.std() / np.sqrt(len(squares))
+    assert abs(squares.mean() - exact) < 4 * error
+    with pytest.raises(ValueError):
+        pivot_saw(100, rng, pivots=-1)
+    with pytest.raises(ValueError):
+        SelfAvoiding.configured("pivot", 100, pivots=-1)
+
+
+def _pivoted(path: np.ndarray, k: int, symmetry: int) -> np.ndarray:
+    # Pivot direct: les sites apres k tournent autour de k.
+    a, b, c, d = _GROUP[symmetry]
+    rest = path[k + 1 :] - path[k]
+    moved = np.stack((a * rest[:, 0] + b * rest[:, 1], c * rest[:, 0] + d * rest[:, 1]), axis=1) + path[k]
+    return np.concatenate((path[: k + 1], moved))
+
+
+@pytest.mark.parametrize("nmb_steps", [2, 5, 17, 100])
+def test_saw_tree_matches_direct_pivots(nmb_steps) -> None:
+    rng = random.Random(nmb_steps)
+    tree = _SawTree(nmb_steps)
+    path = tree.sites()
+    assert (path[:, 0] == np.arange(nmb_steps + 1)).all() and not path[:, 1].any()
+    for _ in range(1000):
+        k = rng.randrange(1, nmb_steps)
+        symmetry = rng.randrange(1, len(_GROUP))
+        moved = _pivoted(path, k, symmetry)
+        assert tree.collides(k, symmetry) == (not is_self_avoiding(moved))
+        if is_self_avoiding(moved):
+            tree.pivot(k, symmetry)
+            path = moved
+    assert (tree.sites() == path).all()
+    tree.dimerize(rng)
+    assert is_self_avoiding(tree.sites())
+
+
+def test_pivot_attempt_cost_grows_slowly() -> None:
+    # Une tentative coute O(log n) plus les paires de boites qui se chevauchent: bien moins
+    # que les 256 fois d'une reecriture de la marche entre 2^8 et 2^16 pas.
+    costs = []
+    for nmb_steps in (2**8, 2**16):
+        rng = random.Random(0)
+        tree = _SawTree(nmb_steps)
+        start = time.perf_counter()
+        for _ in range(2000):
+            k = rng.randrange(1, nmb_steps)
+            symmetry = rng.randrange(1, len(_GROUP))
+            if not tree.collides(k, symmetry):
+                tree.pivot(k, symmetry)
+        costs.append(time.perf_counter() - start)
+    assert costs[1] < 16 * costs[0]
+
+
+@pytest.mark.parametrize("mode", ["pivot", "growth"])
+def test_world_walks_avoid_themselves(mode) -> None:
+    world = World(SelfAvoiding.configured(mode, 100), 3, seed=2)
+    world.simulate(300)
+    for walker in world._walkers:
+        path = path_array(walker.chemin).astype(np.int64)
+        still = np.flatnonzero((np.diff(path, axis=0) == 0).all(axis=1))
+        if len(still):
+            # Marche bloquee: elle reste sur place apres le blocage.
+            stop = int(still[0]) + 1
+            assert walker._model.trapped and (path[stop:] == path[stop - 1]).all()
+            path = path[:stop]
+        assert is_self_avoiding(path)
+    assert world._pattern == "saw"
+
+
+def test_pivot_part_then_growth_and_pickling() -> None:
+    model = SelfAvoiding.configured("pivot", 50, pivots=200)()
+    rng = random.Random(5)
+    xs, ys = model.sample_deltas(rng, 40)
+    copy = pickle.loads(pickle.dumps(model))
+    assert type(copy).mode == "pivot" and copy._cursor == 40
+    more = model.sample_deltas(rng, 30)
+    assert copy.sample_deltas(random.Random(0), 10) == (more[0][:10], more[1][:10])
+    path = np.cumsum(np.array([[0, 0]] + list(zip(xs + more[0], ys + more[1]))), axis=0)
+    assert is_self_avoiding(path[: 71 if not model.trapped else 51])
+
+
+def test_saw_rejects_numpy_engine_and_unknown_mode() -> None:
+    with pytest.raises(ValueError):
+        World(SelfAvoiding.configured("pivot", 10), 2, engine="numpy")
+    with pytest.raises(ValueError):
+        SelfAvoiding.configured("reptation")
@@ -0,0 +1,71 @@
+﻿import numpy as np
+import pytest
+
+from random_walk.sites import SiteIndex, VisitedSites
+from random_walk.trajectories import path_array
+from random_walk.walk_paterns import Continuous, Grid4, Grid8
+from random_walk.world import World
+
+
+def test_site_index_counts_visits() -> None:
+    index = SiteIndex()
+    index.add(np.array([0, 1, 0, -9, 7, 0]), np.array([0, 0, 0, -9, 100, 0]))
+    assert index.nmb_sites == 4
+    assert index.nmb_visits == 6
+    assert index.revisits == 2
+    assert index.visits(0, 0) == 3
+    assert index.visits(-9, -9) == 1
+    assert index.visits(8, 100) == 0
+    assert sorted(map(tuple, index.sites().tolist())) == [(-9, -9), (0, 0), (1, 0), (7, 100)]
+    with pytest.raises(ValueError):
+        index.add(np.array([1 << 40]), np.array([0]))
+
+
+def test_site_index_grows_and_keeps_owners_apart() -> None:
+    rng = np.random.default_rng(0)
+    xs = rng.integers(-3000, 3000, 50_000)
+    ys = rng.integers(-3000, 3000, 50_000)
+    owners = rng.integers(0, 3, 50_000)
+    index = SiteIndex(3)
+    # En plusieurs lots pour passer par les redimensionnements.
+    for part in np.array_split(np.arange(50_000), 7):
+        index.add(xs[part], ys[part], owners[part])
+    for owner in range(3):
+        mine = owners == owner
+        expected = set(zip(xs[mine].tolist(), ys[mine].tolist()))
+        assert index.ranges()[owner] == len(expected)
+        assert set(map(tuple, index.sites(owner).tolist())) == expected
+    assert index.owner_visits().tolist() == np.bincount(owners).tolist()
+    x, y, owner = xs[123].item(), ys[123].item(), owners[123].item()
+    assert index.visits(x, y, owner) == int(((xs == x) & (ys == y) & (owners == owner)).sum())
+
+
+@pytest.mark.parametrize(("model", "engine"), [(Grid4, "python"), (Grid8, "numpy")])
+def test_visited_sites_match_paths(model, engine) -> None:
+    world = World(model, 5, engine=engine, seed=4)
+    sites = VisitedSites()
+    world.observe(sites)
+    world.simulate(2000)
+    world.step()
+    everywhere = set()
+    for i, walker in enumerate(world._walkers):
+        path = [tuple(p) for p in path_array(walker.chemin).astype(int).tolist()]
+        everywhere.update(path)
+        assert sites.ranges()[i] == len(set(path))
+        assert sites.revisits()[i] == len(path) - len(set(path))
+        assert sites.visits(*path[50], walker=i) == path.count(path[50])
+    assert sites.total.nmb_sites == len(everywhere)
+    assert sites.total.nmb_visits == 5 * 2002
+
+
+def test_visited_sites_without_history_or_per_walker() -> None:
+    world = World(Grid4, 3, engine="numpy", seed=9, record=False)
+    sites = VisitedSites(per_walker=False)
+    world.observe(sites)
+    world.simulate(500)
+    assert 0 < sites.total.nmb_sites <= 3 * 501
+    assert sites.visits(0, 0) >= 3
+    with pytest.raises(ValueError):
+        sites.ranges()
+    with pytest.raises(ValueError):
+        World(Continuous, 2, seed=1).observe(VisitedSites())
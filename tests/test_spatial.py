@@ -0,0 +1,137 @@
+﻿import math
+
+import numpy as np
+import pytest
+
+from random_walk.spatial import Annihilation, CellList, Coalescence, PairCounter
+from random_walk.walk_paterns import Continuous, Grid4
+from random_walk.world import World
+
+
+def brute_pairs(positions: np.ndarray, distance: float) -> set:
+    d2 = np.square(positions[:, np.newaxis] - positions[np.newaxis]).sum(axis=-1)
+    i, j = np.nonzero(np.triu(d2 <= distance * distance, 1))
+    return set(zip(i.tolist(), j.tolist()))
+
+
+@pytest.mark.parametrize("distance", [0.7, 1.5, 4.0])
+def test_pairs_match_brute_force(distance) -> None:
+    positions = np.random.default_rng(1).uniform(-20, 20, (800, 2))
+    index = CellList(1.5, positions)
+    i, j = index.pairs(distance)
+    assert (i < j).all()
+    assert set(zip(i.tolist(), j.tolist())) == brute_pairs(positions, distance)
+
+
+def test_range_and_nearest_queries() -> None:
+    positions = np.random.default_rng(2).uniform(-30, 30, (500, 2))
+    index = CellList(2.0, positions)
+    distances = np.sqrt(np.square(positions - (3.5, -7.0)).sum(axis=1))
+    assert sorted(index.within((3.5, -7.0), 6.0).tolist()) == np.flatnonzero(distances <= 6.0).tolist()
+    assert index.nearest((3.5, -7.0)) == (int(distances.argmin()), pytest.approx(distances.min()))
+    # Loin de tous les marcheurs, le rayon de recherche double jusqu'a les atteindre.
+    far = np.sqrt(np.square(positions - (500.0, 500.0)).sum(axis=1))
+    assert index.nearest((500.0, 500.0))[0] == int(far.argmin())
+    own = index.nearest(tuple(positions[10]), exclude=10)
+    assert own[0] != 10 and own[1] > 0
+    assert CellList(1.0).nearest((0, 0)) == (-1, math.inf)
+
+
+class FullScanGuard(np.ndarray):
+    # Tableau de positions refusant toute operation sur l'ensemble des marcheurs.
+    total = 0
+
+    def __sub__(self, other):
+        assert len(self) < self.total, "nearest scanned every walker"
+        return np.asarray(self) - other
+
+
+def test_nearest_only_looks_at_nearby_cells() -> None:
+    rng = np.random.default_rng(4)
+    positions = rng.uniform(-50, 50, (5000, 2))
+    index = CellList(1.0, positions)
+    # Deplacement: l'etendue des cellules occupees suit la mise a jour.
+    positions = positions + (200.0, -80.0)
+    index.update(positions)
+    FullScanGuard.total = len(positions)
+    index._positions = index._positions.view(FullScanGuard)
+    for point in rng.uniform(-300, 300, (50, 2)):
+        distances = np.sqrt(np.square(positions - point).sum(axis=1))
+        assert index.nearest(tuple(point)) == (int(distances.argmin()), pytest.approx(distances.min()))
+
+
+def test_update_and_remove_keep_index_consistent() -> None:
+    rng = np.random.default_rng(3)
+    positions = rng.uniform(-10, 10, (300, 2))
+    index = CellList(1.0, positions)
+    for _ in range(5):
+        positions = positions + rng.normal(0, 0.4, positions.shape)
+        index.update(positions)
+        assert set(zip(*map(np.ndarray.tolist, index.pairs(1.0)))) == brute_pairs(positions, 1.0)
+    removed = np.array([0, 5, 299, 120])
+    index.remove(removed)
+    remaining = np.delete(positions, removed, axis=0)
+    assert len(index) == 296
+    assert set(zip(*map(np.ndarray.tolist, index.pairs(1.0)))) == brute_pairs(remaining, 1.0)
+
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+def test_world_keeps_index_and_counts_pairs(engine) -> None:
+    world = World(Grid4, 50, engine=engine, seed=5)
+    counter = PairCounter(1.0)
+    world.add_interaction(counter)
+    world.simulate(20)
+    reference = World(Grid4, 50, engine=engine, seed=5)
+    reference.simulate(20)
+    np.testing.assert_array_equal(world.positions(), reference.positions())
+    assert len(counter.counts) == 20
+    assert counter.counts[-1] == len(brute_pairs(world.positions().astype(float), 1.0))
+    with pytest.raises(ValueError):
+        world.simulate(5, jobs=2)
+    with pytest.raises(ValueError):
+        world.first_passage(lambda xs, ys: xs > 3, 10)
+
+
+@pytest.mark.parametrize(("rule", "survivors"), [(Annihilation(0.5), 0), (Coalescence(0.5), 1)])
+def test_reactions_remove_walkers(rule, survivors) -> None:
+    world = World(Grid4, 7, engine="numpy", seed=1)
+    world.spatial_index(1.0)
+    rule(world, world.spatial_index())
+    # Tous au meme point: trois paires reagissent, un survivant reste pour un nombre impair.
+    assert len(world._walkers) == (1 if survivors == 0 else 4)
+    assert rule.reactions == 3
+    world.simulate(3)
+    assert len(world.spatial_index()) == len(world._walkers) == len(world.positions())
+
+
+def test_annihilation_thins_population() -> None:
+    world = World(Continuous, 400, engine="numpy", seed=7, record=False)
+    world.remove_walkers(np.arange(1, 400, 2))
+    world.simulate(1)
+    rule = Annihilation(0.2)
+    world.add_interaction(rule)
+    before = len(world._walkers)
+    world.simulate(30)
+    assert len(world._walkers) == before - 2 * rule.reactions
+    i, _ = world.spatial_index().pairs(0.2)
+    assert len(i) == 0
+
+
+def test_step_model_interaction_hook() -> None:
+    class Sticky(Grid4):
+        interaction_range = 1.0
+        calls = []
+
+        def interact(self, world, index) -> None:
+            self.calls.append(len(index))
+
+    world = World(Sticky, 4, seed=2)
+    world.simulate(3)
+    assert Sticky.calls == [4, 4, 4]
+
+    class Broken(Grid4):
+        def interact(self, world, index) -> None:
+            return None
+
+    with pytest.raises(ValueError):
+        World(Broken, 2)
@@ -0,0 +1,83 @@
+﻿import numpy as np
+import pytest
+
+from random_walk.stats import DiffusionStats, RunningMoments, next_checkpoint
+from random_walk.trajectories import path_array
+from random_walk.walk_paterns import Continuous, Grid4
+from random_walk.world import World
+
+
+def test_running_moments_match_numpy() -> None:
+    rng = np.random.default_rng(1)
+    values = 1e9 + rng.normal(size=1000)
+    moments = RunningMoments()
+    for start in range(0, 1000, 137):
+        moments.add(values[start : start + 137])
+    other = RunningMoments()
+    other.add(values[:10])
+    moments.merge(other)
+    merged = np.concatenate([values, values[:10]])
+    assert moments.count == 1010
+    assert moments.mean == pytest.approx(merged.mean())
+    assert moments.variance == pytest.approx(merged.var(), rel=1e-6)
+
+
+def test_checkpoints_are_log_spaced() -> None:
+    steps = [1]
+    while steps[-1] < 1000:
+        steps.append(next_checkpoint(steps[-1]))
+    assert steps[:4] == [1, 2, 3, 4]
+    assert all(b > a for a, b in zip(steps, steps[1:]))
+    # Environ dix points par decade une fois les premiers pas passes.
+    assert 8 <= sum(100 <= s < 1000 for s in steps) <= 12
+
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+def test_observed_stats_match_recorded_paths(engine) -> None:
+    world = World(Continuous, 20, engine=engine, seed=9)
+    stats = DiffusionStats()
+    world.observe(stats)
+    world.simulate(150)
+    world.step()
+    world.simulate(49)
+    paths = np.stack([path_array(w.chemin) for w in world._walkers])
+    table = stats.table()
+    assert stats.steps == 200
+    assert 150 < table[-1, 0] <= 200
+    for row in table:
+        d = paths[:, int(row[0])] - paths[:, 0]
+        r2 = (d**2).sum(axis=1)
+        expected = [len(r2), d[:, 0].mean(), d[:, 1].mean(), d[:, 0].var(), d[:, 1].var(), r2.mean(), r2.var()]
+        np.testing.assert_allclose(row[1:], expected, atol=1e-9)
+
+
+def test_sampled_and_streamed_stats_agree() -> None:
+    # Observateur seul (lignes echantillonnees) ou avec un writer (toutes les lignes).
+    sampled = DiffusionStats()
+    world = World(Grid4, 5, seed=3)
+    world.observe(sampled)
+    world.simulate(500)
+    streamed = DiffusionStats()
+    World(Grid4, 5, seed=3).simulate(500, writer=streamed)
+    np.testing.assert_array_equal(sampled.table(), streamed.table())
+
+
+def test_grid4_diffusion_coefficient() -> None:
+    # Pas unitaires en 2D: MSD(t) = t, donc D = 1/4.
+    world = World(Grid4, 2000, engine="numpy", seed=1, record=False)
+    stats = DiffusionStats()
+    world.observe(stats)
+    world.simulate(1000)
+    assert stats.diffusion_coefficient() == pytest.approx(0.25, rel=0.1)
+
+
+def test_save_writes_table(tmp_path) -> None:
+    stats = DiffusionStats(per_decade=2)
+    World(Grid4, 3, seed=2).simulate(100, writer=stats)
+    output = tmp_path / "stats.txt"
+    stats.save(str(output))
+    lines = output.read_text().splitlines()
+    assert lines[0].startswith("# steps 100 diffusion_coefficient")
+    assert lines[1] == "# t walkers mean_x mean_y var_x var_y msd var_r2"
+    assert len(lines) == 2 + len(stats.table())
+    assert lines[2].split()[:2] == ["1", "3"]
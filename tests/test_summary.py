@@ -0,0 +1,51 @@
+﻿import numpy as np
+import pytest
+
+from random_walk.summary import EndpointSummary, PathSummary
+from random_walk.trajectories import path_array
+from random_walk.walk_paterns import Continuous, Grid4
+from random_walk.world import World
+
+
+@pytest.mark.parametrize(("model", "engine"), [(Grid4, "python"), (Continuous, "numpy")])
+def test_summary_matches_recorded_paths(model, engine) -> None:
+    world = World(model, 6, engine=engine, seed=11)
+    summary = PathSummary()
+    world.observe(summary)
+    world.simulate(300)
+    world.step()
+    table = summary.table()
+    assert table.shape == (6, len(PathSummary.columns))
+    for i, walker in enumerate(world._walkers):
+        path = path_array(walker.chemin)
+        r = np.sqrt(np.square(path - path[0]).sum(axis=1))
+        expected = [i, 301, *path[0], *path[-1], path[:, 0].min(), path[:, 0].max(), path[:, 1].min(), path[:, 1].max(), r.max()]
+        np.testing.assert_allclose(table[i], expected)
+
+
+def test_endpoints_skip_intermediate_rows() -> None:
+    world = World(Grid4, 4, seed=5, record=False)
+    summary = EndpointSummary()
+    world.observe(summary)
+    world.simulate(1000)
+    reference = World(Grid4, 4, seed=5)
+    reference.simulate(1000)
+    table = summary.table()
+    assert table.shape == (4, 6)
+    assert (table[:, 1] == 1000).all()
+    np.testing.assert_array_equal(table[:, 4:6], reference.positions())
+    # Sans historique: seule la position courante est gardee.
+    assert len(world._walkers[0].chemin) == 1
+
+
+def test_summary_save_writes_lattice_integers(tmp_path) -> None:
+    summary = PathSummary()
+    World(Grid4, 2, seed=1).simulate(10, writer=summary)
+    output = tmp_path / "summary.txt"
+    summary.save(str(output))
+    lines = output.read_text().splitlines()
+    assert lines[0] == "# " + " ".join(PathSummary.columns)
+    fields = lines[1].split()
+    assert fields[:4] == ["0", "10", "0", "0"]
+    assert all("." not in field for field in fields[:-1])
+    float(fields[-1])
@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from random_walk.trajectories import TrajectoryStore, load_trajectories, open_writer, resolve_format
+from random_walk.walk_paterns import Continuous, Grid4, seed
+from random_walk.walker import Walker
+from random_walk.world import World
+
+
+def test_resolve_format_from_extension() -> None:
+    assert resolve_format("run.rwb") == "binary"
+    assert resolve_format("run.BIN") == "binary"
+    assert resolve_format("run.txt") == "text"
+    assert resolve_format("run.txt", "binary") == "binary"
+    with pytest.raises(ValueError, match="Unknown format"):
+        resolve_format("run.txt", "csv")
+
+
+def test_binary_roundtrip_lattice(tmp_path) -> None:
+    seed(5)
+    world = World(Grid4, 3, seed=5)
+    world.simulate(12)
+    world.add_walker(Walker(Grid4))
+    path = tmp_path / "walk.rwb"
+    world.to_file(str(path))
+
+    data = load_trajectories(str(path))
+    assert data.pattern == "grid4"
+    assert data.seed == 5
+    assert data.steps == 12
+    assert data.points.dtype == np.int32
+    assert len(data) == 4
+    for walker, points in zip(world._walkers, data):
+        assert [tuple(p) for p in points.tolist()] == list(walker.chemin)
+
+
+def test_binary_roundtrip_numpy_engine(tmp_path) -> None:
+    world = World(Continuous, 2, engine="numpy")
+    world.simulate(7)
+    path = tmp_path / "walk.dat"
+    world.to_file(str(path), fmt="binary")
+
+    data = load_trajectories(str(path))
+    assert data.seed == world._seed
+    assert data.points.dtype == np.float64
+    np.testing.assert_array_equal(data.walker(1), np.asarray(list(world._walkers[1].chemin)))
+
+    # La graine enregistree suffit a rejouer le run.
+    replay = World(Continuous, 2, engine="numpy", seed=data.seed)
+    replay.simulate(7)
+    assert list(replay._walkers[1].chemin) == list(world._walkers[1].chemin)
+
+
+def test_load_rejects_text_file(tmp_path) -> None:
+    path = tmp_path / "walk.txt"
+    World(Grid4, 1).to_file(str(path))
+    with pytest.raises(ValueError, match="Not a random walk trajectory file"):
+        load_trajectories(str(path))
+
+
+@pytest.mark.parametrize("engine,pattern", [("python", Grid4), ("python", Continuous), ("numpy", Continuous)])
+@pytest.mark.parametrize("suffix", [".txt", ".rwb"])
+def test_streaming_matches_to_file(tmp_path, engine, pattern, suffix) -> None:
+    seed(21)
+    full = World(pattern, 3, engine=engine, seed=21)
+    full.simulate(40)
+    expected = tmp_path / f"full{suffix}"
+    full.to_file(str(expected))
+
+    seed(21)
+    streamed = World(pattern, 3, engine=engine, seed=21, record=False)
+    output = tmp_path / f"stream{suffix}"
+    streamed.stream_to_file(str(output), 40)
+
+    assert output.read_bytes() == expected.read_bytes()
+    assert streamed._walkers[0].chemin == [full._walkers[0].position]
+
+
+def test_writer_rejects_incomplete_output(tmp_path) -> None:
+    world = World(Grid4, 2, record=False)
+    with pytest.raises(ValueError, match="Incomplete trajectory"):
+        with open_writer(str(tmp_path / "walk.rwb"), 2, 10) as writer:
+            world.simulate(5, writer=writer)
+
+
+def test_store_random_access_after_world_run(tmp_path) -> None:
+    seed(8)
+    reference = World(Grid4, 4, seed=8)
+    reference.simulate(25)
+
+    seed(8)
+    world = World(Grid4, 4, seed=8, record=False)
+    path = tmp_path / "walk.rwb"
+    with TrajectoryStore.create(str(path), 4, 25, pattern="grid4", seed=8, typecode="i") as store:
+        world.simulate(25, writer=store)
+
+    store = TrajectoryStore(str(path))
+    assert len(store) == 4
+    assert store.steps == 25
+    assert isinstance(store.walker(2), np.memmap)
+    expected = list(reference._walkers[2].chemin)[5:9]
+    assert [tuple(p) for p in store.walker(2)[5:9].tolist()] == expected
+    assert store.window(0, 3).shape == (4, 3, 2)
+    with pytest.raises(ValueError, match="not opened for writing"):
+        store.write_block(np.zeros((1, 4, 2)))
+    # Meme fichier lisible par le lecteur du format binaire.
+    assert load_trajectories(str(path)).steps == 25
+
+
+def test_store_rejects_variable_length_file(tmp_path) -> None:
+    world = World(Grid4, 1)
+    world.simulate(3)
+    world.add_walker(Walker(Grid4))
+    path = tmp_path / "walk.rwb"
+    world.to_file(str(path))
+    with pytest.raises(ValueError, match="fixed-stride"):
+        TrajectoryStore(str(path))
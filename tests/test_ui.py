@@ -1,4 +1,4 @@
-import importlib
+﻿import importlib
 import sys
 from types import ModuleType, SimpleNamespace
 
@@ -26,7 +26,7 @@ class DummySurface:
     def get_rect(self, center=None):
         return DummyRect(center=center or (0, 0))
 
-    def fill(self, _color):
+    def fill(self, _color, _rect=None):
         return None
 
     def blit(self, *args, **kwargs):
@@ -40,11 +40,15 @@ class DummyFont:
     def __init__(self) -> None:
         self.last_text = None
         self.last_color = None
+        self.renders = 0
 
     def render(self, text, _antialias, color):
         self.last_text = text
         self.last_color = color
-        return DummySurface()
+        self.renders += 1
+        surface = DummySurface()
+        surface.color = color
+        return surface
 
 
 class FixedStepModel:
@@ -66,6 +70,13 @@ def make_fake_pygame(mouse_pos=(0, 0)) -> ModuleType:
     fake.K_ESCAPE = 27
     fake.K_SPACE = 32
     fake.K_p = ord("p")
+    fake.K_a = ord("a")
+    fake.K_o = ord("o")
+    fake.K_PLUS = ord("+")
+    fake.K_EQUALS = ord("=")
+    fake.K_KP_PLUS = 1073741911
+    fake.K_MINUS = ord("-")
+    fake.K_KP_MINUS = 1073741910
 
     event_queue = []
 
@@ -94,11 +105,20 @@ def make_fake_pygame(mouse_pos=(0, 0)) -> ModuleType:
     fake.display = SimpleNamespace(
         set_mode=lambda size: DummySurface(size=size),
         set_caption=lambda _caption: None,
-        update=lambda: None,
-        flip=lambda: None,
+        update=lambda *_args: fake.updates.append(_args),
+        flip=lambda: fake.updates.append("flip"),
     )
     fake.Color = FakeColor
-    fake.draw = SimpleNamespace(lines=lambda *_args, **_kwargs: None, circle=lambda *_args, **_kwargs: None)
+    fake.Surface = lambda size, *_args, **_kwargs: DummySurface(size=size)
+    fake.line_calls = []
+    fake.draw = SimpleNamespace(
+        lines=lambda _surface, _color, _closed, points, _width: fake.line_calls.append(points),
+        circle=lambda *_args, **_kwargs: None,
+    )
+    fake.image = SimpleNamespace(tobytes=lambda surface, _fmt: bytes(3 * surface.get_size()[0] * surface.get_size()[1]))
+    fake.blitted = []
+    fake.updates = []
+    fake.surfarray = SimpleNamespace(blit_array=lambda _surface, array: fake.blitted.append(array.copy()))
     fake._set_events = set_events
     return fake
 
@@ -106,8 +126,8 @@ def make_fake_pygame(mouse_pos=(0, 0)) -> ModuleType:
 def import_screen(monkeypatch, fake_pygame):
     # Recharge l'ecran avec le faux pygame injecte dans sys.modules.
     monkeypatch.setitem(sys.modules, "pygame", fake_pygame)
-    if "random_walk.screen" in sys.modules:
-        del sys.modules["random_walk.screen"]
+    for name in ("random_walk.screen", "random_walk.trail", "random_walk.particles", "random_walk.assets"):
+        sys.modules.pop(name, None)
     return importlib.import_module("random_walk.screen")
 
 
@@ -120,10 +140,19 @@ def test_button_hit_testing_and_colors() -> None:
     assert btn.check_for_input((10, 10)) is True
     assert btn.check_for_input((1000, 1000)) is False
 
-    btn.change_color((10, 10))
-    assert font.last_color == "green"
-    btn.change_color((1000, 1000))
-    assert font.last_color == "white"
+    # Les deux etats sont rendus a la creation, puis seulement echanges.
+    assert font.renders == 2
+    normal = btn._text
+    assert normal.color == "white"
+    assert btn.change_color((10, 10)) is True
+    hovered = btn._text
+    assert hovered is not normal
+    assert hovered.color == "green"
+    assert btn.change_color((11, 10)) is False
+    assert btn.change_color((1000, 1000)) is True
+    assert btn._text is normal
+    assert btn._text.color == "white"
+    assert font.renders == 2
 
 
 def test_button_no_label_short_circuits_color_change() -> None:
@@ -134,7 +163,7 @@ def test_button_no_label_short_circuits_color_change() -> None:
     btn = Button(surface, (5, 5), font, screen)
 
     font.last_color = None
-    btn.change_color((5, 5))
+    assert btn.change_color((5, 5)) is False
     assert font.last_color is None
 
 
@@ -160,6 +189,37 @@ def test_screen_main_menu_quit_button(monkeypatch) -> None:
     ui.main_menue()
 
 
+def test_screen_main_menu_redraws_only_on_hover_change(monkeypatch) -> None:
+    # Menu immobile: un seul rendu complet, puis rien tant que le survol ne change pas.
+    fake = make_fake_pygame(mouse_pos=(0, 0))
+    fake._set_events([[], [], [], [SimpleNamespace(type=fake.QUIT)]])
+    screen_mod = import_screen(monkeypatch, fake)
+
+    world = World(FixedStepModel, 1)
+    ui = screen_mod.Screen(world)
+    ui.main_menue()
+
+    assert fake.updates == [()]
+
+
+def test_get_font_loads_each_font_once(monkeypatch) -> None:
+    fake = make_fake_pygame()
+    loads = []
+    fake.font = SimpleNamespace(SysFont=lambda name, size: loads.append((name, size)) or DummyFont())
+    import_screen(monkeypatch, fake)
+    assets = importlib.import_module("random_walk.assets")
+
+    assert assets.get_font("Arial", 20) is assets.get_font("Arial", 20)
+    assets.get_font("Arial", 48)
+    assert loads == [("Arial", 20), ("Arial", 48)]
+    texts = assets.TextCache(DummyFont(), max_entries=2)
+    first = texts.render("a", "gray")
+    assert texts.render("a", "gray") is first
+    texts.render("b", "gray")
+    texts.render("c", "gray")
+    assert texts.render("a", "gray") is not first
+
+
 def test_screen_simulation_pause_and_max_steps(monkeypatch) -> None:
     # Pause/relance puis arret automatique a max_steps.
     # On verifie que le monde a bien avance d'un pas.
@@ -179,6 +239,21 @@ def test_screen_simulation_pause_and_max_steps(monkeypatch) -> None:
     assert world._walkers[0].position == (1.0, 0.0)
 
 
+def test_screen_simulation_paused_draws_nothing(monkeypatch) -> None:
+    # En pause et sans evenement, aucune image n'est redessinee.
+    fake = make_fake_pygame()
+    pause = [SimpleNamespace(type=fake.KEYDOWN, key=fake.K_SPACE)]
+    fake._set_events([pause, [], [], [], [SimpleNamespace(type=fake.QUIT)]])
+    screen_mod = import_screen(monkeypatch, fake)
+
+    world = World(FixedStepModel, 1)
+    ui = screen_mod.Screen(world, simulation_fps=1, max_steps=None)
+    ui.simulation()
+
+    # Image de la pause puis image de l'evenement QUIT.
+    assert fake.updates == ["flip", "flip"]
+
+
 def test_screen_simulation_quit_event(monkeypatch) -> None:
     # Un event QUIT doit sortir proprement de la simulation.
     fake = make_fake_pygame()
@@ -190,3 +265,245 @@ def test_screen_simulation_quit_event(monkeypatch) -> None:
     ui.simulation()
 
     assert world._walkers[0].position == (1.0, 0.0)
+
+
+def import_trail(monkeypatch, fake_pygame):
+    # Meme principe que import_screen pour le calque des trainees.
+    monkeypatch.setitem(sys.modules, "pygame", fake_pygame)
+    if "random_walk.trail" in sys.modules:
+        del sys.modules["random_walk.trail"]
+    return importlib.import_module("random_walk.trail")
+
+
+def test_screen_profile_phases_and_overlay(monkeypatch) -> None:
+    # Avec --profile: phases du rendu mesurees, surcouche affichee puis masquee par O.
+    from random_walk import profiling
+
+    fake = make_fake_pygame()
+    screen_mod = import_screen(monkeypatch, fake)
+    profiler = profiling.Profiler(interval=0)
+    monkeypatch.setattr(profiling, "active", profiler)
+
+    world = World(FixedStepModel, 1)
+    ui = screen_mod.Screen(world, simulation_fps=1, max_steps=3)
+    ui.simulation()
+
+    phases = profiler.snapshot()["phases"]
+    assert phases["display.flip"]["calls"] == len(fake.updates) == 3
+    assert phases["view.draw"]["calls"] == 3
+    assert {"view.bounds", "view.to_screen", "draw.lines", "walker.walk"} <= set(phases)
+    overlay = [args for args, _ in ui._screen.blit_calls if args[1] == (10, 60)]
+    assert len(overlay) == 3
+
+    fake._set_events([[SimpleNamespace(type=fake.KEYDOWN, key=fake.K_o)]])
+    ui = screen_mod.Screen(World(FixedStepModel, 1), simulation_fps=1, max_steps=3)
+    ui.simulation()
+    assert not [args for args, _ in ui._screen.blit_calls if args[1] == (10, 60)]
+
+
+def test_trail_layer_draws_only_new_segments(monkeypatch) -> None:
+    # Chaque mise a jour ne trace que le segment du dernier pas.
+    fake = make_fake_pygame()
+    trail_mod = import_trail(monkeypatch, fake)
+    world = World(FixedStepModel, 1)
+    layer = trail_mod.TrailLayer((1280, 720), ["white"])
+    layer.update(world._walkers)
+    for _ in range(5):
+        world.step()
+        fake.line_calls.clear()
+        redrawn = layer.update(world._walkers)
+        if not redrawn:
+            assert len(fake.line_calls) == 1
+            assert len(fake.line_calls[0]) == 2
+
+
+def test_trail_layer_rescales_rarely(monkeypatch) -> None:
+    # Hysteresis: la vue n'est recadree qu'un nombre logarithmique de fois.
+    fake = make_fake_pygame()
+    trail_mod = import_trail(monkeypatch, fake)
+    world = World(FixedStepModel, 2)
+    layer = trail_mod.TrailLayer((1280, 720), ["white", "red"])
+    for _ in range(2000):
+        world.step()
+        layer.update(world._walkers)
+    assert 1 <= layer.redraws <= 14
+    x, _ = layer.to_screen(*world._walkers[0].position)
+    assert 0 <= x <= 1280
+
+
+def test_trail_layer_uses_simplified_levels_when_zoomed_out(monkeypatch) -> None:
+    # Vue tres large: le redessin complet passe par un niveau de la pyramide.
+    fake = make_fake_pygame()
+    trail_mod = import_trail(monkeypatch, fake)
+    world = World(FixedStepModel, 1)
+    world.simulate(5000)
+    layer = trail_mod.TrailLayer((100, 100), ["white"])
+    fake.line_calls.clear()
+    assert layer.update(world._walkers) is True
+    assert layer._level > 0
+    drawn = sum(len(points) for points in fake.line_calls)
+    assert 2 <= drawn < 5000 / 10
+    # Pas suivants: seuls les nouveaux sommets du niveau sont traces.
+    fake.line_calls.clear()
+    world.step()
+    layer.update(world._walkers)
+    assert sum(len(points) for points in fake.line_calls) <= 2
+
+
+def test_screen_runs_several_steps_per_frame(monkeypatch) -> None:
+    # 3 pas par image, double par "+": 3 puis 6 pas, puis arret a max_steps.
+    fake = make_fake_pygame()
+    fake._set_events([[], [SimpleNamespace(type=fake.KEYDOWN, key=fake.K_PLUS)]])
+    screen_mod = import_screen(monkeypatch, fake)
+
+    world = World(FixedStepModel, 1)
+    ui = screen_mod.Screen(world, simulation_fps=1, max_steps=20, steps_per_frame=3)
+    ui.simulation()
+
+    assert ui._steps_per_frame == 6
+    assert world._walkers[0].position == (20.0, 0.0)
+
+
+def test_screen_adaptive_mode_respects_max_steps(monkeypatch) -> None:
+    # Mode adaptatif: plusieurs lots par image, sans depasser max_steps.
+    fake = make_fake_pygame()
+    screen_mod = import_screen(monkeypatch, fake)
+
+    world = World(FixedStepModel, 2)
+    ui = screen_mod.Screen(world, simulation_fps=10, max_steps=500, steps_per_frame=None)
+    ui.simulation()
+
+    assert world._walkers[1].position == (500.0, 0.0)
+    assert ui._chunk > 1
+
+
+def test_screen_background_simulation(monkeypatch) -> None:
+    # Le monde tourne dans un autre processus; l'ecran dessine ses copies et recupere l'etat final.
+    from random_walk.walk_paterns import Grid4
+
+    fake = make_fake_pygame()
+    screen_mod = import_screen(monkeypatch, fake)
+
+    world = World(Grid4, 2, seed=6)
+    ui = screen_mod.Screen(world, simulation_fps=100, max_steps=300, background=True)
+    ui.simulation()
+
+    reference = World(Grid4, 2, seed=6)
+    reference.simulate(300)
+    assert [list(w.chemin) for w in world._walkers] == [list(w.chemin) for w in reference._walkers]
+
+
+def import_particles(monkeypatch, fake_pygame):
+    # Meme principe que import_screen pour le calque des positions.
+    monkeypatch.setitem(sys.modules, "pygame", fake_pygame)
+    if "random_walk.particles" in sys.modules:
+        del sys.modules["random_walk.particles"]
+    return importlib.import_module("random_walk.particles")
+
+
+def test_particle_layer_draws_one_pixel_per_walker(monkeypatch) -> None:
+    import numpy as np
+
+    fake = make_fake_pygame()
+    particles_mod = import_particles(monkeypatch, fake)
+    layer = particles_mod.ParticleLayer((200, 100), 3)
+    layer.update(np.array([[0, 0], [5, 2], [-5, -2]]))
+    pixels = fake.blitted[-1]
+    assert pixels.shape == (200, 100, 3)
+    lit = np.argwhere(pixels.any(axis=-1))
+    assert len(lit) == 3
+    # Chaque marcheur garde sa couleur de la palette.
+    x, y = layer.to_screen(5, 2)
+    assert (pixels[x, y] == particles_mod.hue_palette(3)[1]).all()
+
+
+def test_particle_layer_density_counts_walkers(monkeypatch) -> None:
+    import numpy as np
+
+    fake = make_fake_pygame()
+    particles_mod = import_particles(monkeypatch, fake)
+    layer = particles_mod.ParticleLayer((100, 100), 4, mode="density")
+    layer.update(np.array([[0.0, 0.0], [0.0, 0.0], [0.0, 0.0], [3.0, 1.0]]))
+    pixels = fake.blitted[-1]
+    heat = particles_mod.heat_palette()
+    # Pixel le plus peuple au sommet de la palette, pixels vides en noir.
+    assert (pixels[layer.to_screen(0.0, 0.0)] == heat[-1]).all()
+    assert 0 < pixels[layer.to_screen(3.0, 1.0)].sum() < heat[-1].sum()
+    assert not pixels[0, 0].any()
+
+
+def test_screen_density_render(monkeypatch) -> None:
+    # Rendu par densite: aucune trainee ni cercle, une image par tableau de pixels.
+    from random_walk.walk_paterns import Grid4
+
+    fake = make_fake_pygame()
+    screen_mod = import_screen(monkeypatch, fake)
+
+    world = World(Grid4, 50, engine="numpy", seed=3)
+    ui = screen_mod.Screen(world, simulation_fps=100, max_steps=10, steps_per_frame=5, render="density")
+    ui.simulation()
+
+    assert world._steps_done == 10
+    assert len(fake.blitted) == 2
+    assert fake.line_calls == []
+
+
+def test_screen_export_frames_without_window(monkeypatch) -> None:
+    # Sans fenetre: une image au depart puis tous les 4 pas, jusqu'a max_steps.
+    fake = make_fake_pygame()
+    fake.display.set_mode = None
+    screen_mod = import_screen(monkeypatch, fake)
+
+    class Recorder:
+        def __init__(self) -> None:
+            self.sizes = []
+
+        def submit(self, surface) -> None:
+            self.sizes.append(surface.get_size())
+
+    world = World(FixedStepModel, 2)
+    ui = screen_mod.Screen(world, max_steps=10, headless=True)
+    recorder = Recorder()
+    assert ui.export_frames(recorder, every=4) == 4
+    assert recorder.sizes == [(1280, 720)] * 4
+    assert world._walkers[0].position == (10.0, 0.0)
+
+
+def test_cluster_layer_paints_new_particles_only(monkeypatch) -> None:
+    import numpy as np
+
+    fake = make_fake_pygame()
+    particles_mod = import_particles(monkeypatch, fake)
+    layer = particles_mod.ClusterLayer((200, 100), 4, max_scale=1.0)
+    cluster = np.array([[0, 0], [1, 0], [1, 1], [2, 1]])
+    layer.update(cluster[:2], np.array([[5, 5]]))
+    layer.update(cluster[:3], np.zeros((0, 2)))
+    pixels = fake.blitted[-1]
+    colors = particles_mod.hue_palette(4)
+    # Couleur selon l'ordre d'arrivee; le marcheur de l'image precedente a disparu.
+    assert (pixels[layer.to_screen(0.5, 1.5)] == colors[2]).all()
+    assert int(pixels.any(axis=-1).sum()) == 3
+    redraws = layer.redraws
+    layer.update(cluster, np.zeros((0, 2)))
+    assert layer.redraws == redraws
+    assert int(fake.blitted[-1].any(axis=-1).sum()) == 4
+
+
+def test_screen_exports_cluster_frames(monkeypatch) -> None:
+    from random_walk.dla import Aggregation
+
+    fake = make_fake_pygame()
+    screen_mod = import_screen(monkeypatch, fake)
+
+    class Recorder:
+        def __init__(self) -> None:
+            self.frames = 0
+
+        def submit(self, _surface) -> None:
+            self.frames += 1
+
+    aggregation = Aggregation(50, walkers=10, seed=2)
+    ui = screen_mod.Screen(aggregation, max_steps=30, render="cluster", headless=True)
+    assert ui.export_frames(Recorder(), every=10) == 4
+    assert len(fake.blitted) == 4 and fake.line_calls == []
+    assert aggregation.moves == 30 or aggregation.finished